@@ -0,0 +1,17 @@
+-- Denormalized union of professionalskill and resumeskill, so skill search can
+-- filter by skill id through an index instead of deduplicating both tables per request.
+CREATE TABLE IF NOT EXISTS candidate_skill (
+    profileid INTEGER NOT NULL,
+    skillid INTEGER NOT NULL,
+    PRIMARY KEY (profileid, skillid)
+);
+
+CREATE INDEX IF NOT EXISTS idx_candidate_skill_skill ON candidate_skill (skillid, profileid);
+
+INSERT INTO candidate_skill (profileid, skillid)
+SELECT profileid, skillid FROM professionalskill WHERE profileid IS NOT NULL AND skillid IS NOT NULL
+UNION
+SELECT profileid, skillid FROM resumeskill WHERE profileid IS NOT NULL AND skillid IS NOT NULL
+ON CONFLICT DO NOTHING;
+
+ANALYZE candidate_skill;
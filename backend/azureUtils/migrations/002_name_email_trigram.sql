@@ -0,0 +1,14 @@
+-- Trigram search over candidate names and emails. Safe to re-run.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Both spellings of the name in one column; the '|' keeps a query from matching across them
+ALTER TABLE person ADD COLUMN IF NOT EXISTS full_name_search TEXT
+    GENERATED ALWAYS AS (
+        lower(coalesce(firstname, '') || ' ' || coalesce(lastname, '') || '|' || coalesce(goesbyname, '') || ' ' || coalesce(lastname, ''))
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_person_full_name_search_trgm ON person USING GIN (full_name_search gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_professional_email_trgm ON professional USING GIN (email gin_trgm_ops);
+
+ANALYZE person;
+ANALYZE professional;
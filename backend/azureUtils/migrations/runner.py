@@ -0,0 +1,44 @@
+import os
+import azureUtils.storage.client as client
+
+MIGRATIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def pendingMigrations(applied: set) -> list:
+    # Migrations are numbered .sql files applied in filename order, each at most once
+    files = sorted(f for f in os.listdir(MIGRATIONS_DIR) if f.endswith(".sql"))
+    return [f for f in files if f not in applied]
+
+def runMigrations() -> list:
+    """Apply every migration not yet recorded in schema_migrations. Returns the files applied."""
+    conn = client.getConnection()
+    cur = conn.cursor()
+
+    cur.execute("CREATE TABLE IF NOT EXISTS schema_migrations (version TEXT PRIMARY KEY, applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW())")
+    conn.commit()
+
+    cur.execute("SELECT version FROM schema_migrations")
+    applied = {row[0] for row in cur.fetchall()}
+
+    ran = []
+    try:
+        for name in pendingMigrations(applied):
+            print(f"Applying migration {name}")
+            with open(os.path.join(MIGRATIONS_DIR, name), "r", encoding="utf-8") as f:
+                cur.execute(f.read())
+
+            cur.execute("INSERT INTO schema_migrations (version) VALUES (%s)", (name,))
+            # One transaction per migration, so a failure leaves earlier ones applied
+            conn.commit()
+            ran.append(name)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    return ran
+
+if __name__ == "__main__":
+    # Run from backend/: python -m azureUtils.migrations.runner
+    applied = runMigrations()
+    print(f"Applied {len(applied)} migration(s)" if applied else "Database is up to date")
@@ -1,10 +1,16 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi.responses import StreamingResponse, JSONResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from concurrent.futures import ThreadPoolExecutor
-from azureUtils.storage import candidates, resumes
+from typing import Optional
+import json
+import os
+import job_queue
+import fingerprints
+from azureUtils.storage import candidates, resumes, dashboard
 from resumeProcessing.processing import ingest
 from deterministic_profile import build_profile_from_text
-from openAI.candidateProcessing import candidateDescription, processGeneral, candidateCulturalExperience, processSkillYears
+from openAI.candidateEnrichment import enrichCandidate
 
 router = APIRouter(
     prefix="/api/azure",
@@ -40,6 +46,15 @@ async def count_candidates_all(domain: str = "all"):
     print(f"Counting all candidates for domain: {domain}")
     return candidates.countCandidatesAll(domain)
 
+@router.get("/dashboard/counts")
+async def dashboard_counts(domain: str = "all"):
+    # Everything the dashboard cards need in one call
+    return dashboard.getCounts(domain)
+
+@router.get("/dashboard/counts/cache")
+async def dashboard_counts_cache():
+    return dashboard.cacheStats()
+
 @router.post("/searchNameEmail")
 async def get_candidates(search_string: str = Form(...), domain: str = Form(...), limit: int = Form(5)):
     print('searching for candidates with domain ' + domain)
@@ -58,10 +73,25 @@ def profile_page_count(domain: str = Form(default="all"), search_string: str = F
     else:
         return candidates.searchPageCount(search_string, None, pageLimit, domain)
     
+@router.post("/search")
+def profile_search(domain: str = Form(default="dev"), search_string: str = Form(default=""), currentPage: int = Form(default=1), pageLimit: int = Form(default=10), skills: str = Form(default="")):
+    # pageSearch + pageCount in one call: {"results", "total", "totalApproximate", "pages", "currentPage"}
+    skillQuery = skills if len(skills) > 0 and skills != 'null' else None
+    return candidates.searchCandidatesPage(search_string, skillQuery, pageLimit, max(currentPage - 1, 0), domain=domain)
+
 @router.post("/pageSearch")
-def profile_page_search(domain: str = Form(default="dev"), search_string: str = Form(default=""), currentPage: int = Form(default=1), pageLimit: int = Form(default=10), skills: str = Form(default="")):
+def profile_page_search(domain: str = Form(default="dev"), search_string: str = Form(default=""), currentPage: int = Form(default=1), pageLimit: int = Form(default=10), skills: str = Form(default=""), cursor: Optional[str] = Form(None), keyset: bool = Form(False)):
     print(f"Searching profiles for domain='{domain}' with search_string='{search_string}' on page {currentPage} with pageLimit {pageLimit}")
 
+    # Keyset mode (keyset=true, or any cursor) returns {"results", "next_cursor"}; pass next_cursor back for the following page
+    if keyset or cursor:
+        try:
+            if len(skills) > 0 and skills != 'null':
+                return candidates.searchCandidatesBySkillsNamesKeyset(search_string, skills, pageLimit, cursor, domain=domain)
+            return candidates.searchCandidatesByNameEmailKeyset(search_string, pageLimit, cursor, domain=domain)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
     currentPage = currentPage - 1  # adjust for 0-based indexing in backend
 
     if len(skills) > 0 and skills != 'null':
@@ -75,6 +105,12 @@ def get_profile(profileId: str = ""):
 
     return candidates.getProfile(profileId)
 
+@router.post("/getProfiles")
+def get_profiles(profileIds: str = Form(...)):
+    print(f"Fetching profiles {profileIds}")
+
+    return candidates.getProfiles([i for i in profileIds.split(',') if i.strip()])
+
 @router.get("/public/{profileUrl}")
 def get_profile_public(profileUrl: str = ""):
     print(f"Fetching public profile {profileUrl}")
@@ -99,6 +135,14 @@ def get_profile_short_score(jobId: str = "", profileIds: str = Form(...)):
 
     return candidates.getProfileShortScore(jobId, profileIds.split(','))
 
+@router.post("/getProfile/short/score/{jobId}/stream")
+def get_profile_short_score_stream(jobId: str = "", profileIds: str = Form(...)):
+    print(f"Streaming scores for profiles {profileIds}")
+
+    # One JSON object per line, flushed chunk by chunk so the shortlist can render as rows arrive
+    scores = candidates.iterProfileShortScores(jobId, [i for i in profileIds.split(',') if i.strip()])
+    return StreamingResponse((json.dumps(row) + "\n" for row in scores), media_type="application/x-ndjson")
+
 @router.post("/profile/update")
 async def update_profile_core(personId: str = Form(...), first_name: str = Form(...), last_name: str = Form(...), city: str = Form(default=""), state: str = Form(default=""), country: str = Form(default=""), description: str = Form(default=""), job_title: str = Form(default="")):
     if not personId or personId == "" or not first_name or first_name == "" or not last_name or last_name == "":
@@ -156,17 +200,75 @@ async def update_profile_portfolio(portfolioUpdate: candidates.profilePortfolioU
     return candidates.updateCandidatePortfolio(personId=personId, portfolio=portfolio)
 
 # For multithreading
-def process_skill(raw: str, key: str):
-    return {
-        "title": key,
-        "years": processSkillYears(raw, key)
-    }
+def _processResumeUpload(fileBytes: bytes, filename: str, sourceType: str, domain: str):
+    # The exact same file was already ingested: skip parsing, AI enrichment and the insert
+    namespace = f"azure_resume:{domain}"
+    sha = fingerprints.sha256_bytes(fileBytes)
+    index = fingerprints.get_index()
+    # Reserved before parsing, so two concurrent uploads of the same file can't both insert
+    existing = {}
+    def profileExists(personId):
+        existing["profiles"] = candidates.getProfiles([personId])
+        return bool(existing["profiles"])
+
+    existingId = index.claim(namespace, sha, profileExists)
+    if existingId == fingerprints.PENDING:
+        raise HTTPException(status_code=409, detail="This file is already being processed.")
+    if existingId:
+        existingProfile = existing["profiles"][0]["profile"]
+        name = " ".join(n for n in (existingProfile["firstName"], existingProfile["lastName"]) if n)
+        # An earlier run saved the profile but failed before storing the file (e.g. a retried job)
+        if not resumes.hasResume(int(existingId)):
+            resumes.uploadResumeBytes(fileBytes, filename, int(existingId))
+            return {"status": "success", "message": "Resume uploaded.", "personid": int(existingId), "name": name}
+        return {"status": "success", "message": "Resume was already uploaded.", "personid": int(existingId), "name": name, "duplicate": True}
+
+    try:
+        raw = ingest(sourceType, fileBytes)
+        profile = build_profile_from_text(raw)
+
+        # Close text match (re-exported PDF, small edits): still uploaded, but flagged for a merge
+        textHash = fingerprints.simhash(raw)
+        nearDuplicates = index.find_near(namespace, textHash)
+
+        # One structured completion for every AI field; only fields it gets wrong fall back to the individual prompts
+        enrichment = enrichCandidate(raw, list(profile["skills"].keys()))
+        # The structured answer already carries the name; the local heuristic only covers a miss
+        fullName = enrichment["fullName"] or profile["contact"]["full_name"]
+
+        print(profile)
+
+        profileResult = candidates.uploadProfile(skills=enrichment["skills"], fullName=fullName, domain=domain, email=profile["contact"]["email"], linkedInUrl=profile["contact"]["linkedin"], candidateDescription=enrichment["description"], culturalExperiences=enrichment["culturalExperiences"], candidateCity=enrichment["city"], candidateState=enrichment["state"], candidateCountry=enrichment["country"], candidateTitle=enrichment["title"])
+    except Exception:
+        index.release(namespace, sha)
+        raise
+
+    # Recorded before the blob upload so a retry after a failed upload finds this profile
+    # instead of inserting it again
+    try:
+        index.add(namespace, sha, profileResult["personid"], textHash)
+    except Exception as e:
+        print(f"Could not record fingerprint for profile {profileResult['personid']}: {e}")
+    resumes.uploadResumeBytes(fileBytes, filename, profileResult["personid"])
+
+    return {**profileResult, "nearDuplicates": nearDuplicates}
+
+def _resumeUploadJob(payload: dict, files: list, progress):
+    filename, fileBytes = files[0]
+    progress(0, 1, filename)
+    result = _processResumeUpload(fileBytes, filename, payload["sourceType"], payload["domain"])
+    progress(1, 1, filename)
+    return result
+
+job_queue.register("azure_resume_upload", _resumeUploadJob)
 
 @router.post("/resume/upload")
 async def upload_resume(
     file: UploadFile = File(...),
     source_type: str = Form(None),
     domain: str = Form(default="dev"),
+    background: bool = Form(False),
+    idempotency_key: Optional[str] = Form(None),
 ):
     #try:
     if not file.filename:
@@ -177,42 +279,15 @@ async def upload_resume(
 
     file_bytes = await file.read()
 
-    raw = ingest(source_type, file_bytes)
-    profile = build_profile_from_text(raw)
-
-    # Reset file pointer before uploading
-    file.file.seek(0)
-
-    flatSkills = []
-
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        results = executor.map(process_skill, [raw] * len(profile["skills"]), profile["skills"].keys())
-
-        flatSkills = list(results)
-
-    # TODO: Make python call all AI functions in parallel to speed up processing time. Currently doing sequentially which is not efficient.
-    with ThreadPoolExecutor(max_workers=6) as executor:
-        description_future = executor.submit(candidateDescription, raw)
-        culturalExperiences_future = executor.submit(candidateCulturalExperience, raw)
-        candidateCity_future = executor.submit(processGeneral, raw, "currently lived in city (DO NOT RETURN PROVINCE OR STATE. DO NOT RETURN ASSOCIATED JOBS OR COMPANIES. ONLY RETURN CITY NAME)")
-        candidateState_future = executor.submit(processGeneral, raw, "currently lived in state or province (DO NOT RETURN CITY. DO NOT RETURN ASSOCIATED JOBS OR COMPANIES. ONLY RETURN STATE OR PROVINCE NAME. RETURN NO ADDITIONAL COMMENTARY)")
-        candidateCountry_future = executor.submit(processGeneral, raw, "currently lived in country (DO NOT RETURN CITY, STATE OR PROVINCE. ONLY RETURN COUNTRY NAME)")
-        candidateTitle_future = executor.submit(processGeneral, raw, "current or most recent job title (DO NOT RETURN ANY ASSOCIATED COMPANIES OR JOBS. ONLY RETURN JOB TITLE. RETURN NO ADDITIONAL COMMENTARY)")
-
-    print(profile)
-
-    description = description_future.result()
-    culturalExperiences = culturalExperiences_future.result()
-    candidateCity = candidateCity_future.result()
-    candidateState = candidateState_future.result()
-    candidateCountry = candidateCountry_future.result()
-    candidateTitle = candidateTitle_future.result()
-
-    profileResult = candidates.uploadProfile(skills=flatSkills, fullName=profile["contact"]["full_name"], domain=domain, email=profile["contact"]["email"], linkedInUrl=profile["contact"]["linkedin"], candidateDescription=description, culturalExperiences=culturalExperiences, candidateCity=candidateCity, candidateState=candidateState, candidateCountry=candidateCountry, candidateTitle=candidateTitle)
-
-    await resumes.uploadResume(file, profileResult["personid"])
+    if background:
+        # Poll /api/jobs/{job_id} for the result
+        job = job_queue.get_queue().submit(
+            "azure_resume_upload", {"sourceType": source_type, "domain": domain},
+            files=[(os.path.basename(file.filename), file_bytes)], idempotency_key=idempotency_key
+        )
+        return JSONResponse(status_code=202, content=job)
 
-    return profileResult
+    return await run_in_threadpool(_processResumeUpload, file_bytes, file.filename, source_type, domain)
 
 @router.get("/resume/{profileId}")
 async def get_resume(profileId: str):
@@ -1,6 +1,9 @@
 from fastapi import APIRouter, Form, HTTPException
 from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
 import traceback
+from typing import Optional
+import job_queue
+import fingerprints
 from azureUtils.storage import jobs, candidates
 from jd_match import normalize_jd, azureJobMatch, normalize_all_skills
 from openAI import externalPeopleSearch
@@ -30,9 +33,17 @@ router = APIRouter(
     tags=["azure", "jobs"]
 )
 
-@router.post("/createJob")
-def jdCreate(company: str = Form(...), title: str = Form(...), jd_text: str = Form(...), domain: str = Form(default="dev")):
-    print(f"Uploading {title} at {company}")
+def _createJob(company: str, title: str, domain: str, jd_text: str):
+    # Same JD text posted again (e.g. a retried request) returns the job already created
+    namespace = f"azure_jd:{domain}"
+    sha = fingerprints.sha256_text(jd_text)
+    index = fingerprints.get_index()
+    existingId = index.claim(namespace, sha, lambda jobId: jobs.jobExists(int(jobId)))
+    if existingId == fingerprints.PENDING:
+        raise HTTPException(status_code=409, detail="This job description is already being processed.")
+    if existingId:
+        return {"company": company, "title": title, "domain": domain, "jd_text": jd_text, "jd_id": int(existingId), "duplicate": True}
+
     try:
         # Deprecated
         # skills = normalize_jd(jd_text)
@@ -44,8 +55,41 @@ def jdCreate(company: str = Form(...), title: str = Form(...), jd_text: str = Fo
 
         flatSkills = list(set(flatSkills))  # unique skills
 
-        jobs.uploadJob(company, title, domain, jd_text, flatSkills)
-        return {"company": company, "title": title, "domain": domain, "jd_skills": flatSkills, "jd_text": jd_text}
+        result = jobs.uploadJob(company, title, domain, jd_text, flatSkills)
+        if result is None:
+            # uploadJob logs and swallows its own errors; surface them so the job can be retried
+            raise RuntimeError("Failed to upload job description.")
+    except Exception:
+        index.release(namespace, sha)
+        raise
+
+    # The job is saved at this point; failing here would make a retry insert it a second time
+    try:
+        index.add(namespace, sha, result["jd_id"], fingerprints.simhash(jd_text))
+    except Exception as e:
+        print(f"Could not record fingerprint for job {result['jd_id']}: {e}")
+    return {"company": company, "title": title, "domain": domain, "jd_skills": flatSkills, "jd_text": jd_text, **result}
+
+def _createJobTask(payload: dict, files: list, progress):
+    return _createJob(payload["company"], payload["title"], payload["domain"], payload["jd_text"])
+
+job_queue.register("azure_create_job", _createJobTask)
+
+@router.post("/createJob")
+def jdCreate(company: str = Form(...), title: str = Form(...), jd_text: str = Form(...), domain: str = Form(default="dev"), background: bool = Form(False), idempotency_key: Optional[str] = Form(None)):
+    print(f"Uploading {title} at {company}")
+    try:
+        if background:
+            # Poll /api/jobs/{job_id} for the result
+            job = job_queue.get_queue().submit(
+                "azure_create_job", {"company": company, "title": title, "domain": domain, "jd_text": jd_text},
+                idempotency_key=idempotency_key
+            )
+            return JSONResponse(status_code=202, content=job)
+
+        return _createJob(company, title, domain, jd_text)
+    except HTTPException:
+        raise
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": 'Failed to upload job description.', "trace": traceback.format_exc()})
 
@@ -89,36 +133,26 @@ def run_match(domain: str = Form(default="dev"), jd_id: str = Form(None), top_k:
     except Exception as e:
         print(f'Error during external people search: {e}')
 
-    profiles = candidates.searchCandidatesBySkillId(jd["skillIds"], top_k)
+    # The SQL already orders by matched-skill count, which is the score below, so top_k rows are enough
+    profiles = list(candidates.iterCandidatesBySkillId(jd["skillIds"], top_k))
+    personalities = candidates.getCandidatePersonalities([row['id'] for row in profiles])
 
     jobSkillCount = len(peopleDataSkills) or 1  # avoid division by zero
+    jobSkillsLower = [(skill, skill.lower()) for skill in peopleDataSkills]
+
     ranked = []
     for row in profiles:
-        #p = storage.get_profile(DB_PATH, row["profile_id"])
-        #score, parts = match((p or {}).get("skills", {}), jd_skills)
-        #score, parts = azureJobMatch(row['skillMatches'],peopleDataSkills)
-
-        print(f"Matching profile {row['id']} - {row['firstName']} {row['lastName']}")
-
-        skillMatchCount = 0
-        top_matches = []
-        for skill in peopleDataSkills:
-            if skill.lower() in (s.lower() for s in row['skillMatches']):
-                top_matches.append(skill)
-                skillMatchCount += 1
-                print(f"Matched skill: {skill}")
-
-        print(f"Total matched skills: {skillMatchCount} out of {jobSkillCount}")
-        print(skillMatchCount / jobSkillCount)
-        score = round(skillMatchCount / jobSkillCount * 100)
+        rowSkills = {s.lower() for s in row['skillMatches'] if s}
+        top_matches = [skill for skill, lowered in jobSkillsLower if lowered in rowSkills]
+        score = round(len(top_matches) / jobSkillCount * 100)
+        print(f"Matching profile {row['id']} - {row['firstName']} {row['lastName']}: {len(top_matches)} out of {jobSkillCount} skills")
 
-        print("\n")
         # Set empty and negative values for easy existance checking
         personalityDifferences = []
         averageDifference = -1
         percentageNum = -1
 
-        for personality in row['personality']:
+        for personality in personalities[row['id']]:
             # Get the stat that matches the current one
             matchingStat = next((i for i in jd['personalities'] if i['title'] == personality['title']),None)
             personalityDifferences.append(abs(matchingStat['score']-personality['score']))
@@ -138,6 +172,7 @@ def run_match(domain: str = Form(default="dev"), jd_id: str = Form(None), top_k:
             'culture_match': percentageNum
         })
 
+    # Culture match breaks ties between candidates with the same skill score
     ranked.sort(key=lambda x: (x["score"], x["culture_match"]), reverse=True)
 
     rankedExternal = []
@@ -171,4 +206,4 @@ def run_match(domain: str = Form(default="dev"), jd_id: str = Form(None), top_k:
         })
 
     rankedExternal.sort(key=lambda x: x["score"], reverse=True)
-    return {"jd": {"jd_id": jd["jd_id"], "company": jd.get("company",""), "title": jd.get("title",""), "created_at": jd.get("created_at","")}, "results": ranked[:top_k], "externalMatches": rankedExternal, "skillList": peopleDataSkills}
+    return {"jd": {"jd_id": jd["jd_id"], "company": jd.get("company",""), "title": jd.get("title",""), "created_at": jd.get("created_at","")}, "results": ranked, "externalMatches": rankedExternal, "skillList": peopleDataSkills}
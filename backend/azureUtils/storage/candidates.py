@@ -1,20 +1,31 @@
+import os
 from pydantic import BaseModel
 from fastapi import HTTPException
 import azureUtils.storage.client as client
 import azureUtils.storage.processingFunctions as processing
+import azureUtils.storage.search as search
+import azureUtils.storage.dashboard as dashboard
 from azureUtils.storage.jobs import getJob
 from jd_match import azureJobMatch
+from pagination import decode_cursor, keyset_page
+from ttl_cache import TTLCache
+
+# Candidates scored per round trip by iterProfileShortScores
+SHORTLIST_CHUNK_SIZE = int(os.getenv("SHORTLIST_CHUNK_SIZE", "100"))
+
+# Search totals per filter signature, shared by pageCount and the combined page search
+SEARCH_TOTALS = TTLCache(float(os.getenv("SEARCH_TOTAL_TTL_SECONDS", "30")))
+# Unfiltered counts above this use the planner's row estimate instead of COUNT(*)
+APPROX_COUNT_THRESHOLD = int(os.getenv("SEARCH_APPROX_COUNT_THRESHOLD", "100000"))
 
 def getSkills():
-    conn = client.getConnection()
-    cur = conn.cursor()
+    with client.connection() as conn:
+        cur = conn.cursor()
 
-    query = f"SELECT id, title FROM skill ORDER BY id DESC LIMIT 10;"
+        query = f"SELECT id, title FROM skill ORDER BY id DESC LIMIT 10;"
     
-    cur.execute(query)
-    results = cur.fetchall()
-
-    conn.close()
+        cur.execute(query)
+        results = cur.fetchall()
 
     skills = []
 
@@ -27,15 +38,13 @@ def getSkills():
     return skills
 
 def searchSkills(searchQuery: str):
-    conn = client.getConnection()
-    cur = conn.cursor()
+    with client.connection() as conn:
+        cur = conn.cursor()
 
-    query = f"SELECT id, title FROM skill WHERE title ILIKE '%{searchQuery}%' ORDER BY id DESC LIMIT 10;"
+        query = f"SELECT id, title FROM skill WHERE title ILIKE '%{searchQuery}%' ORDER BY id DESC LIMIT 10;"
     
-    cur.execute(query)
-    results = cur.fetchall()
-
-    conn.close()
+        cur.execute(query)
+        results = cur.fetchall()
 
     skills = []
 
@@ -48,195 +57,86 @@ def searchSkills(searchQuery: str):
     return skills
 
 def countCandidates(domain: str = 'all'):
-    conn = client.getConnection()
-    cur = conn.cursor()
-    
-    query = ''
-    # Count distinct candidates in the person table
-    if domain == 'all':
-        query = f"SELECT COUNT(id) as count FROM person;"
-    else:
-        query = f"SELECT COUNT(id) as count FROM person WHERE domain = '{domain}';"
-    
-    cur.execute(query)
-    results = cur.fetchall()
-
-    conn.close()
-    
-    return results[0][0]
+    return dashboard.getCounts(domain)["total"]
 
 def countCandidatesRecent(domain: str = 'all'):
-    conn = client.getConnection()
-    cur = conn.cursor()
-
-    query = ''
-    # Count candidates added in the last 7 days
-    if domain == 'all':
-        query = f"SELECT COUNT(person.id) as count FROM person JOIN professional ON person.id = professional.id WHERE professional.modifieddate >= CURRENT_DATE - INTERVAL '7 days';"
-    else:
-        query = f"SELECT COUNT(person.id) as count FROM person JOIN professional ON person.id = professional.id WHERE person.domain = '{domain}' AND professional.modifieddate >= CURRENT_DATE - INTERVAL '7 days';"
-    
-    cur.execute(query)
-    results = cur.fetchall()
-
-    conn.close()
-    
-    return results[0][0]
+    # Candidates modified in the last 7 days
+    return dashboard.getCounts(domain)["recent"]
 
 def countCandidatesStatus(domain: str = 'all'):
-    conn = client.getConnection()
-    cur = conn.cursor()
-
-    # Status Guide:
-    # 1 = Draft
-    # 2 = Pending
-    # 3 = Published
-    # 4 = Updated
-    query = ''
-    if domain == 'all':
-        query = f"SELECT professional.status, COUNT(person.id) as count FROM person JOIN professional ON person.id = professional.id GROUP BY professional.status;"
-    else:
-        query = f"SELECT professional.status, COUNT(person.id) as count FROM person JOIN professional ON person.id = professional.id WHERE person.domain = '{domain}' GROUP BY professional.status;"
-    
-    cur.execute(query)
-    results = cur.fetchall()
-
-    conn.close()
-
-    resultsObject = {
-        "Draft": 0,
-        "Pending": 0,
-        "Published": 0,
-        "Updated": 0
-        }
-
-    for r in results:
-        if r[0] == 1:
-            resultsObject["Draft"] = r[1]
-        elif r[0] == 2:
-            resultsObject["Pending"] = r[1]
-        elif r[0] == 3:
-            resultsObject["Published"] = r[1]
-        elif r[0] == 4:
-            resultsObject["Updated"] = r[1]
-    
-    return resultsObject
+    return dict(dashboard.getCounts(domain)["statusCounts"])
 
 def countCandidatesAll(domain: str = 'all'):
-    totalCount = countCandidates(domain)
-    recentCount = countCandidatesRecent(domain)
-    statusCounts = countCandidatesStatus(domain)
+    counts = dashboard.getCounts(domain)
 
     return {
-        "total": totalCount,
-        "recent": recentCount,
-        "statusCounts": statusCounts
+        "total": counts["total"],
+        "recent": counts["recent"],
+        "statusCounts": dict(counts["statusCounts"])
     }
 
 def getProfessionalProfileId(personId: str):
-    conn = client.getConnection()
-    cur = conn.cursor()
+    with client.connection() as conn:
+        cur = conn.cursor()
 
-    # Search for user by firstname, lastname, goesbyname, or email using ILIKE for case-insensitive search
-    # Order by id descending to get the most recent matches first, and limit the number of results
-    query = f"SELECT profper.id FROM person JOIN professional prof ON person.id = prof.personid JOIN professionalprofile profper ON prof.id = profper.professionalid WHERE person.id = {personId};"
+        # Search for user by firstname, lastname, goesbyname, or email using ILIKE for case-insensitive search
+        # Order by id descending to get the most recent matches first, and limit the number of results
+        query = f"SELECT profper.id FROM person JOIN professional prof ON person.id = prof.personid JOIN professionalprofile profper ON prof.id = profper.professionalid WHERE person.id = {personId};"
     
-    cur.execute(query)
-    result = cur.fetchone()
+        cur.execute(query)
+        result = cur.fetchone()
 
-    conn.close()
-    
     return result[0]
 
 def getEmail(personId: str):
-    conn = client.getConnection()
-    cur = conn.cursor()
+    with client.connection() as conn:
+        cur = conn.cursor()
 
-    query = f"SELECT email FROM professional WHERE personid = {personId};"
+        query = f"SELECT email FROM professional WHERE personid = {personId};"
     
-    cur.execute(query)
-    result = cur.fetchone()
+        cur.execute(query)
+        result = cur.fetchone()
 
-    conn.close()
-    
     return result[0]
 
 def getProfilePublicUrl(profileId: str):
-    conn = client.getConnection()
-    cur = conn.cursor()
+    with client.connection() as conn:
+        cur = conn.cursor()
 
-    query = f"SELECT url FROM professional WHERE personid = {profileId};"
+        query = f"SELECT url FROM professional WHERE personid = {profileId};"
     
-    cur.execute(query)
-    result = cur.fetchone()
+        cur.execute(query)
+        result = cur.fetchone()
 
-    conn.close()
-    
     return result[0]
 
 def getSurveyId(personId: str):
-    conn = client.getConnection()
-    cur = conn.cursor()
+    with client.connection() as conn:
+        cur = conn.cursor()
 
-    # Search for user by firstname, lastname, goesbyname, or email using ILIKE for case-insensitive search
-    # Order by id descending to get the most recent matches first, and limit the number of results
-    query = f"SELECT profsur.id FROM person JOIN professional prof ON person.id = prof.personid JOIN professionalprofile profper ON prof.id = profper.professionalid JOIN professionalsurvey profsur ON profper.id = profsur.profileid WHERE person.id = {personId};"
+        # Search for user by firstname, lastname, goesbyname, or email using ILIKE for case-insensitive search
+        # Order by id descending to get the most recent matches first, and limit the number of results
+        query = f"SELECT profsur.id FROM person JOIN professional prof ON person.id = prof.personid JOIN professionalprofile profper ON prof.id = profper.professionalid JOIN professionalsurvey profsur ON profper.id = profsur.profileid WHERE person.id = {personId};"
     
-    cur.execute(query)
-    result = cur.fetchone()
+        cur.execute(query)
+        result = cur.fetchone()
 
-    conn.close()
-    
     return result[0]
 
 def searchCandidatesByNameEmail(query: str, limit: int = 5, domain: str = 'all'):
-    conn = client.getConnection()
-    cur = conn.cursor()
-
-    # Search for user by firstname, lastname, goesbyname, or email using ILIKE for case-insensitive search
-    # Order by id descending to get the most recent matches first, and limit the number of results
-    query = ''
-    if domain == 'all':
-        query = f"SELECT person.id, person.firstname, person.lastname, prof.email, ARRAY_AGG(DISTINCT platact.step) FROM person JOIN professional prof ON person.id = prof.personid LEFT JOIN professionalprofile profper ON prof.id = profper.professionalid LEFT JOIN professionalskill profskill ON profper.id = profskill.profileid LEFT JOIN skill ON profskill.skillid = skill.id LEFT JOIN platformactivity platact ON platact.profileid = profper.id WHERE (person.firstname || ' ' || person.lastname) ILIKE '%{query}%' OR (person.goesbyname || ' ' || person.lastname) ILIKE '%{query}%' OR prof.email ILIKE '%{query}%' GROUP BY person.id, prof.email ORDER BY id DESC LIMIT {limit};"
-    else:
-        query = f"SELECT person.id, person.firstname, person.lastname, prof.email, ARRAY_AGG(DISTINCT platact.step) FROM person JOIN professional prof ON person.id = prof.personid LEFT JOIN professionalprofile profper ON prof.id = profper.professionalid LEFT JOIN professionalskill profskill ON profper.id = profskill.profileid LEFT JOIN skill ON profskill.skillid = skill.id LEFT JOIN platformactivity platact ON platact.profileid = profper.id WHERE person.domain = '{domain}' AND ((person.firstname || ' ' || person.lastname) ILIKE '%{query}%' OR (person.goesbyname || ' ' || person.lastname) ILIKE '%{query}%' OR prof.email ILIKE '%{query}%') GROUP BY person.id, prof.email ORDER BY id DESC LIMIT {limit};"
-    
-    cur.execute(query)
-    results = cur.fetchall()
+    searchTerm = query
 
-    conn.close()
+    with client.connection() as conn:
+        cur = conn.cursor()
 
-    resultsProcessed = []
+        # Search for user by firstname, lastname, goesbyname, or email through the trigram indexes
+        # Closest matches first (most recent on ties), and limit the number of results
+        domainClause, domainParams = ("", ()) if domain == 'all' else ("person.domain = %s AND ", (domain,))
 
-    for r in results:
-        resultsProcessed.append({
-            "id":r[0],
-            "firstName":r[1],
-            "lastName":r[2],
-            "email":r[3],
-            "step": processing.stepProcessingOverall(r[4])
-        })
+        query = f"SELECT person.id, person.firstname, person.lastname, prof.email, ARRAY_AGG(DISTINCT platact.step) FROM person JOIN professional prof ON person.id = prof.personid LEFT JOIN professionalprofile profper ON prof.id = profper.professionalid LEFT JOIN platformactivity platact ON platact.profileid = profper.id WHERE {domainClause}{search.NAME_EMAIL_FILTER} GROUP BY person.id, prof.email ORDER BY {search.NAME_EMAIL_RANK} DESC, person.id DESC LIMIT %s;"
     
-    return resultsProcessed
-
-def searchCandidatesBySkills(query: str, limit: int = 5, domain: str = 'all'):
-    conn = client.getConnection()
-    cur = conn.cursor()
-
-    queryArray = [item.strip() for item in query.split(',')]
-
-    # Search for user by skills attached to the account
-    # Order by id descending to get the most recent matches first, and limit the number of results
-    query = ''
-    if domain == 'all':
-        query = f"SELECT person.id, person.firstname, person.lastname, prof.email, COUNT(DISTINCT skill.title) AS skillMatches, ARRAY_AGG(DISTINCT skill.title), ARRAY_AGG(DISTINCT platact.step) FROM person JOIN professional prof ON person.id = prof.personid JOIN professionalprofile profper ON prof.id = profper.professionalid JOIN (SELECT profileid, skillid FROM professionalskill UNION SELECT profileid, skillid FROM resumeskill) allskills ON allskills.profileid = profper.id JOIN skill ON allskills.skillid = skill.id LEFT JOIN platformactivity platact ON platact.profileid = profper.id WHERE skill.title ILIKE ANY(%s) GROUP BY person.id, prof.email ORDER BY skillMatches DESC LIMIT {limit};"
-    else:
-        query = f"SELECT person.id, person.firstname, person.lastname, prof.email, COUNT(DISTINCT skill.title) AS skillMatches, ARRAY_AGG(DISTINCT skill.title), ARRAY_AGG(DISTINCT platact.step) FROM person JOIN professional prof ON person.id = prof.personid JOIN professionalprofile profper ON prof.id = profper.professionalid JOIN (SELECT profileid, skillid FROM professionalskill UNION SELECT profileid, skillid FROM resumeskill) allskills ON allskills.profileid = profper.id JOIN skill ON allskills.skillid = skill.id LEFT JOIN platformactivity platact ON platact.profileid = profper.id WHERE person.domain = '{domain}' AND skill.title ILIKE ANY(%s) GROUP BY person.id, prof.email ORDER BY skillMatches DESC LIMIT {limit};"
-    
-    cur.execute(query, (queryArray,))
-    results = cur.fetchall()
-
-    conn.close()
+        cur.execute(query, domainParams + search.filterParams(searchTerm) + search.rankParams(searchTerm) + (limit,))
+        results = cur.fetchall()
 
     resultsProcessed = []
 
@@ -246,292 +146,377 @@ def searchCandidatesBySkills(query: str, limit: int = 5, domain: str = 'all'):
             "firstName":r[1],
             "lastName":r[2],
             "email":r[3],
-            "skillCount":r[4],
-            "skillMatches":r[5],
-            "step": processing.stepProcessingOverall(r[6])
+            "step": processing.stepProcessingOverall(r[4])
         })
     
     return resultsProcessed
 
-def searchCandidatesBySkillId(queryList: list[int], limit: int = 5):
-    conn = client.getConnection()
-    cur = conn.cursor()
-
-    # Search for user by skills attached to the account
-    # Order by id descending to get the most recent matches first, and limit the number of results
-    query = f"SELECT person.id, person.firstname, person.lastname, prof.email, COUNT(DISTINCT skill.title) AS skillMatches, ARRAY_AGG(DISTINCT skill.title), ARRAY_AGG(DISTINCT platact.step) FROM person JOIN professional prof ON person.id = prof.personid JOIN professionalprofile profper ON prof.id = profper.professionalid JOIN (SELECT profileid, skillid FROM professionalskill UNION SELECT profileid, skillid FROM resumeskill) allskills ON allskills.profileid = profper.id JOIN skill ON allskills.skillid = skill.id LEFT JOIN platformactivity platact ON platact.profileid = profper.id WHERE skill.id = ANY(%s::int[]) GROUP BY person.id, prof.email, person.firstname, person.lastname ORDER BY skillMatches DESC LIMIT {limit};"
-    
-    cur.execute(query, (queryList,))
-    results = cur.fetchall()
+def iterCandidatesBySkills(query: str, limit: int = None, domain: str = 'all'):
+    # Stream matching candidates through a server-side cursor so callers can rank
+    # large pools without holding every row in memory. limit=None streams all matches.
+    with client.connection() as conn:
+        queryArray = [item.strip() for item in query.split(',')]
+        limitClause = f" LIMIT {int(limit)}" if limit else ""
 
-    resultsProcessed = []
+        # Search for user by skills attached to the account
+        # Order by id descending to get the most recent matches first, and limit the number of results
+        query = ''
+        if domain == 'all':
+            query = f"SELECT person.id, person.firstname, person.lastname, prof.email, COUNT(DISTINCT skill.title) AS skillMatches, ARRAY_AGG(DISTINCT skill.title), ARRAY_AGG(DISTINCT platact.step) FROM person JOIN professional prof ON person.id = prof.personid JOIN professionalprofile profper ON prof.id = profper.professionalid JOIN candidate_skill allskills ON allskills.profileid = profper.id JOIN skill ON allskills.skillid = skill.id LEFT JOIN platformactivity platact ON platact.profileid = profper.id WHERE skill.title ILIKE ANY(%s) GROUP BY person.id, prof.email ORDER BY skillMatches DESC{limitClause};"
+        else:
+            query = f"SELECT person.id, person.firstname, person.lastname, prof.email, COUNT(DISTINCT skill.title) AS skillMatches, ARRAY_AGG(DISTINCT skill.title), ARRAY_AGG(DISTINCT platact.step) FROM person JOIN professional prof ON person.id = prof.personid JOIN professionalprofile profper ON prof.id = profper.professionalid JOIN candidate_skill allskills ON allskills.profileid = profper.id JOIN skill ON allskills.skillid = skill.id LEFT JOIN platformactivity platact ON platact.profileid = profper.id WHERE person.domain = '{domain}' AND skill.title ILIKE ANY(%s) GROUP BY person.id, prof.email ORDER BY skillMatches DESC{limitClause};"
+
+        cur = conn.cursor(name="candidates_by_skills")
+        cur.itersize = 500
+        cur.execute(query, (queryArray,))
+
+        for r in cur:
+            yield {
+                "id":r[0],
+                "firstName":r[1],
+                "lastName":r[2],
+                "email":r[3],
+                "skillCount":r[4],
+                "skillMatches":r[5],
+                "step": processing.stepProcessingOverall(r[6])
+            }
 
-    for r in results:
-        query = f"SELECT p.title, p.id, AVG(psq.answer) FROM person JOIN professional prof ON person.id = prof.personid JOIN professionalprofile profper ON prof.id = profper.professionalid JOIN professionalsurvey ps ON ps.profileid = profper.id JOIN professionalsurveyquestion psq ON psq.professionalsurveyid = ps.id JOIN surveyquestion ON psq.surveyquestionid = surveyquestion.id JOIN question ON surveyquestion.questionid = question.id JOIN personality p ON p.id = question.personalityid WHERE person.id = {r[0]} GROUP BY p.title, p.id"
-        cur.execute(query)
+def searchCandidatesBySkills(query: str, limit: int = 5, domain: str = 'all'):
+    return list(iterCandidatesBySkills(query, limit, domain))
+
+def iterCandidatesBySkillId(queryList: list[int], limit: int = None):
+    # Streaming variant of searchCandidatesBySkillId without the personality lookup;
+    # fetch personality only for the candidates that survive ranking.
+    with client.connection() as conn:
+        limitClause = f" LIMIT {int(limit)}" if limit else ""
+
+        # Search for user by skills attached to the account
+        # Order by id descending to get the most recent matches first, and limit the number of results
+        query = f"SELECT person.id, person.firstname, person.lastname, prof.email, COUNT(DISTINCT skill.title) AS skillMatches, ARRAY_AGG(DISTINCT skill.title), ARRAY_AGG(DISTINCT platact.step) FROM person JOIN professional prof ON person.id = prof.personid JOIN professionalprofile profper ON prof.id = profper.professionalid JOIN candidate_skill allskills ON allskills.profileid = profper.id JOIN skill ON allskills.skillid = skill.id LEFT JOIN platformactivity platact ON platact.profileid = profper.id WHERE skill.id = ANY(%s::int[]) GROUP BY person.id, prof.email, person.firstname, person.lastname ORDER BY skillMatches DESC{limitClause};"
+
+        cur = conn.cursor(name="candidates_by_skill_id")
+        cur.itersize = 500
+        cur.execute(query, (queryList,))
+
+        for r in cur:
+            yield {
+                "id":r[0],
+                "firstName":r[1],
+                "lastName":r[2],
+                "email":r[3],
+                "skillCount":r[4],
+                "skillMatches":r[5],
+                "step": processing.stepProcessingOverall(r[6])
+            }
+
+def getCandidatePersonalities(personIds: list[int]) -> dict:
+    # Personality averages for many candidates in one grouped query: {personId: [{title, id, score}, ...]}
+    ids = [int(i) for i in personIds]
+    personalities = {i: [] for i in ids}
+    if not ids:
+        return personalities
+
+    with client.connection() as conn:
+        cur = conn.cursor()
+
+        query = "SELECT person.id, p.title, p.id, AVG(psq.answer) FROM person JOIN professional prof ON person.id = prof.personid JOIN professionalprofile profper ON prof.id = profper.professionalid JOIN professionalsurvey ps ON ps.profileid = profper.id JOIN professionalsurveyquestion psq ON psq.professionalsurveyid = ps.id JOIN surveyquestion ON psq.surveyquestionid = surveyquestion.id JOIN question ON surveyquestion.questionid = question.id JOIN personality p ON p.id = question.personalityid WHERE person.id = ANY(%s::int[]) GROUP BY person.id, p.title, p.id"
+        cur.execute(query, (ids,))
 
         personalityResult = cur.fetchall()
 
-        personalityArray = []
+    for row in personalityResult:
+        personalities[row[0]].append({'title':row[1], 'id':row[2], 'score': row[3]})
 
-        for row in personalityResult:
-            personalityArray.append({'title':row[0], 'id':row[1], 'score': row[2]})
+    return personalities
 
-        resultsProcessed.append({
-            "id":r[0],
-            "firstName":r[1],
-            "lastName":r[2],
-            "email":r[3],
-            "skillCount":r[4],
-            "skillMatches":r[5],
-            "step": processing.stepProcessingOverall(r[6]),
-            "personality": personalityArray
-        })
+def getCandidatePersonality(personId: int):
+    return getCandidatePersonalities([personId])[int(personId)]
 
-    conn.close()
+def searchCandidatesBySkillId(queryList: list[int], limit: int = 5):
+    resultsProcessed = list(iterCandidatesBySkillId(queryList, limit))
+    personalities = getCandidatePersonalities([row["id"] for row in resultsProcessed])
+
+    for row in resultsProcessed:
+        row["personality"] = personalities[row["id"]]
     
     return resultsProcessed
 
-def searchCandidatesBySkillsNamesPaginated(nameQuery: str, skillQuery: str, pageLimit: int = 5, currentPage: int = 0, domain: str = 'all'):
-    conn = client.getConnection()
-    cur = conn.cursor()
-
+def _skillsNamesPageQuery(nameQuery: str, skillQuery: str, domain: str, after: list = None, withTotal: bool = False, ordered: bool = True):
     queryArray = [item.strip() for item in skillQuery.split(',')]
 
-    # Search for user by skills attached to the account
-    # Order by id descending to get the most recent matches first, and limit the number of results
-    wildcard = f'%{nameQuery}%'
+    # Search for user by skills attached to the account and by name/email through the trigram indexes
+    # Most skill matches first, then the closest name match, newest id on ties
+    domainClause, domainParams = ("", ()) if domain == 'all' else ("person.domain = %s AND ", (domain,))
+    havingClause, havingParams = "", ()
+    if after:
+        # The sort key is an aggregate, so the cursor can only be applied in HAVING after every
+        # matching person is grouped: it saves the OFFSET row transfer, but a deep page still costs
+        # a full aggregation of the match set (seeking would need a stored per-person skill count)
+        havingClause = f" HAVING (COUNT(DISTINCT skill.title), {search.NAME_EMAIL_RANK}, person.id) < (%s, %s::real, %s)"
+        havingParams = search.rankParams(nameQuery) + tuple(after)
 
-    query = ''
-    if domain == 'all':
-        query = f"SELECT person.id, person.firstname, person.lastname, prof.email, COUNT(DISTINCT skill.title) AS skillMatches, ARRAY_AGG(DISTINCT skill.title), ARRAY_AGG(DISTINCT platact.step), address.city, address.state, address.country FROM person JOIN professional prof ON person.id = prof.personid LEFT JOIN address ON person.id = address.personid JOIN professionalprofile profper ON prof.id = profper.professionalid JOIN professionalskill profskill ON profper.id = profskill.profileid JOIN skill ON profskill.skillid = skill.id JOIN platformactivity platact ON platact.profileid = profper.id WHERE skill.title ILIKE ANY(%s) AND ((person.firstname || ' ' || person.lastname) ILIKE %s OR (person.goesbyname || ' ' || person.lastname) ILIKE %s OR prof.email ILIKE %s) GROUP BY person.id, prof.email, address.city, address.state, address.country ORDER BY skillMatches DESC LIMIT {pageLimit} OFFSET {pageLimit * currentPage};"
-    else:
-        query = f"SELECT person.id, person.firstname, person.lastname, prof.email, COUNT(DISTINCT skill.title) AS skillMatches, ARRAY_AGG(DISTINCT skill.title), ARRAY_AGG(DISTINCT platact.step), address.city, address.state, address.country FROM person JOIN professional prof ON person.id = prof.personid LEFT JOIN address ON person.id = address.personid JOIN professionalprofile profper ON prof.id = profper.professionalid JOIN professionalskill profskill ON profper.id = profskill.profileid JOIN skill ON profskill.skillid = skill.id JOIN platformactivity platact ON platact.profileid = profper.id WHERE person.domain = '{domain}' AND skill.title ILIKE ANY(%s) AND ((person.firstname || ' ' || person.lastname) ILIKE %s OR (person.goesbyname || ' ' || person.lastname) ILIKE %s OR prof.email ILIKE %s) GROUP BY person.id, prof.email, address.city, address.state, address.country ORDER BY skillMatches DESC LIMIT {pageLimit} OFFSET {pageLimit * currentPage};"
+    # COUNT(*) OVER() returns the total match count on every row of the page in the same scan
+    totalColumn = ", COUNT(*) OVER() AS total_count" if withTotal else ""
 
-    cur.execute(query, (queryArray, wildcard, wildcard, wildcard))
-    results = cur.fetchall()
+    query = f"SELECT person.id, person.firstname, person.lastname, prof.email, COUNT(DISTINCT skill.title) AS skillMatches, ARRAY_AGG(DISTINCT skill.title), ARRAY_AGG(DISTINCT platact.step), address.city, address.state, address.country, {search.NAME_EMAIL_RANK} AS name_rank{totalColumn} FROM person JOIN professional prof ON person.id = prof.personid LEFT JOIN address ON person.id = address.personid JOIN professionalprofile profper ON prof.id = profper.professionalid JOIN professionalskill profskill ON profper.id = profskill.profileid JOIN skill ON profskill.skillid = skill.id JOIN platformactivity platact ON platact.profileid = profper.id WHERE {domainClause}skill.title ILIKE ANY(%s) AND {search.NAME_EMAIL_FILTER} GROUP BY person.id, prof.email, address.city, address.state, address.country{havingClause}"
+    if ordered:
+        query += " ORDER BY skillMatches DESC, name_rank DESC, person.id DESC"
+    params = search.rankParams(nameQuery) + domainParams + (queryArray,) + search.filterParams(nameQuery) + havingParams
 
-    conn.close()
+    return query, params
 
-    resultsProcessed = []
+def _processSkillsNamesRow(r) -> dict:
+    return {
+        "id":r[0],
+        "full_name":f'{r[1]} {r[2]}',
+        "email":r[3],
+        "skillMatches":r[5],
+        "step": processing.stepProcessingOverall(r[6]),
+        "location": f'{r[7]}, {r[8]}, {r[9]}'
+    }
 
-    for r in results:
-        resultsProcessed.append({
-            "id":r[0],
-            "full_name":f'{r[1]} {r[2]}',
-            "email":r[3],
-            "skillMatches":r[5],
-            "step": processing.stepProcessingOverall(r[6]),
-            "location": f'{r[7]}, {r[8]}, {r[9]}'
-        })
-    
-    return resultsProcessed
+def searchCandidatesBySkillsNamesPaginated(nameQuery: str, skillQuery: str, pageLimit: int = 5, currentPage: int = 0, domain: str = 'all'):
+    query, params = _skillsNamesPageQuery(nameQuery, skillQuery, domain)
 
-def searchCandidatesByNameEmailPaginated(queryName: str, pageLimit: int = 5, currentPage: int = 0, domain: str = 'all'):
-    conn = client.getConnection()
-    cur = conn.cursor()
-
-    # Search for user by firstname, lastname, goesbyname, or email using ILIKE for case-insensitive search
-    # Order by id descending to get the most recent matches first, and limit the number of results
-    query = ''
-    if domain == 'all':
-        query = f"SELECT person.id, person.firstname, person.lastname, prof.email, ARRAY_AGG(DISTINCT platact.step), ARRAY_AGG(DISTINCT skill.title), address.city, address.state, address.country FROM person JOIN professional prof ON person.id = prof.personid LEFT JOIN address ON person.id = address.personid LEFT JOIN professionalprofile profper ON prof.id = profper.professionalid LEFT JOIN professionalskill profskill ON profper.id = profskill.profileid LEFT JOIN skill ON profskill.skillid = skill.id LEFT JOIN platformactivity platact ON platact.profileid = profper.id WHERE (person.firstname || ' ' || person.lastname) ILIKE '%{queryName}%' OR (person.goesbyname || ' ' || person.lastname) ILIKE '%{queryName}%' OR prof.email ILIKE '%{queryName}%' GROUP BY person.id, prof.email, address.city, address.state, address.country ORDER BY id DESC LIMIT {pageLimit} OFFSET {pageLimit * currentPage};"
-    else:
-        query = f"SELECT person.id, person.firstname, person.lastname, prof.email, ARRAY_AGG(DISTINCT platact.step), ARRAY_AGG(DISTINCT skill.title), address.city, address.state, address.country FROM person JOIN professional prof ON person.id = prof.personid LEFT JOIN address ON person.id = address.personid LEFT JOIN professionalprofile profper ON prof.id = profper.professionalid LEFT JOIN professionalskill profskill ON profper.id = profskill.profileid LEFT JOIN skill ON profskill.skillid = skill.id LEFT JOIN platformactivity platact ON platact.profileid = profper.id WHERE person.domain = '{domain}' AND ((person.firstname || ' ' || person.lastname) ILIKE '%{queryName}%' OR (person.goesbyname || ' ' || person.lastname) ILIKE '%{queryName}%' OR prof.email ILIKE '%{queryName}%') GROUP BY person.id, prof.email, address.city, address.state, address.country ORDER BY id DESC LIMIT {pageLimit} OFFSET {pageLimit * currentPage};"
+    with client.connection() as conn:
+        cur = conn.cursor()
+        cur.execute(query + " LIMIT %s OFFSET %s;", params + (pageLimit, pageLimit * currentPage))
+        results = cur.fetchall()
 
-    cur.execute(query)
-    results = cur.fetchall()
+    return [_processSkillsNamesRow(r) for r in results]
 
-    conn.close()
+def searchCandidatesBySkillsNamesKeyset(nameQuery: str, skillQuery: str, pageLimit: int = 5, cursor: str = None, domain: str = 'all'):
+    # Keyset variant of searchCandidatesBySkillsNamesPaginated: {"results", "next_cursor"}
+    query, params = _skillsNamesPageQuery(nameQuery, skillQuery, domain, decode_cursor(cursor, 3))
 
-    resultsProcessed = []
+    with client.connection() as conn:
+        cur = conn.cursor()
+        cur.execute(query + " LIMIT %s;", params + (pageLimit + 1,))
+        page = keyset_page(cur.fetchall(), pageLimit, lambda r: (r[4], r[10], r[0]))
 
-    for r in results:
-        resultsProcessed.append({
-            "id":r[0],
-            "full_name":f'{r[1]} {r[2]}',
-            "email":r[3],
-            "step": processing.stepProcessingOverall(r[4]),
-            "skillMatches": r[5],
-            "location": f'{r[6]}, {r[7]}, {r[8]}'
-        })
-    
-    return resultsProcessed
+    return {"results": [_processSkillsNamesRow(r) for r in page["rows"]], "next_cursor": page["next_cursor"]}
 
-def searchPageCount(nameQuery: str, skillQuery: str = None, pageLimit: int = 5, domain = 'all'):
-    conn = client.getConnection()
-    cur = conn.cursor()
+def _nameEmailPageQuery(queryName: str, domain: str, after: list = None, withTotal: bool = False, ordered: bool = True):
+    # Search for user by firstname, lastname, goesbyname, or email through the trigram indexes
+    # Closest matches first, newest id on ties
+    domainClause, domainParams = ("", ()) if domain == 'all' else ("person.domain = %s AND ", (domain,))
+    keysetClause, keysetParams = "", ()
+    if after:
+        keysetClause = f" AND ({search.NAME_EMAIL_RANK}, person.id) < (%s::real, %s)"
+        keysetParams = search.rankParams(queryName) + tuple(after)
 
-    query = ''
+    totalColumn = ", COUNT(*) OVER() AS total_count" if withTotal else ""
 
-    if skillQuery:
-        queryArray = [item.strip() for item in skillQuery.split(',')]
-        wildcard = f'%{nameQuery}%'
+    query = f"SELECT person.id, person.firstname, person.lastname, prof.email, ARRAY_AGG(DISTINCT platact.step), ARRAY_AGG(DISTINCT skill.title), address.city, address.state, address.country, {search.NAME_EMAIL_RANK} AS name_rank{totalColumn} FROM person JOIN professional prof ON person.id = prof.personid LEFT JOIN address ON person.id = address.personid LEFT JOIN professionalprofile profper ON prof.id = profper.professionalid LEFT JOIN professionalskill profskill ON profper.id = profskill.profileid LEFT JOIN skill ON profskill.skillid = skill.id LEFT JOIN platformactivity platact ON platact.profileid = profper.id WHERE {domainClause}{search.NAME_EMAIL_FILTER}{keysetClause} GROUP BY person.id, prof.email, address.city, address.state, address.country"
+    if ordered:
+        query += " ORDER BY name_rank DESC, person.id DESC"
+    params = search.rankParams(queryName) + domainParams + search.filterParams(queryName) + keysetParams
 
-        if domain == 'all':
-            query = f"SELECT COUNT(DISTINCT person.id) FROM person JOIN professional prof ON person.id = prof.personid LEFT JOIN professionalprofile profper ON prof.id = profper.professionalid LEFT JOIN professionalskill profskill ON profper.id = profskill.profileid LEFT JOIN skill ON profskill.skillid = skill.id LEFT JOIN platformactivity platact ON platact.profileid = profper.id WHERE skill.title ILIKE ANY(%s) AND ((person.firstname || ' ' || person.lastname) ILIKE %s OR (person.goesbyname || ' ' || person.lastname) ILIKE %s OR prof.email ILIKE %s);"
-        else:
-            query = f"SELECT COUNT(DISTINCT person.id) FROM person JOIN professional prof ON person.id = prof.personid LEFT JOIN professionalprofile profper ON prof.id = profper.professionalid LEFT JOIN professionalskill profskill ON profper.id = profskill.profileid LEFT JOIN skill ON profskill.skillid = skill.id LEFT JOIN platformactivity platact ON platact.profileid = profper.id WHERE person.domain = '{domain}' AND skill.title ILIKE ANY(%s) AND ((person.firstname || ' ' || person.lastname) ILIKE %s OR (person.goesbyname || ' ' || person.lastname) ILIKE %s OR prof.email ILIKE %s);"
-        cur.execute(query, (queryArray, wildcard, wildcard, wildcard))
-        results = cur.fetchall()
+    return query, params
 
-        rowCount = results[0][0] if results else 0
-        pages = (rowCount // pageLimit) + (1 if rowCount and rowCount % pageLimit > 0 else 0)
+def _processNameEmailRow(r) -> dict:
+    return {
+        "id":r[0],
+        "full_name":f'{r[1]} {r[2]}',
+        "email":r[3],
+        "step": processing.stepProcessingOverall(r[4]),
+        "skillMatches": r[5],
+        "location": f'{r[6]}, {r[7]}, {r[8]}'
+    }
 
-        conn.close()
+def searchCandidatesByNameEmailPaginated(queryName: str, pageLimit: int = 5, currentPage: int = 0, domain: str = 'all'):
+    query, params = _nameEmailPageQuery(queryName, domain)
 
-        return [rowCount, pages]
-    else:
-        if domain == 'all':
-            query = f"SELECT COUNT(DISTINCT person.id) FROM person JOIN professional prof ON person.id = prof.personid WHERE (person.firstname || ' ' || person.lastname) ILIKE '%{nameQuery}%' OR (person.goesbyname || ' ' || person.lastname) ILIKE '%{nameQuery}%' OR prof.email ILIKE '%{nameQuery}%';"
-        else:
-            query = f"SELECT COUNT(DISTINCT person.id) FROM person JOIN professional prof ON person.id = prof.personid WHERE person.domain = '{domain}' AND ((person.firstname || ' ' || person.lastname) ILIKE '%{nameQuery}%' OR (person.goesbyname || ' ' || person.lastname) ILIKE '%{nameQuery}%' OR prof.email ILIKE '%{nameQuery}%');"
-        cur.execute(query)
+    with client.connection() as conn:
+        cur = conn.cursor()
+        cur.execute(query + " LIMIT %s OFFSET %s;", params + (pageLimit, pageLimit * currentPage))
         results = cur.fetchall()
 
-        rowCount = results[0][0] if results else 0
-        pages = (rowCount // pageLimit) + (1 if rowCount and rowCount % pageLimit > 0 else 0)
-
-        conn.close()
-
-        return [rowCount, pages]
-    
-def getProfile(profileId: str):
-    conn = client.getConnection()
-    cur = conn.cursor()
-
-    query = f"SELECT person.firstname, person.middlename, person.lastname, person.goesbyname, person.urlimage, person.citizenship, person.birthday, person.leadsource, prof.status, prof.title, prof.maindescription, prof.url, prof.linkedinurl, prof.email, prof.hubspotcontactid, prof.hubspotdeveloperid, prof.referredby, address.city, address.state, address.country, address.timezone, address.longitude, address.latitude FROM person JOIN professional prof ON person.id = prof.personid LEFT JOIN address ON person.id = address.personid LEFT JOIN professionalprofile profper ON prof.id = profper.professionalid WHERE person.id = {profileId} LIMIT 1;"
+    return [_processNameEmailRow(r) for r in results]
 
-    cur.execute(query)
-    results = cur.fetchone()
+def searchCandidatesByNameEmailKeyset(queryName: str, pageLimit: int = 5, cursor: str = None, domain: str = 'all'):
+    # Keyset variant of searchCandidatesByNameEmailPaginated: {"results", "next_cursor"}
+    query, params = _nameEmailPageQuery(queryName, domain, decode_cursor(cursor, 2))
 
-    leadSourceProcessed = processing.leadSourceProcessing(results[7])
+    with client.connection() as conn:
+        cur = conn.cursor()
+        cur.execute(query + " LIMIT %s;", params + (pageLimit + 1,))
+        page = keyset_page(cur.fetchall(), pageLimit, lambda r: (r[9], r[0]))
 
-    # Get Platform Activity
-    query = f"SELECT ARRAY_AGG(DISTINCT platact.step), ARRAY_AGG(DISTINCT platact.notes) FROM person JOIN professional prof ON person.id = prof.personid LEFT JOIN address ON person.id = address.personid LEFT JOIN professionalprofile profper ON prof.id = profper.professionalid LEFT JOIN platformactivity platact ON platact.profileid = profper.id WHERE person.id = {profileId} GROUP BY person.id"
-    cur.execute(query)
+    return {"results": [_processNameEmailRow(r) for r in page["rows"]], "next_cursor": page["next_cursor"]}
 
-    platactResult = cur.fetchone()
+def _searchSignature(nameQuery: str, skillQuery: str, domain: str) -> tuple:
+    skills = ",".join(sorted(item.strip().lower() for item in (skillQuery or "").split(',') if item.strip()))
+    return ((nameQuery or "").strip().lower(), skills, domain)
 
-    platactProcessed = {'step':processing.stepProcessingOverall(platactResult[0]), 'attachedNotes':platactResult[1]}
+def _pageCount(rowCount: int, pageLimit: int) -> int:
+    return (rowCount // pageLimit) + (1 if rowCount and rowCount % pageLimit > 0 else 0)
 
-    # Get Personality Data
-    query = f"SELECT p.title, p.id, AVG(psq.answer) FROM person JOIN professional prof ON person.id = prof.personid JOIN professionalprofile profper ON prof.id = profper.professionalid JOIN professionalsurvey ps ON ps.profileid = profper.id JOIN professionalsurveyquestion psq ON psq.professionalsurveyid = ps.id JOIN surveyquestion ON psq.surveyquestionid = surveyquestion.id JOIN question ON surveyquestion.questionid = question.id JOIN personality p ON p.id = question.personalityid WHERE person.id = {profileId} GROUP BY p.title, p.id"
-    cur.execute(query)
+def _countSearchResults(cur, nameQuery: str, skillQuery: str = None, domain = 'all'):
+    # Returns (count, approximate). Counts the rows of the page query itself, so the total
+    # matches what COUNT(*) OVER() reports in searchCandidatesPage
+    if not skillQuery and not (nameQuery or "").strip() and domain == 'all':
+        # Unfiltered: the planner's estimate is free and close enough for page counts on a large table
+        cur.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = 'person'")
+        row = cur.fetchone()
+        if row and row[0] >= APPROX_COUNT_THRESHOLD:
+            return row[0], True
 
-    personalityResult = cur.fetchall()
-
-    personalityArray = []
-
-    for row in personalityResult:
-        personalityArray.append({'title':row[0], 'id':row[1], 'score': round((row[2]/5)*100)})
-
-    # Get Professional Skills Data
-    query = f"SELECT DISTINCT profskill.years, skill.title, skill.id, skill.description, skill.type FROM person JOIN professional prof ON person.id = prof.personid LEFT JOIN address ON person.id = address.personid JOIN professionalprofile profper ON prof.id = profper.professionalid JOIN professionalskill profskill ON profper.id = profskill.profileid JOIN skill ON profskill.skillid = skill.id WHERE person.id = {profileId}"
-    cur.execute(query)
+    if skillQuery:
+        query, params = _skillsNamesPageQuery(nameQuery, skillQuery, domain, ordered=False)
+    else:
+        query, params = _nameEmailPageQuery(nameQuery, domain, ordered=False)
 
-    skillResult = cur.fetchall()
+    cur.execute(f"SELECT COUNT(*) FROM ({query}) AS page_rows;", params)
+    return cur.fetchone()[0], False
 
-    skillArray = []
+def searchPageCount(nameQuery: str, skillQuery: str = None, pageLimit: int = 5, domain = 'all'):
+    key = _searchSignature(nameQuery, skillQuery, domain)
+    total = SEARCH_TOTALS.get(key)
 
-    for row in skillResult:
-        skillArray.append({'years':row[0], 'skill':row[1], 'skillId': row[2], 'description': row[3], 'type': row[4]})
+    if total is None:
+        with client.connection() as conn:
+            total = _countSearchResults(conn.cursor(), nameQuery, skillQuery, domain)
+        SEARCH_TOTALS.set(key, total)
 
-    # Get Technical Skills Data
-    query = f"SELECT DISTINCT ts.level, skill.title, skill.id, skill.description, skill.type FROM person JOIN professional prof ON person.id = prof.personid LEFT JOIN address ON person.id = address.personid JOIN professionalprofile profper ON prof.id = profper.professionalid JOIN techskill ts ON profper.id = ts.profileid JOIN skill ON ts.skillid = skill.id WHERE person.id = {profileId}"
-    cur.execute(query)
+    return [total[0], _pageCount(total[0], pageLimit)]
 
-    techSkillResult = cur.fetchall()
+def searchCandidatesPage(nameQuery: str, skillQuery: str = None, pageLimit: int = 5, currentPage: int = 0, domain: str = 'all'):
+    """
+    One page of search results plus the total in a single round trip.
 
-    techSkillArray = []
+    The total comes from COUNT(*) OVER() on the page query itself and is cached per filter
+    signature, so searchPageCount and an empty page past the end don't need another count.
+    """
+    if skillQuery:
+        query, params = _skillsNamesPageQuery(nameQuery, skillQuery, domain, withTotal=True)
+        processRow = _processSkillsNamesRow
+    else:
+        query, params = _nameEmailPageQuery(nameQuery, domain, withTotal=True)
+        processRow = _processNameEmailRow
 
-    for row in techSkillResult:
-        techSkillArray.append({'level':row[0], 'skill':row[1], 'skillId': row[2], 'description': row[3], 'type': row[4]})
+    key = _searchSignature(nameQuery, skillQuery, domain)
 
-    # Get Portfolio Experience Data
-    query = f"SELECT pe.description, pe.mainrole, pe.workexperience, pe.companyname, pe.startdate, pe.finishdate, pe.ispresent, ARRAY_AGG(DISTINCT skill.title), ARRAY_AGG(DISTINCT pf.title), ARRAY_AGG(DISTINCT skill.id) FROM person JOIN professional prof ON person.id = prof.personid LEFT JOIN address ON person.id = address.personid LEFT JOIN professionalprofile profper ON prof.id = profper.professionalid LEFT JOIN professionalexperience pe ON profper.id = pe.profileid LEFT JOIN portfolioskill por ON pe.id = por.professionalexperienceid LEFT JOIN skill ON por.skillid = skill.id LEFT JOIN portfoliofeature pf ON pe.id = pf.professionalexperienceid WHERE person.id = {profileId} GROUP BY pe.description, pe.mainrole, pe.workexperience, pe.companyname, pe.startdate, pe.finishdate, pe.ispresent ORDER BY pe.startdate DESC"
-    cur.execute(query)
+    with client.connection() as conn:
+        cur = conn.cursor()
+        cur.execute(query + " LIMIT %s OFFSET %s;", params + (pageLimit, pageLimit * currentPage))
+        results = cur.fetchall()
 
-    portfolioSkillResult = cur.fetchall()
+        if results:
+            total = (results[0][-1], False)
+            SEARCH_TOTALS.set(key, total)
+        else:
+            # Past the last page the window has no row to report the total on
+            total = SEARCH_TOTALS.get(key)
+            if total is None:
+                total = _countSearchResults(cur, nameQuery, skillQuery, domain)
+                SEARCH_TOTALS.set(key, total)
 
+    return {
+        "results": [processRow(r) for r in results],
+        "total": total[0],
+        "totalApproximate": total[1],
+        "pages": _pageCount(total[0], pageLimit),
+        "currentPage": currentPage + 1
+    }
+    
+# One round trip per batch: the core columns come from a DISTINCT ON over the person/address join
+# and every other section is a correlated json_agg subquery keyed on the person id.
+PROFILE_HYDRATION_QUERY = """
+SELECT base.*,
+    (SELECT ARRAY_AGG(DISTINCT platact.step) FROM professional prof LEFT JOIN professionalprofile profper ON prof.id = profper.professionalid LEFT JOIN platformactivity platact ON platact.profileid = profper.id WHERE prof.personid = base.id),
+    (SELECT ARRAY_AGG(DISTINCT platact.notes) FROM professional prof LEFT JOIN professionalprofile profper ON prof.id = profper.professionalid LEFT JOIN platformactivity platact ON platact.profileid = profper.id WHERE prof.personid = base.id),
+    (SELECT json_agg(json_build_array(t.title, t.id, t.score)) FROM (SELECT p.title, p.id, AVG(psq.answer) AS score FROM professional prof JOIN professionalprofile profper ON prof.id = profper.professionalid JOIN professionalsurvey ps ON ps.profileid = profper.id JOIN professionalsurveyquestion psq ON psq.professionalsurveyid = ps.id JOIN surveyquestion ON psq.surveyquestionid = surveyquestion.id JOIN question ON surveyquestion.questionid = question.id JOIN personality p ON p.id = question.personalityid WHERE prof.personid = base.id GROUP BY p.title, p.id) t),
+    (SELECT json_agg(json_build_array(t.years, t.title, t.id, t.description, t.type)) FROM (SELECT DISTINCT profskill.years, skill.title, skill.id, skill.description, skill.type FROM professional prof JOIN professionalprofile profper ON prof.id = profper.professionalid JOIN professionalskill profskill ON profper.id = profskill.profileid JOIN skill ON profskill.skillid = skill.id WHERE prof.personid = base.id) t),
+    (SELECT json_agg(json_build_array(t.level, t.title, t.id, t.description, t.type)) FROM (SELECT DISTINCT ts.level, skill.title, skill.id, skill.description, skill.type FROM professional prof JOIN professionalprofile profper ON prof.id = profper.professionalid JOIN techskill ts ON profper.id = ts.profileid JOIN skill ON ts.skillid = skill.id WHERE prof.personid = base.id) t),
+    (SELECT json_agg(json_build_array(t.description, t.mainrole, t.workexperience, t.companyname, t.startdate, t.finishdate, t.ispresent, t.skills, t.features, t.skillids) ORDER BY t.startdate DESC) FROM (SELECT pe.description, pe.mainrole, pe.workexperience, pe.companyname, pe.startdate, pe.finishdate, pe.ispresent, ARRAY_AGG(DISTINCT skill.title) AS skills, ARRAY_AGG(DISTINCT pf.title) AS features, ARRAY_AGG(DISTINCT skill.id) AS skillids FROM professional prof LEFT JOIN professionalprofile profper ON prof.id = profper.professionalid LEFT JOIN professionalexperience pe ON profper.id = pe.profileid LEFT JOIN portfolioskill por ON pe.id = por.professionalexperienceid LEFT JOIN skill ON por.skillid = skill.id LEFT JOIN portfoliofeature pf ON pe.id = pf.professionalexperienceid WHERE prof.personid = base.id GROUP BY pe.description, pe.mainrole, pe.workexperience, pe.companyname, pe.startdate, pe.finishdate, pe.ispresent) t),
+    (SELECT json_agg(json_build_array(pf.title, pf.level)) FROM professional prof JOIN professionalprofile profper ON prof.id = profper.professionalid LEFT JOIN professionalfeature pf ON profper.id = pf.profileid WHERE prof.personid = base.id),
+    (SELECT json_agg(json_build_array(pce.title, pce.level)) FROM professional prof JOIN professionalprofile profper ON prof.id = profper.professionalid LEFT JOIN professionalculturalexperience pce ON profper.id = pce.profileid WHERE prof.personid = base.id)
+FROM (
+    SELECT DISTINCT ON (person.id) person.id, person.firstname, person.middlename, person.lastname, person.goesbyname, person.urlimage, person.citizenship, person.birthday, person.leadsource, prof.status, prof.title, prof.maindescription, prof.url, prof.linkedinurl, prof.email, prof.hubspotcontactid, prof.hubspotdeveloperid, prof.referredby, address.city, address.state, address.country, address.timezone, address.longitude, address.latitude
+    FROM person JOIN professional prof ON person.id = prof.personid LEFT JOIN address ON person.id = address.personid
+    WHERE person.id = ANY(%s::int[])
+    ORDER BY person.id
+) base;
+"""
+
+def _hydrateProfile(row) -> dict:
     portfolioSkillArray = []
 
-    for row in portfolioSkillResult:
+    for pe in row[29] or []:
         portfolioSkillInnerArray = []
 
-        if len(row[7]) > 0:
-            for i in range(len(row[7])):
-                if row[7][i] is not None:
-                    portfolioSkillInnerArray.append({'skill': row[7][i], 'skillId': row[9][i]})
-
-        portfolioSkillArray.append({'description':row[0], 'mainrole':row[1], 'workexperience': row[2], 'companyname': row[3], 'startdate': row[4], 'finishdate': row[5], 'ispresent': row[6], 'skills': portfolioSkillInnerArray, 'features': row[8]})
+        if len(pe[7]) > 0:
+            for i in range(len(pe[7])):
+                if pe[7][i] is not None:
+                    portfolioSkillInnerArray.append({'skill': pe[7][i], 'skillId': pe[9][i]})
 
-    # Get Professional Feature Data
-    query = f"SELECT pf.title, pf.level FROM person JOIN professional prof ON person.id = prof.personid LEFT JOIN address ON person.id = address.personid JOIN professionalprofile profper ON prof.id = profper.professionalid LEFT JOIN professionalfeature pf ON profper.id = pf.profileid WHERE person.id = {profileId}"
-    cur.execute(query)
+        portfolioSkillArray.append({'description':pe[0], 'mainrole':pe[1], 'workexperience': pe[2], 'companyname': pe[3], 'startdate': pe[4], 'finishdate': pe[5], 'ispresent': pe[6], 'skills': portfolioSkillInnerArray, 'features': pe[8]})
 
-    featureResult = cur.fetchall()
-
-    featureArray = []
+    return {
+        'profile':{
+            'firstName': row[1],
+            'middleName': row[2],
+            'lastName': row[3],
+            'goesByName': row[4],
+            'imageUrl': row[5],
+            'citizenship':row[6],
+            'birthdate': row[7],
+            'leadsource':processing.leadSourceProcessing(row[8]),
+            'status':processing.statusProcessing(row[9]),
+            'title': row[10],
+            'description': row[11],
+            'publicUrl': row[12],
+            'linkedinUrl': row[13],
+            'email': row[14],
+            'hubspotcontactid': row[15],
+            'hubspotdeveloperid': row[16],
+            'referredby': row[17],
+            'city': row[18],
+            'state': row[19],
+            'country': row[20],
+            'timezone': row[21],
+            'longitude': row[22],
+            'latitude': row[23],
+        },
+        'personality':[{'title':p[0], 'id':p[1], 'score': round((p[2]/5)*100)} for p in row[26] or []],
+        'platformActivity':{'step':processing.stepProcessingOverall(row[24] or []), 'attachedNotes':row[25] or []},
+        'skills':[{'years':s[0], 'skill':s[1], 'skillId': s[2], 'description': s[3], 'type': s[4]} for s in row[27] or []],
+        'technicalSkills':[{'level':s[0], 'skill':s[1], 'skillId': s[2], 'description': s[3], 'type': s[4]} for s in row[28] or []],
+        'portfolioExperience': portfolioSkillArray,
+        'features': [{'title': f[0], 'level': f[1]} for f in row[30] or []],
+        'culturalExperience': [{'title': c[0], 'level': c[1]} for c in row[31] or []]
+    }
 
-    for row in featureResult:
-        featureArray.append({'title': row[0], 'level': row[1]})
+def getProfiles(profileIds: list) -> list:
+    """Hydrate full profiles for many candidates in one query, in the order of profileIds (unknown ids are skipped)."""
+    ids = [int(i) for i in profileIds]
+    if not ids:
+        return []
 
-    # Get Cultural Feature Data
-    query = f"SELECT pce.title, pce.level FROM person JOIN professional prof ON person.id = prof.personid LEFT JOIN address ON person.id = address.personid JOIN professionalprofile profper ON prof.id = profper.professionalid LEFT JOIN professionalculturalexperience pce ON profper.id = pce.profileid WHERE person.id = {profileId}"
-    cur.execute(query)
+    with client.connection() as conn:
+        cur = conn.cursor()
+        cur.execute(PROFILE_HYDRATION_QUERY, (ids,))
+        rows = cur.fetchall()
 
-    culturalExperienceResult = cur.fetchall()
+    byId = {row[0]: _hydrateProfile(row) for row in rows}
+    return [byId[i] for i in ids if i in byId]
 
-    culturalExperienceArray = []
+def getProfile(profileId: str):
+    profiles = getProfiles([profileId])
 
-    for row in culturalExperienceResult:
-        culturalExperienceArray.append({'title': row[0], 'level': row[1]})
+    if not profiles:
+        raise Exception("Profile not found")
 
-    conn.close()
-
-    return {
-        'profile':{
-            'firstName': results[0],
-            'middleName': results[1],
-            'lastName': results[2],
-            'goesByName': results[3],
-            'imageUrl': results[4],
-            'citizenship':results[5],
-            'birthdate': results[6],
-            'leadsource':leadSourceProcessed,
-            'status':processing.statusProcessing(results[8]),
-            'title': results[9],
-            'description': results[10],
-            'publicUrl': results[11],
-            'linkedinUrl': results[12],
-            'email': results[13],
-            'hubspotcontactid': results[14],
-            'hubspotdeveloperid': results[15],
-            'referredby': results[16],
-            'city': results[17],
-            'state': results[18],
-            'country': results[19],
-            'timezone': results[20],
-            'longitude': results[21],
-            'latitude': results[22],
-        },
-        'personality':personalityArray,
-        'platformActivity':platactProcessed,
-        'skills':skillArray,
-        'technicalSkills':techSkillArray,
-        'portfolioExperience': portfolioSkillArray,
-        'features': featureArray,
-        'culturalExperience': culturalExperienceArray
-    }
+    return profiles[0]
 
 def getProfilePublic(profileUrl: str):
-    conn = client.getConnection()
-    cur = conn.cursor()
+    with client.connection() as conn:
+        cur = conn.cursor()
 
-    query = f"SELECT person.id FROM person JOIN professional prof ON person.id = prof.personid WHERE prof.url = '{profileUrl}' LIMIT 1;"
-    cur.execute(query)
-    result = cur.fetchone()
+        query = f"SELECT person.id FROM person JOIN professional prof ON person.id = prof.personid WHERE prof.url = '{profileUrl}' LIMIT 1;"
+        cur.execute(query)
+        result = cur.fetchone()
 
     if result:
         return getProfile(result[0])
@@ -539,15 +524,13 @@ def getProfilePublic(profileUrl: str):
         raise Exception("Profile not found")
     
 def getProfileShort(profileId: str):
-    conn = client.getConnection()
-    cur = conn.cursor()
-
-    query = f"SELECT person.firstname, person.lastname, ARRAY_AGG(DISTINCT platact.step), prof.email FROM person JOIN professional prof ON person.id = prof.personid LEFT JOIN professionalprofile profper ON prof.id = profper.professionalid LEFT JOIN platformactivity platact ON platact.profileid = profper.id WHERE person.id = {profileId} GROUP BY person.firstname, person.lastname, prof.email LIMIT 1;"
+    with client.connection() as conn:
+        cur = conn.cursor()
 
-    cur.execute(query)
-    results = cur.fetchone()
+        query = f"SELECT person.firstname, person.lastname, ARRAY_AGG(DISTINCT platact.step), prof.email FROM person JOIN professional prof ON person.id = prof.personid LEFT JOIN professionalprofile profper ON prof.id = profper.professionalid LEFT JOIN platformactivity platact ON platact.profileid = profper.id WHERE person.id = {profileId} GROUP BY person.firstname, person.lastname, prof.email LIMIT 1;"
 
-    conn.close()
+        cur.execute(query)
+        results = cur.fetchone()
 
     return {
         'firstName': results[0],
@@ -556,209 +539,231 @@ def getProfileShort(profileId: str):
         'email': results[3]
     }
 
-def getProfileShortScore(jobId: str, profileIds: list[str]):
+def iterProfileShortScores(jobId: str, profileIds: list[str], chunkSize: int = SHORTLIST_CHUNK_SIZE):
+    """
+    Score a shortlist against a job, yielding results chunk by chunk.
+
+    Each chunk of ids costs two queries (short profiles + matching skills, both `= ANY(%s)`),
+    so the cost no longer grows with one round trip per candidate. The job is loaded and
+    validated up front, before the returned generator starts.
+    """
     jd = getJob(jobId)
 
     if not jd:
         raise HTTPException(status_code=400, detail="No job description loaded yet. Normalize a JD first.")
-    
-    jobSkills = []
-    jobSkillIds = []
 
     if not jd["skills"]:
-        raise "No Job Skills Found"
-    else:
-        jobSkills = list(set(jd["skills"])) # Ensure unique skills
-        jobSkillIds = list(set(jd["skillIds"]))
-
-    conn = client.getConnection()
-    cur = conn.cursor()
+        raise HTTPException(status_code=400, detail="No Job Skills Found")
 
-    resultSet = []
+    jobSkillCount = len(set(jd["skills"])) # Ensure unique skills
+    jobSkillIds = list(set(jd["skillIds"]))
 
+    # Keep the caller's id strings for the response, keyed by the integer person id
+    requested = {}
     for profile in profileIds:
-        query = f"SELECT person.firstname, person.lastname, ARRAY_AGG(DISTINCT platact.step), prof.email FROM person JOIN professional prof ON person.id = prof.personid LEFT JOIN professionalprofile profper ON prof.id = profper.professionalid LEFT JOIN platformactivity platact ON platact.profileid = profper.id WHERE person.id = {profile} GROUP BY person.firstname, person.lastname, prof.email LIMIT 1;"
+        requested.setdefault(int(profile), profile)
+    ids = list(requested)
 
-        cur.execute(query)
-        results = cur.fetchone()
+    def scored():
+        with client.connection() as conn:
+            cur = conn.cursor()
 
-        # JOIN (SELECT profileid, skillid FROM professionalskill UNION SELECT profileid, skillid FROM resumeskill) allskills ON allskills.profileid = profper.id JOIN skill ON allskills.skillid = skill.id
-        query = f"SELECT DISTINCT skill.title, skill.id FROM person JOIN professional prof ON person.id = prof.personid LEFT JOIN address ON person.id = address.personid JOIN professionalprofile profper ON prof.id = profper.professionalid JOIN (SELECT profileid, skillid FROM professionalskill UNION SELECT profileid, skillid FROM resumeskill) allskills ON allskills.profileid = profper.id JOIN skill ON allskills.skillid = skill.id WHERE person.id = {profile}"
-        cur.execute(query)
+            for start in range(0, len(ids), max(1, chunkSize)):
+                chunk = ids[start:start + chunkSize]
 
-        skillResult = cur.fetchall()
+                query = "SELECT DISTINCT ON (person.id) person.id, person.firstname, person.lastname, ARRAY_AGG(DISTINCT platact.step), prof.email FROM person JOIN professional prof ON person.id = prof.personid LEFT JOIN professionalprofile profper ON prof.id = profper.professionalid LEFT JOIN platformactivity platact ON platact.profileid = profper.id WHERE person.id = ANY(%s::int[]) GROUP BY person.id, person.firstname, person.lastname, prof.email ORDER BY person.id;"
+                cur.execute(query, (chunk,))
+                shortResults = cur.fetchall()
 
-        skillArray = []
+                # Only the job's skills are fetched, so the intersection happens in SQL
+                query = "SELECT DISTINCT person.id, skill.title FROM person JOIN professional prof ON person.id = prof.personid JOIN professionalprofile profper ON prof.id = profper.professionalid JOIN candidate_skill allskills ON allskills.profileid = profper.id JOIN skill ON allskills.skillid = skill.id WHERE person.id = ANY(%s::int[]) AND skill.id = ANY(%s::int[])"
+                cur.execute(query, (chunk, jobSkillIds))
 
-        for row in skillResult:
-            if row[1] in jobSkillIds:
-                skillArray.append(row[0])
+                matchedSkills = {}
+                for personId, title in cur.fetchall():
+                    matchedSkills.setdefault(personId, []).append(title)
 
-        score = round(len(list(set(skillArray))) / len(jobSkills) * 100)
+                for row in shortResults:
+                    skillArray = sorted(matchedSkills.get(row[0], []))
 
-        resultSet.append({
-            'id': profile,
-            'firstName': results[0],
-            'lastName': results[1],
-            'status':processing.stepProcessingOverall(results[2]),
-            'skills':skillArray,
-            'score': score,
-            'email': results[3]
-        })
+                    yield {
+                        'id': requested[row[0]],
+                        'firstName': row[1],
+                        'lastName': row[2],
+                        'status':processing.stepProcessingOverall(row[3]),
+                        'skills':skillArray,
+                        'score': round(len(skillArray) / jobSkillCount * 100),
+                        'email': row[4]
+                    }
 
-    conn.close()
+    return scored()
+
+def getProfileShortScore(jobId: str, profileIds: list[str]):
+    resultSet = list(iterProfileShortScores(jobId, profileIds))
 
-    resultSet.sort(key=lambda x: x["score"], reverse=True)
     # Sort by skill match
+    resultSet.sort(key=lambda x: x["score"], reverse=True)
     return resultSet
     
+def refreshCandidateSkills(cur, profileId: int):
+    # Rebuild one profile's rows of candidate_skill (professionalskill UNION resumeskill) inside the caller's transaction
+    cur.execute("DELETE FROM candidate_skill WHERE profileid = %s", (profileId,))
+    cur.execute(
+        "INSERT INTO candidate_skill (profileid, skillid) SELECT profileid, skillid FROM professionalskill WHERE profileid = %s AND skillid IS NOT NULL UNION SELECT profileid, skillid FROM resumeskill WHERE profileid = %s AND skillid IS NOT NULL ON CONFLICT DO NOTHING",
+        (profileId, profileId)
+    )
+
 def uploadProfile(skills: list, fullName: str, candidateDescription: str, domain: str, email: str = None, linkedInUrl: str = None, culturalExperiences: list = [], candidateCity: str = None, candidateState: str = None, candidateCountry: str = None, candidateTitle: str = None):
     print(f"Uploading profile for {fullName} with email {email} and LinkedIn URL {linkedInUrl}. Skills: {skills}")
-    conn = client.getConnection()
-    cur = conn.cursor()
+    with client.connection() as conn:
+        cur = conn.cursor()
 
-    splitName = fullName.split(" ")
-    firstName = splitName[0]
-    lastName = splitName[-1] if len(splitName) > 1 else ""
+        splitName = fullName.split(" ")
+        firstName = splitName[0]
+        lastName = splitName[-1] if len(splitName) > 1 else ""
 
-    query = "INSERT INTO person (firstname, lastname, leadsource, domain) VALUES (%s, %s, %s, %s) RETURNING id"    
-    cur.execute(query, (firstName, lastName, 1, domain))
-    print(cur.statusmessage)
+        query = "INSERT INTO person (firstname, lastname, leadsource, domain) VALUES (%s, %s, %s, %s) RETURNING id"    
+        cur.execute(query, (firstName, lastName, 1, domain))
+        print(cur.statusmessage)
 
-    personId = cur.fetchone()[0]
-    url = f"{firstName.lower()}-{lastName.lower()}-{personId}"
+        personId = cur.fetchone()[0]
+        url = f"{firstName.lower()}-{lastName.lower()}-{personId}"
 
-    print(f"Person ID: {personId}")
+        print(f"Person ID: {personId}")
 
-    query = "INSERT INTO address (personid, city, state, country) VALUES (%s, %s, %s, %s)"
-    cur.execute(query, (personId, candidateCity, candidateState, candidateCountry))
+        query = "INSERT INTO address (personid, city, state, country) VALUES (%s, %s, %s, %s)"
+        cur.execute(query, (personId, candidateCity, candidateState, candidateCountry))
 
-    if len(linkedInUrl) < 1:
-        linkedInUrl = "N/A"
+        if len(linkedInUrl) < 1:
+            linkedInUrl = "N/A"
 
-    professionalId = ""
+        professionalId = ""
 
-    cur.execute(
-        "INSERT INTO professional (personid, email, linkedinurl, maindescription, status, url, title) VALUES (%s, %s, %s, %s, %s, %s, %s) RETURNING id",
-        (personId, email, linkedInUrl, candidateDescription, 1, url, candidateTitle)
-    )
-    rawRow = cur.fetchone()
-    professionalId = rawRow[0]
-    print(f"Professional ID: {professionalId}")
+        cur.execute(
+            "INSERT INTO professional (personid, email, linkedinurl, maindescription, status, url, title) VALUES (%s, %s, %s, %s, %s, %s, %s) RETURNING id",
+            (personId, email, linkedInUrl, candidateDescription, 1, url, candidateTitle)
+        )
+        rawRow = cur.fetchone()
+        professionalId = rawRow[0]
+        print(f"Professional ID: {professionalId}")
 
-    query = "INSERT INTO professionalprofile (professionalid) VALUES (%s) RETURNING id"    
-    cur.execute(query, (professionalId,))
+        query = "INSERT INTO professionalprofile (professionalid) VALUES (%s) RETURNING id"    
+        cur.execute(query, (professionalId,))
 
-    professionalprofileId = cur.fetchone()[0]
+        professionalprofileId = cur.fetchone()[0]
 
-    query = "INSERT INTO platformactivity (profileid, step, result, date) VALUES (%s, 1, 1, NOW()) RETURNING id"
-    cur.execute(query, (professionalprofileId,))
+        query = "INSERT INTO platformactivity (profileid, step, result, date) VALUES (%s, 1, 1, NOW()) RETURNING id"
+        cur.execute(query, (professionalprofileId,))
 
-    for skill in skills:
-        # Check if skill already exists
-        query = f"SELECT id FROM skill WHERE title ILIKE '%{skill['title'].strip()}%' LIMIT 1"
-        cur.execute(query)
-        skillId = cur.fetchone()[0] if cur.rowcount > 0 else None
+        for skill in skills:
+            # Check if skill already exists
+            query = f"SELECT id FROM skill WHERE title ILIKE '%{skill['title'].strip()}%' LIMIT 1"
+            cur.execute(query)
+            skillId = cur.fetchone()[0] if cur.rowcount > 0 else None
+
+            if not skillId:
+                continue
 
-        if not skillId:
-            continue
+            # Associate skill with professional profile
+            query = "INSERT INTO resumeskill (profileid, skillid) VALUES (%s, %s)"
+            cur.execute(query, (professionalprofileId, skillId))
 
-        # Associate skill with professional profile
-        query = "INSERT INTO resumeskill (profileid, skillid) VALUES (%s, %s)"
-        cur.execute(query, (professionalprofileId, skillId))
+            query = "INSERT INTO professionalskill (profileid, skillid, years) VALUES (%s, %s, %s)"
+            cur.execute(query, (professionalprofileId, skillId, skill['years']))
 
-        query = "INSERT INTO professionalskill (profileid, skillid, years) VALUES (%s, %s, %s)"
-        cur.execute(query, (professionalprofileId, skillId, skill['years']))
+        refreshCandidateSkills(cur, professionalprofileId)
 
-    for experience in culturalExperiences:
-        query = "INSERT INTO professionalculturalexperience (profileid, title, level) VALUES (%s, %s, %s)"
-        cur.execute(query, (professionalprofileId, experience["experience"], experience["level"]))
+        for experience in culturalExperiences:
+            query = "INSERT INTO professionalculturalexperience (profileid, title, level) VALUES (%s, %s, %s)"
+            cur.execute(query, (professionalprofileId, experience["experience"], experience["level"]))
     
-    conn.commit()
-    conn.close()
+        conn.commit()
+    SEARCH_TOTALS.clear()
+    dashboard.invalidate()
     print(f"Profile for {fullName} uploaded successfully with ID {personId}.")
     return {"status": "success", "message": f"Profile for {fullName} uploaded successfully.", "personid": personId, "name": fullName}
 
 def updateCandidateCore(personId: str, firstName: str, lastName: str, city: str = "", state: str = "", country: str = "", description: str = "", jobTitle: str = ""):
-    conn = client.getConnection()
-    cur = conn.cursor()
+    with client.connection() as conn:
+        cur = conn.cursor()
 
-    query = f"UPDATE person SET firstname = %s, lastname = %s WHERE id = {personId}"
-    cur.execute(query, (firstName, lastName))
+        query = f"UPDATE person SET firstname = %s, lastname = %s WHERE id = {personId}"
+        cur.execute(query, (firstName, lastName))
 
-    query = f"UPDATE address SET city = %s, state = %s, country = %s WHERE personid = {personId}"
-    cur.execute(query, (city, state, country))
+        query = f"UPDATE address SET city = %s, state = %s, country = %s WHERE personid = {personId}"
+        cur.execute(query, (city, state, country))
 
-    query = f"UPDATE professional SET maindescription = %s, title = %s WHERE personid = {personId}"
-    cur.execute(query, (description, jobTitle))
+        query = f"UPDATE professional SET maindescription = %s, title = %s WHERE personid = {personId}"
+        cur.execute(query, (description, jobTitle))
 
-    conn.commit()
-    conn.close()
+        conn.commit()
+    SEARCH_TOTALS.clear()
 
     return {"status": "success"}
 
 def updateCandidateSkills(personId: str, skills: list):
-    conn = client.getConnection()
-    cur = conn.cursor()
+    with client.connection() as conn:
+        cur = conn.cursor()
+
+        query = f"SELECT profper.id FROM professionalprofile profper JOIN professional prof ON profper.professionalid = prof.id WHERE prof.personid = {personId}"
+        cur.execute(query)
+        profileId = cur.fetchone()[0]
 
-    query = f"SELECT profper.id FROM professionalprofile profper JOIN professional prof ON profper.professionalid = prof.id WHERE prof.personid = {personId}"
-    cur.execute(query)
-    profileId = cur.fetchone()[0]
+        # Delete existing skills
+        query = f"DELETE FROM professionalskill WHERE profileid = {profileId}"
+        cur.execute(query)
 
-    # Delete existing skills
-    query = f"DELETE FROM professionalskill WHERE profileid = {profileId}"
-    cur.execute(query)
+        for skill in skills:
+            # Associate skill with professional profile
+            query = "INSERT INTO professionalskill (profileid, skillid, years) VALUES (%s, %s, %s)"
+            cur.execute(query, (profileId, skill["skill"], skill['years']))
 
-    for skill in skills:
-        # Associate skill with professional profile
-        query = "INSERT INTO professionalskill (profileid, skillid, years) VALUES (%s, %s, %s)"
-        cur.execute(query, (profileId, skill["skill"], skill['years']))
+        refreshCandidateSkills(cur, profileId)
 
-    conn.commit()
-    conn.close()
+        conn.commit()
+    SEARCH_TOTALS.clear()
 
     return {"status": "success"}
 
 def updateCandidateFeatures(personId: str, features: list, cultural: list):
-    conn = client.getConnection()
-    cur = conn.cursor()
-
-    query = f"SELECT profper.id FROM professionalprofile profper JOIN professional prof ON profper.professionalid = prof.id WHERE prof.personid = {personId}"
-    cur.execute(query)
-    profileId = cur.fetchone()[0]
-
-    # Delete existing features
-    query = f"DELETE FROM professionalfeature WHERE profileid = {profileId}"
-    cur.execute(query)
-
-    for feature in features:
-        feature["level"] = int(feature["level"])
-
-        if feature["level"] <1:
-            feature["level"] = 1
-        elif feature["level"] >3:
-            feature["level"] = 3
-        # Associate feature with professional profile
-        query = "INSERT INTO professionalfeature (profileid, title, level) VALUES (%s, %s, %s)"
-        cur.execute(query, (profileId, feature["title"], feature['level']))
-
-    # Delete existing cultural experiences
-    query = f"DELETE FROM professionalculturalexperience WHERE profileid = {profileId}"
-    cur.execute(query)
-
-    for feature in cultural:
-        feature["level"] = int(feature["level"])
-
-        if feature["level"] <1:
-            feature["level"] = 1
-        elif feature["level"] >3:
-            feature["level"] = 3
-        # Associate cultural experience with professional profile
-        query = "INSERT INTO professionalculturalexperience (profileid, title, level) VALUES (%s, %s, %s)"
-        cur.execute(query, (profileId, feature["title"], feature['level']))
-
-    conn.commit()
-    conn.close()
+    with client.connection() as conn:
+        cur = conn.cursor()
+
+        query = f"SELECT profper.id FROM professionalprofile profper JOIN professional prof ON profper.professionalid = prof.id WHERE prof.personid = {personId}"
+        cur.execute(query)
+        profileId = cur.fetchone()[0]
+
+        # Delete existing features
+        query = f"DELETE FROM professionalfeature WHERE profileid = {profileId}"
+        cur.execute(query)
+
+        for feature in features:
+            feature["level"] = int(feature["level"])
+
+            if feature["level"] <1:
+                feature["level"] = 1
+            elif feature["level"] >3:
+                feature["level"] = 3
+            # Associate feature with professional profile
+            query = "INSERT INTO professionalfeature (profileid, title, level) VALUES (%s, %s, %s)"
+            cur.execute(query, (profileId, feature["title"], feature['level']))
+
+        # Delete existing cultural experiences
+        query = f"DELETE FROM professionalculturalexperience WHERE profileid = {profileId}"
+        cur.execute(query)
+
+        for feature in cultural:
+            feature["level"] = int(feature["level"])
+
+            if feature["level"] <1:
+                feature["level"] = 1
+            elif feature["level"] >3:
+                feature["level"] = 3
+            # Associate cultural experience with professional profile
+            query = "INSERT INTO professionalculturalexperience (profileid, title, level) VALUES (%s, %s, %s)"
+            cur.execute(query, (profileId, feature["title"], feature['level']))
+
+        conn.commit()
 
     return {"status": "success"}
 
@@ -776,45 +781,44 @@ class profilePortfolioUpdateRequest(BaseModel):
     portfolio: list[PortfolioExperience]
 
 def updateCandidatePortfolio(personId: str, portfolio: list[PortfolioExperience]):
-    conn = client.getConnection()
-    cur = conn.cursor()
+    with client.connection() as conn:
+        cur = conn.cursor()
 
-    print(personId)
+        print(personId)
 
-    query = f"SELECT profper.id FROM professionalprofile profper JOIN professional prof ON profper.professionalid = prof.id WHERE prof.personid = {personId}"
-    cur.execute(query)
-    profileId = cur.fetchone()[0]
+        query = f"SELECT profper.id FROM professionalprofile profper JOIN professional prof ON profper.professionalid = prof.id WHERE prof.personid = {personId}"
+        cur.execute(query)
+        profileId = cur.fetchone()[0]
 
-    print(profileId)
+        print(profileId)
 
-    # Delete existing portfolio experience
-    query = f"DELETE FROM professionalexperience WHERE profileid = {profileId}"
-    cur.execute(query)
+        # Delete existing portfolio experience
+        query = f"DELETE FROM professionalexperience WHERE profileid = {profileId}"
+        cur.execute(query)
 
-    for experience in portfolio:
-        print(experience)
+        for experience in portfolio:
+            print(experience)
 
-        if experience.finishDate is not None and experience.finishDate != "":
-            experience.finishDate = int(experience.finishDate)
-            query = "INSERT INTO professionalexperience (profileid, description, mainrole, companyname, startdate, finishdate, ispresent) VALUES (%s, %s, %s, %s, %s, %s, %s) RETURNING id"
-            cur.execute(query, (profileId, experience.description, experience.mainRole, experience.companyName, experience.startDate, experience.finishDate, experience.isPresent))
-        else:
-            query = "INSERT INTO professionalexperience (profileid, description, mainrole, companyname, startdate, ispresent) VALUES (%s, %s, %s, %s, %s, %s) RETURNING id"
-            cur.execute(query, (profileId, experience.description, experience.mainRole, experience.companyName, experience.startDate, experience.isPresent))
-        experienceId = cur.fetchone()[0]
+            if experience.finishDate is not None and experience.finishDate != "":
+                experience.finishDate = int(experience.finishDate)
+                query = "INSERT INTO professionalexperience (profileid, description, mainrole, companyname, startdate, finishdate, ispresent) VALUES (%s, %s, %s, %s, %s, %s, %s) RETURNING id"
+                cur.execute(query, (profileId, experience.description, experience.mainRole, experience.companyName, experience.startDate, experience.finishDate, experience.isPresent))
+            else:
+                query = "INSERT INTO professionalexperience (profileid, description, mainrole, companyname, startdate, ispresent) VALUES (%s, %s, %s, %s, %s, %s) RETURNING id"
+                cur.execute(query, (profileId, experience.description, experience.mainRole, experience.companyName, experience.startDate, experience.isPresent))
+            experienceId = cur.fetchone()[0]
 
-        print(experienceId)
-        print(cur.statusmessage)
+            print(experienceId)
+            print(cur.statusmessage)
 
-        for skill in experience.skills:
-            query = "INSERT INTO portfolioskill (professionalexperienceid, skillid) VALUES (%s, %s)"
-            cur.execute(query, (experienceId, skill))
+            for skill in experience.skills:
+                query = "INSERT INTO portfolioskill (professionalexperienceid, skillid) VALUES (%s, %s)"
+                cur.execute(query, (experienceId, skill))
 
-        for feature in experience.features:
-            query = "INSERT INTO portfoliofeature (professionalexperienceid, title) VALUES (%s, %s)"
-            cur.execute(query, (experienceId, feature))
+            for feature in experience.features:
+                query = "INSERT INTO portfoliofeature (professionalexperienceid, title) VALUES (%s, %s)"
+                cur.execute(query, (experienceId, feature))
 
-    conn.commit()
-    conn.close()
+        conn.commit()
 
     return {"status": "success"}
\ No newline at end of file
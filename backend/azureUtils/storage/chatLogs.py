@@ -8,16 +8,14 @@ import json
 
 def getPersonId(chatUrl: str):
     try:
-        conn = client.getConnection()
-        cur = conn.cursor()
+        with client.connection() as conn:
+            cur = conn.cursor()
 
-        query = f"SELECT person.id FROM person JOIN aichatlogs ai ON person.id = ai.personid WHERE ai.urlcode = '{chatUrl}';"
+            query = f"SELECT person.id FROM person JOIN aichatlogs ai ON person.id = ai.personid WHERE ai.urlcode = '{chatUrl}';"
         
-        cur.execute(query)
-        result = cur.fetchone()
+            cur.execute(query)
+            result = cur.fetchone()
 
-        conn.close()
-        
         return result[0]
     
     except Exception as e:
@@ -26,28 +24,24 @@ def getPersonId(chatUrl: str):
 
 def getChatUrl(personId: str):
     try:
-        conn = client.getConnection()
-        cur = conn.cursor()
+        with client.connection() as conn:
+            cur = conn.cursor()
 
-        try:
-            query = f"SELECT urlcode FROM aichatlogs WHERE personid = '{personId}' ORDER BY id DESC LIMIT 1;"
+            try:
+                query = f"SELECT urlcode FROM aichatlogs WHERE personid = '{personId}' ORDER BY id DESC LIMIT 1;"
             
-            cur.execute(query)
-            result = cur.fetchone()
+                cur.execute(query)
+                result = cur.fetchone()
 
-            conn.close()
-            
-            return result[0]
+                return result[0]
         
-        except Exception as e:
-            query = f"SELECT id FROM professionalsurvey ps JOIN professionalprofile pp ON ps.profileid = pp.id JOIN professional ON pp.professionalid = professional.id WHERE professional.personid = '{personId}' ORDER BY ps.id DESC LIMIT 1;"
+            except Exception as e:
+                query = f"SELECT id FROM professionalsurvey ps JOIN professionalprofile pp ON ps.profileid = pp.id JOIN professional ON pp.professionalid = professional.id WHERE professional.personid = '{personId}' ORDER BY ps.id DESC LIMIT 1;"
             
-            cur.execute(query)
-            result = cur.fetchone()
+                cur.execute(query)
+                result = cur.fetchone()
 
-            conn.close()
-            
-            return 'Candidate has already completed a legacy survey'
+                return 'Candidate has already completed a legacy survey'
     
     except Exception as e:
         print(f'Failed to grab chat URL for {personId}: {e}')
@@ -65,109 +59,98 @@ def scheduleChat(profileid: str):
     # Use random.choices to select characters and join them into a string
     random_string = ''.join(random.choices(characters, k=10))
 
-    conn = client.getConnection()
-    cur = conn.cursor()
+    with client.connection() as conn:
+        cur = conn.cursor()
 
-    # Count distinct candidates in the person table
-    query = "INSERT INTO aichatlogs (personid, enddate, urlCode) VALUES (%s, %s, %s)"
+        # Count distinct candidates in the person table
+        query = "INSERT INTO aichatlogs (personid, enddate, urlCode) VALUES (%s, %s, %s)"
     
-    cur.execute(query, (profileid, weekFromNow, random_string))
+        cur.execute(query, (profileid, weekFromNow, random_string))
 
-    # TODO: Send email with link to the candidate
+        # TODO: Send email with link to the candidate
 
-    createSurvey(getProfessionalProfileId(profileid), random_string)
-    conn.commit()
-    conn.close()
+        createSurvey(getProfessionalProfileId(profileid), random_string)
+        conn.commit()
     
     return random_string
 
 def createSurvey(profprofileId: int, token: str):
-    conn = client.getConnection()
-    cur = conn.cursor()
+    with client.connection() as conn:
+        cur = conn.cursor()
 
-    # Count distinct candidates in the person table
-    query = "INSERT INTO professionalsurvey (profileid, token) VALUES (%s, gen_random_uuid())"
+        # Count distinct candidates in the person table
+        query = "INSERT INTO professionalsurvey (profileid, token) VALUES (%s, gen_random_uuid())"
     
-    cur.execute(query, (profprofileId,))
+        cur.execute(query, (profprofileId,))
 
-    conn.commit()
-    conn.close()
+        conn.commit()
 
 def countQuestions() -> int:
-    conn = client.getConnection()
-    cur = conn.cursor()
-
-    # Count distinct candidates in the person table
-    query = "SELECT COUNT(DISTINCT id) FROM question"
+    with client.connection() as conn:
+        cur = conn.cursor()
 
-    cur.execute(query)
-    result = cur.fetchall()
+        # Count distinct candidates in the person table
+        query = "SELECT COUNT(DISTINCT id) FROM question"
 
-    conn.close()
+        cur.execute(query)
+        result = cur.fetchall()
 
     return result[0][0]
 
 def getQuestions():
-    conn = client.getConnection()
-    cur = conn.cursor()
-
-    # Count distinct candidates in the person table
-    query = "SELECT description FROM question"
+    with client.connection() as conn:
+        cur = conn.cursor()
 
-    cur.execute(query)
-    result = cur.fetchall()
+        # Count distinct candidates in the person table
+        query = "SELECT description FROM question"
 
-    processedResults = []
-    for row in result:
-        processedResults.append(row[0])
+        cur.execute(query)
+        result = cur.fetchall()
 
-    conn.close()
+        processedResults = []
+        for row in result:
+            processedResults.append(row[0])
 
     return processedResults
 
 def getQuestion(questionId: int) -> str:
-    conn = client.getConnection()
-    cur = conn.cursor()
-
-    # Count distinct candidates in the person table
-    query = f"SELECT description FROM question WHERE id = {questionId}"
+    with client.connection() as conn:
+        cur = conn.cursor()
 
-    cur.execute(query)
-    result = cur.fetchall()
+        # Count distinct candidates in the person table
+        query = f"SELECT description FROM question WHERE id = {questionId}"
 
-    conn.close()
+        cur.execute(query)
+        result = cur.fetchall()
 
     return result[0][0]
 
 def upsertSurveyAnswer(questionId: int, surveyResponse: int, profId: int):
     print(f'profId: {profId}')
-    conn = client.getConnection()
-    cur = conn.cursor()
+    with client.connection() as conn:
+        cur = conn.cursor()
 
-    try:
-        # Count distinct candidates in the person table
-        query = "INSERT INTO professionalsurveyquestion (professionalsurveyid, surveyquestionid, answer) VALUES (%s, %s, %s)"
+        try:
+            # Count distinct candidates in the person table
+            query = "INSERT INTO professionalsurveyquestion (professionalsurveyid, surveyquestionid, answer) VALUES (%s, %s, %s)"
         
-        cur.execute(query, (profId, questionId, surveyResponse))
+            cur.execute(query, (profId, questionId, surveyResponse))
 
-    except Exception as e:
-        print(f'Cannot insert candidate answers: {e}')
+        except Exception as e:
+            print(f'Cannot insert candidate answers: {e}')
 
-    conn.commit()
-    conn.close()
+        conn.commit()
 
 def getChat(urlcode: str):
     try:
-        conn = client.getConnection()
-        cur = conn.cursor()
+        with client.connection() as conn:
+            cur = conn.cursor()
 
-        # Count distinct candidates in the person table
-        query = f"SELECT person.firstname, person.lastname, ai.* FROM person JOIN aichatlogs ai ON person.id = ai.personid WHERE ai.urlcode = '{urlcode}' ORDER BY ai.id DESC LIMIT 1"
+            # Count distinct candidates in the person table
+            query = f"SELECT person.firstname, person.lastname, ai.* FROM person JOIN aichatlogs ai ON person.id = ai.personid WHERE ai.urlcode = '{urlcode}' ORDER BY ai.id DESC LIMIT 1"
         
-        cur.execute(query)
-        row = cur.fetchone()
-
-        conn.close()
+            cur.execute(query)
+            row = cur.fetchone()
 
         openAiTranscript = []
 
@@ -210,15 +193,14 @@ def saveChat(chatUrl: str, userName: str, aiTranscript: list):
             elif item['role'] == 'assistant':
                 fixedTranscript.append(f"DevReady AI:{item['content']}")
 
-        conn = client.getConnection()
-        cur = conn.cursor()
+        with client.connection() as conn:
+            cur = conn.cursor()
 
-        # Count distinct candidates in the person table
-        query = "UPDATE aichatlogs SET transcript = %s WHERE urlcode = %s"
-        cur.execute(query, (fixedTranscript, chatUrl))
+            # Count distinct candidates in the person table
+            query = "UPDATE aichatlogs SET transcript = %s WHERE urlcode = %s"
+            cur.execute(query, (fixedTranscript, chatUrl))
 
-        conn.commit()
-        conn.close()
+            conn.commit()
     except Exception as e:
         # Handle potential API errors (e.g., authentication issues, rate limits)
         print(f"An API error occurred when saving transcript: {e}")
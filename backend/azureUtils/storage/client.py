@@ -1,11 +1,25 @@
 import os
+import threading
 from dotenv import load_dotenv
 import psycopg
-    
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import ConnectionPool, AsyncConnectionPool
+
 load_dotenv()
 
-def getConnection() -> psycopg.Connection:
-    connection = psycopg.connect(
+POOL_MIN_SIZE = int(os.getenv("AZURE_DATABASE_POOL_MIN", "1"))
+POOL_MAX_SIZE = int(os.getenv("AZURE_DATABASE_POOL_MAX", "10"))
+# Seconds a request waits for a free connection before failing
+POOL_TIMEOUT = float(os.getenv("AZURE_DATABASE_POOL_TIMEOUT", "30"))
+# Idle connections above POOL_MIN_SIZE are closed after this many seconds
+POOL_MAX_IDLE = float(os.getenv("AZURE_DATABASE_POOL_MAX_IDLE", "300"))
+
+_pool = None
+_asyncPool = None
+_poolLock = threading.Lock()
+
+def _conninfo() -> str:
+    return make_conninfo(
         host=os.getenv("AZURE_DATABASE_HOST"),
         port=os.getenv("AZURE_DATABASE_PORT"),
         dbname=os.getenv("AZURE_DATABASE_NAME"),
@@ -13,4 +27,84 @@ def getConnection() -> psycopg.Connection:
         password=os.getenv("AZURE_DATABASE_PASSWORD"),
         sslmode="require"
     )
-    return connection
\ No newline at end of file
+
+def getPool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _poolLock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    _conninfo(),
+                    min_size=POOL_MIN_SIZE,
+                    max_size=POOL_MAX_SIZE,
+                    timeout=POOL_TIMEOUT,
+                    max_idle=POOL_MAX_IDLE,
+                    # Health check on checkout so dropped TLS sessions are replaced transparently
+                    check=ConnectionPool.check_connection,
+                    name="azure",
+                    open=True
+                )
+    return _pool
+
+def connection():
+    """
+    Check a connection out of the pool for one unit of work:
+
+        with client.connection() as conn:
+            cur = conn.cursor()
+            ...
+
+    The transaction is committed when the block exits cleanly (rolled back on error)
+    and the connection goes back to the pool instead of being closed.
+    """
+    return getPool().connection()
+
+async def getAsyncPool() -> AsyncConnectionPool:
+    global _asyncPool
+    if _asyncPool is None:
+        pool = AsyncConnectionPool(
+            _conninfo(),
+            min_size=POOL_MIN_SIZE,
+            max_size=POOL_MAX_SIZE,
+            timeout=POOL_TIMEOUT,
+            max_idle=POOL_MAX_IDLE,
+            check=AsyncConnectionPool.check_connection,
+            name="azure-async",
+            open=False
+        )
+        await pool.open()
+        # Another coroutine may have opened one while we awaited
+        if _asyncPool is None:
+            _asyncPool = pool
+        else:
+            await pool.close()
+    return _asyncPool
+
+async def asyncConnection():
+    """Async counterpart of connection(): `async with await client.asyncConnection() as conn:`"""
+    return (await getAsyncPool()).connection()
+
+def getConnection() -> psycopg.Connection:
+    # Unpooled connection for one-off scripts and migrations; request handlers use connection()
+    return psycopg.connect(_conninfo())
+
+def poolStats() -> dict:
+    """Checkout / wait-time counters for the pools that have been opened."""
+    stats = {}
+    if _pool is not None:
+        stats["sync"] = _pool.get_stats()
+    if _asyncPool is not None:
+        stats["async"] = _asyncPool.get_stats()
+    return stats
+
+def closePools():
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+
+async def closeAsyncPool():
+    global _asyncPool
+    if _asyncPool is not None:
+        await _asyncPool.close()
+        _asyncPool = None
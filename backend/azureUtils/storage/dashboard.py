@@ -0,0 +1,45 @@
+import os
+import azureUtils.storage.client as client
+from ttl_cache import TTLCache
+
+# Counts are served from memory for DASHBOARD_TTL_SECONDS, then for up to
+# DASHBOARD_STALE_SECONDS more while a background refresh runs (0 disables that).
+DASHBOARD_TTL_SECONDS = float(os.getenv("DASHBOARD_TTL_SECONDS", "30"))
+DASHBOARD_STALE_SECONDS = float(os.getenv("DASHBOARD_STALE_SECONDS", "300"))
+
+_counts = TTLCache(DASHBOARD_TTL_SECONDS, max_entries=64, stale_seconds=DASHBOARD_STALE_SECONDS)
+
+# Status Guide:
+# 1 = Draft
+# 2 = Pending
+# 3 = Published
+# 4 = Updated
+STATUS_NAMES = {1: "Draft", 2: "Pending", 3: "Published", 4: "Updated"}
+
+def _loadCounts(domain: str) -> dict:
+    with client.connection() as conn:
+        cur = conn.cursor()
+
+        # Every dashboard aggregate in one pass over person. The professional join keeps the
+        # person.id = professional.id pairing the individual count queries used.
+        domainClause, domainParams = ("", ()) if domain == 'all' else (" WHERE person.domain = %s", (domain,))
+        query = f"SELECT COUNT(person.id), COUNT(professional.id) FILTER (WHERE professional.modifieddate >= CURRENT_DATE - INTERVAL '7 days'), COUNT(professional.id) FILTER (WHERE professional.status = 1), COUNT(professional.id) FILTER (WHERE professional.status = 2), COUNT(professional.id) FILTER (WHERE professional.status = 3), COUNT(professional.id) FILTER (WHERE professional.status = 4) FROM person LEFT JOIN professional ON person.id = professional.id{domainClause};"
+
+        cur.execute(query, domainParams)
+        row = cur.fetchone()
+
+    return {
+        "total": row[0],
+        "recent": row[1],
+        "statusCounts": {name: row[1 + status] for status, name in STATUS_NAMES.items()}
+    }
+
+def getCounts(domain: str = 'all') -> dict:
+    """{"total", "recent", "statusCounts"} for the dashboard, cached per domain."""
+    return _counts.get_or_load(domain, lambda: _loadCounts(domain))
+
+def invalidate():
+    _counts.clear()
+
+def cacheStats() -> dict:
+    return _counts.stats()
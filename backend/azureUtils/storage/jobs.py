@@ -2,52 +2,59 @@ import azureUtils.storage.client as client
 import openAI.jobProcessing as aiProcessing
 
 def uploadJob(company: str, title: str, domain: str, jd_text: str, skills: list[str]):
-    conn = client.getConnection()
-    cur = conn.cursor()
-
     try:
-        # Add jd to jd table
-        query = "INSERT INTO jobdescription (domain, company, jobtitle, description) VALUES (%s, %s, %s, %s) RETURNING id"
+        with client.connection() as conn:
+            personalities = conn.execute("SELECT id, title FROM personality").fetchall()
+
+        # Score traits before the insert transaction opens so it isn't held across the AI calls
+        personalityScores = aiProcessing.scorePersonalities(jd_text, personalities)
+
+        with client.connection() as conn:
+            cur = conn.cursor()
+
+            # Add jd to jd table
+            query = "INSERT INTO jobdescription (domain, company, jobtitle, description) VALUES (%s, %s, %s, %s) RETURNING id"
         
-        cur.execute(query, (domain, company, title, jd_text))
+            cur.execute(query, (domain, company, title, jd_text))
 
-        jobId = cur.fetchone()[0]
+            jobId = cur.fetchone()[0]
 
-        print(f"Job ID: {jobId}")
+            print(f"Job ID: {jobId}")
 
-        for skill in skills:
-            query = f"SELECT id FROM skill WHERE title ILIKE '%{skill}%' ORDER BY id DESC LIMIT 1"
-            cur.execute(query)
+            for skill in skills:
+                query = f"SELECT id FROM skill WHERE title ILIKE '%{skill}%' ORDER BY id DESC LIMIT 1"
+                cur.execute(query)
 
-            # TODO: Get AI to determine the number of years required by a company for a skill
-            query = "INSERT INTO jobskills (jobid, skillid) VALUES (%s, %s)"
-            cur.execute(query, (jobId, cur.fetchone()[0]))
+                # TODO: Get AI to determine the number of years required by a company for a skill
+                query = "INSERT INTO jobskills (jobid, skillid) VALUES (%s, %s)"
+                cur.execute(query, (jobId, cur.fetchone()[0]))
 
-        aiProcessing.processPersonalities(jobId, jd_text, cur)
-        conn.commit()
-        conn.close()
+            aiProcessing.insertPersonalityScores(jobId, personalityScores, cur)
+            conn.commit()
 
         return {'jd_id':jobId}
 
     except Exception as e:
+        # Leaving the connection block on an exception rolls the transaction back
         print(f'Cannot insert job description: {e}')
-        conn.close()
+def jobExists(jobId: int) -> bool:
+    with client.connection() as conn:
+        return conn.execute("SELECT 1 FROM jobdescription WHERE id = %s", (jobId,)).fetchone() is not None
+
 # Test
 def getJob(jobId: int):
-    conn = client.getConnection()
-    cur = conn.cursor()
-
-    query = f"SELECT job.id, job.domain, job.company, job.jobtitle, ARRAY_AGG(DISTINCT skill.title), ARRAY_AGG(DISTINCT skill.id), job.description FROM jobdescription job LEFT JOIN jobskills js ON job.id = js.jobid JOIN skill ON js.skillid = skill.id WHERE job.id = {jobId} GROUP BY job.id, job.domain, job.company, job.jobtitle, job.description LIMIT 1"
-    cur.execute(query)
+    with client.connection() as conn:
+        cur = conn.cursor()
 
-    result = cur.fetchone()
+        query = f"SELECT job.id, job.domain, job.company, job.jobtitle, ARRAY_AGG(DISTINCT skill.title), ARRAY_AGG(DISTINCT skill.id), job.description FROM jobdescription job LEFT JOIN jobskills js ON job.id = js.jobid JOIN skill ON js.skillid = skill.id WHERE job.id = {jobId} GROUP BY job.id, job.domain, job.company, job.jobtitle, job.description LIMIT 1"
+        cur.execute(query)
 
-    query = f"SELECT p.title, jp.personalityid, jp.score FROM jobdescription job LEFT JOIN jobpersonalities jp ON job.id=jp.jobid JOIN personality p ON jp.personalityid = p.id WHERE job.id = {jobId}"
-    cur.execute(query)
+        result = cur.fetchone()
 
-    personalityResult = cur.fetchall()
+        query = f"SELECT p.title, jp.personalityid, jp.score FROM jobdescription job LEFT JOIN jobpersonalities jp ON job.id=jp.jobid JOIN personality p ON jp.personalityid = p.id WHERE job.id = {jobId}"
+        cur.execute(query)
 
-    conn.close()
+        personalityResult = cur.fetchall()
 
     personalityArray = []
 
@@ -66,15 +73,13 @@ def getJob(jobId: int):
     }
 
 def searchJobs(domain: str, searchQuery: str, limit: int):
-    conn = client.getConnection()
-    cur = conn.cursor()
+    with client.connection() as conn:
+        cur = conn.cursor()
 
-    query = f"SELECT id, domain, company, jobtitle FROM jobdescription WHERE (jobtitle ILIKE '%{searchQuery}%' OR company ILIKE '%{searchQuery}%') AND domain = '{domain}' ORDER BY id DESC LIMIT {limit}"
-    cur.execute(query)
+        query = f"SELECT id, domain, company, jobtitle FROM jobdescription WHERE (jobtitle ILIKE '%{searchQuery}%' OR company ILIKE '%{searchQuery}%') AND domain = '{domain}' ORDER BY id DESC LIMIT {limit}"
+        cur.execute(query)
 
-    results = cur.fetchall()
-
-    conn.close()
+        results = cur.fetchall()
 
     processedResults = []
 
@@ -89,15 +94,13 @@ def searchJobs(domain: str, searchQuery: str, limit: int):
     return processedResults
 
 def listJobs(domain: str, limit: int):
-    conn = client.getConnection()
-    cur = conn.cursor()
-
-    query = f"SELECT id, domain, company, jobtitle FROM jobdescription WHERE domain = '{domain}' ORDER BY id DESC LIMIT {limit}"
-    cur.execute(query)
+    with client.connection() as conn:
+        cur = conn.cursor()
 
-    results = cur.fetchall()
+        query = f"SELECT id, domain, company, jobtitle FROM jobdescription WHERE domain = '{domain}' ORDER BY id DESC LIMIT {limit}"
+        cur.execute(query)
 
-    conn.close()
+        results = cur.fetchall()
 
     processedResults = []
 
@@ -29,9 +29,13 @@ def getBlobSasUrl(blob_name: str):
 
 # Upload a resume
 async def uploadResume(file: UploadFile, profile_id: int):
+    return uploadResumeBytes(file.file, file.filename, profile_id)
+
+def uploadResumeBytes(data, filename: str, profile_id: int):
+    # data may be bytes or a file object; background jobs only have the bytes
     print(f"Uploading resume for profile {profile_id}")
     try:
-        safe_filename = os.path.basename(file.filename)
+        safe_filename = os.path.basename(filename)
         blob_name = f"professionals/{profile_id}/{uuid.uuid4()}_{safe_filename}"
 
         blob_client = blob_service_client.get_blob_client(
@@ -39,7 +43,7 @@ async def uploadResume(file: UploadFile, profile_id: int):
             blob=blob_name
         )
 
-        blob_client.upload_blob(file.file, overwrite=True)
+        blob_client.upload_blob(data, overwrite=True)
 
         print(f"Resume uploaded successfully as {blob_name}")
 
@@ -47,6 +51,10 @@ async def uploadResume(file: UploadFile, profile_id: int):
     except Exception as e:
         print(f"Error uploading resume: {e}")
         raise e
+
+def hasResume(profile_id: int) -> bool:
+    container_client = blob_service_client.get_container_client(CONTAINER_NAME)
+    return next(iter(container_client.list_blobs(name_starts_with=f"professionals/{profile_id}/")), None) is not None
     
 # Retrieve resume
 async def getResume(profile_id: int):
@@ -0,0 +1,22 @@
+# Name/email search fragments shared by the candidate search queries.
+# Both columns are covered by pg_trgm GIN indexes (migration 002), so a '%q%' pattern
+# is an index scan instead of a sequential scan over a computed concatenation.
+
+# person.full_name_search is lower("firstname lastname|goesbyname lastname")
+NAME_EMAIL_FILTER = "(person.full_name_search ILIKE %s OR prof.email ILIKE %s)"
+
+# Best trigram similarity across both columns, for "closest match first" ordering
+NAME_EMAIL_RANK = "GREATEST(similarity(person.full_name_search, %s), similarity(prof.email, %s))"
+
+def likePattern(query: str) -> str:
+    # Substring pattern with LIKE wildcards in the user's text treated literally
+    escaped = (query or "").strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+def filterParams(query: str) -> tuple:
+    pattern = likePattern(query)
+    return (pattern, pattern)
+
+def rankParams(query: str) -> tuple:
+    term = (query or "").strip().lower()
+    return (term, term)
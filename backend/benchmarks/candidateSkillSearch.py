@@ -0,0 +1,80 @@
+"""
+Skill-search latency before/after the candidate_skill table (migration 001).
+
+Builds synthetic TEMP copies of professionalskill / resumeskill (1M rows by default)
+on the Azure database, derives candidate_skill from them the same way the migration
+does, then times the skill-id filter through the UNION subquery and through the
+indexed table. Nothing outside the session's temp schema is touched.
+
+    cd backend
+    python -m benchmarks.candidateSkillSearch --rows 1000000 --runs 5
+"""
+import argparse
+import random
+import statistics
+import time
+import azureUtils.storage.client as client
+
+UNION_QUERY = "SELECT allskills.profileid, COUNT(DISTINCT allskills.skillid) AS skillMatches FROM (SELECT profileid, skillid FROM bench_professionalskill UNION SELECT profileid, skillid FROM bench_resumeskill) allskills WHERE allskills.skillid = ANY(%s::int[]) GROUP BY allskills.profileid ORDER BY skillMatches DESC LIMIT 50"
+TABLE_QUERY = "SELECT allskills.profileid, COUNT(DISTINCT allskills.skillid) AS skillMatches FROM bench_candidate_skill allskills WHERE allskills.skillid = ANY(%s::int[]) GROUP BY allskills.profileid ORDER BY skillMatches DESC LIMIT 50"
+
+def buildTables(cur, rows: int, profiles: int, skills: int):
+    # Roughly half the resume skills duplicate a professional skill, like real uploads do
+    cur.execute("CREATE TEMP TABLE bench_professionalskill (profileid INTEGER, skillid INTEGER, years INTEGER)")
+    cur.execute("CREATE TEMP TABLE bench_resumeskill (profileid INTEGER, skillid INTEGER)")
+    cur.execute(
+        "INSERT INTO bench_professionalskill SELECT (random() * %s)::int, (random() * %s)::int, (random() * 10)::int FROM generate_series(1, %s)",
+        (profiles, skills, rows // 2)
+    )
+    cur.execute(
+        "INSERT INTO bench_resumeskill SELECT profileid, skillid FROM bench_professionalskill WHERE random() < 0.5 UNION ALL SELECT (random() * %s)::int, (random() * %s)::int FROM generate_series(1, %s)",
+        (profiles, skills, rows // 4)
+    )
+    cur.execute("CREATE TEMP TABLE bench_candidate_skill (profileid INTEGER NOT NULL, skillid INTEGER NOT NULL, PRIMARY KEY (profileid, skillid))")
+    cur.execute("CREATE INDEX ON bench_candidate_skill (skillid, profileid)")
+    cur.execute("INSERT INTO bench_candidate_skill SELECT profileid, skillid FROM bench_professionalskill UNION SELECT profileid, skillid FROM bench_resumeskill")
+    cur.execute("ANALYZE bench_professionalskill")
+    cur.execute("ANALYZE bench_resumeskill")
+    cur.execute("ANALYZE bench_candidate_skill")
+
+def timeQuery(cur, query: str, skillSets: list) -> list:
+    timings = []
+    for skillIds in skillSets:
+        start = time.perf_counter()
+        cur.execute(query, (skillIds,))
+        cur.fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="total synthetic skill rows")
+    parser.add_argument("--profiles", type=int, default=50_000)
+    parser.add_argument("--skills", type=int, default=2_000)
+    parser.add_argument("--runs", type=int, default=5, help="skill sets timed per query")
+    parser.add_argument("--skills-per-job", type=int, default=8)
+    args = parser.parse_args()
+
+    conn = client.getConnection()
+    cur = conn.cursor()
+    try:
+        start = time.perf_counter()
+        buildTables(cur, args.rows, args.profiles, args.skills)
+        print(f"Built synthetic tables ({args.rows:,} rows) in {time.perf_counter() - start:.1f}s")
+
+        rng = random.Random(42)
+        skillSets = [rng.sample(range(args.skills), args.skills_per_job) for _ in range(args.runs)]
+
+        # Warm both plans once so the first timed run isn't paying for cold buffers alone
+        timeQuery(cur, UNION_QUERY, skillSets[:1])
+        timeQuery(cur, TABLE_QUERY, skillSets[:1])
+
+        for label, query in (("UNION subquery", UNION_QUERY), ("candidate_skill", TABLE_QUERY)):
+            timings = timeQuery(cur, query, skillSets)
+            print(f"{label:>16}: median {statistics.median(timings):8.1f} ms   min {min(timings):8.1f} ms   max {max(timings):8.1f} ms")
+    finally:
+        conn.rollback()
+        conn.close()
+
+if __name__ == "__main__":
+    main()
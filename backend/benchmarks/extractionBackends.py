@@ -0,0 +1,82 @@
+"""
+Pages/second and memory for each PDF extraction backend over a folder of PDFs.
+
+Runs every backend in resumeProcessing.processing.PDF_EXTRACTORS (or the ones given)
+over each *.pdf under the corpus folder, with no page/char/time budget, and prints
+pages, characters, wall time, pages per second and the peak Python heap per document
+(tracemalloc, measured in a separate untimed pass). Files are read into memory first
+so disk speed isn't measured.
+
+    cd backend
+    python -m benchmarks.extractionBackends uploads --backends fast layout auto --repeat 3
+"""
+import argparse
+import glob
+import os
+import time
+import tracemalloc
+from resumeProcessing.processing import PDF_EXTRACTORS
+
+def extractAll(name: str, path: str, data: bytes) -> tuple:
+    pages = chars = 0
+    try:
+        for text in PDF_EXTRACTORS[name](data):
+            pages += 1
+            chars += len(text)
+    except ValueError as e:
+        print(f"  {name}: {os.path.basename(path)} failed: {e}")
+        return pages, chars, 1
+    return pages, chars, 0
+
+def runBackend(name: str, documents: list, repeat: int) -> dict:
+    pages = chars = failures = 0
+    elapsed = 0.0
+    for i in range(repeat):
+        for path, data in documents:
+            start = time.perf_counter()
+            p, c, f = extractAll(name, path, data)
+            elapsed += time.perf_counter() - start
+            if i == 0:
+                pages, chars, failures = pages + p, chars + c, failures + f
+
+    # Separate pass: tracemalloc slows extraction several times over, so it never overlaps the timing
+    peak = 0
+    for path, data in documents:
+        tracemalloc.start()
+        extractAll(name, path, data)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return {
+        "backend": name,
+        "pages": pages,
+        "chars": chars,
+        "failures": failures,
+        "seconds": elapsed / repeat,
+        "pagesPerSecond": pages * repeat / elapsed if elapsed else 0.0,
+        "peakMb": peak / (1024 * 1024),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", help="Folder searched recursively for *.pdf")
+    parser.add_argument("--backends", nargs="+", default=list(PDF_EXTRACTORS))
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.corpus, "**", "*.pdf"), recursive=True))
+    if not paths:
+        parser.error(f"No PDFs found under {args.corpus}")
+    documents = []
+    for path in paths:
+        with open(path, "rb") as f:
+            documents.append((path, f.read()))
+    print(f"{len(documents)} PDFs, {sum(len(d) for _, d in documents) / (1024 * 1024):.1f} MB\n")
+
+    print(f"{'backend':<10}{'pages':>8}{'chars':>12}{'seconds':>10}{'pages/s':>10}{'peak MB':>10}{'failed':>8}")
+    for name in args.backends:
+        r = runBackend(name, documents, args.repeat)
+        print(f"{r['backend']:<10}{r['pages']:>8}{r['chars']:>12}{r['seconds']:>10.2f}{r['pagesPerSecond']:>10.1f}{r['peakMb']:>10.1f}{r['failures']:>8}")
+
+if __name__ == "__main__":
+    main()
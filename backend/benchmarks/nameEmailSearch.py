@@ -0,0 +1,71 @@
+"""
+Query plans for candidate name/email search before/after migration 002.
+
+Generates TEMP person/professional tables (200k people by default) shaped like
+the real ones, then prints EXPLAIN ANALYZE for the old concatenation ILIKE filter
+and for the trigram-indexed full_name_search/email filter with similarity ordering.
+Requires the pg_trgm extension (created by migration 002).
+
+    cd backend
+    python -m benchmarks.nameEmailSearch --people 200000 --query smit
+"""
+import argparse
+import azureUtils.storage.search as search
+import azureUtils.storage.client as client
+
+FIRST_NAMES = ["james", "maria", "wei", "fatima", "lucas", "aisha", "carlos", "olga", "kenji", "priya", "john", "sofia"]
+LAST_NAMES = ["smith", "garcia", "chen", "khan", "silva", "ivanova", "tanaka", "patel", "brown", "rossi", "nguyen", "smithers"]
+
+OLD_QUERY = "SELECT person.id FROM bench_person person JOIN bench_professional prof ON person.id = prof.personid WHERE (person.firstname || ' ' || person.lastname) ILIKE %s OR (person.goesbyname || ' ' || person.lastname) ILIKE %s OR prof.email ILIKE %s ORDER BY person.id DESC LIMIT 20"
+NEW_QUERY = f"SELECT person.id FROM bench_person person JOIN bench_professional prof ON person.id = prof.personid WHERE {search.NAME_EMAIL_FILTER} ORDER BY {search.NAME_EMAIL_RANK} DESC, person.id DESC LIMIT 20"
+
+def buildTables(cur, people: int):
+    cur.execute(
+        "CREATE TEMP TABLE bench_person (id INTEGER PRIMARY KEY, firstname TEXT, lastname TEXT, goesbyname TEXT, "
+        "full_name_search TEXT GENERATED ALWAYS AS (lower(coalesce(firstname, '') || ' ' || coalesce(lastname, '') || '|' || coalesce(goesbyname, '') || ' ' || coalesce(lastname, ''))) STORED)"
+    )
+    cur.execute("CREATE TEMP TABLE bench_professional (id SERIAL PRIMARY KEY, personid INTEGER, email TEXT)")
+
+    # Append the id so names/emails are mostly unique, like real data
+    cur.execute(
+        "INSERT INTO bench_person (id, firstname, lastname, goesbyname) "
+        "SELECT g, (%s::text[])[1 + g %% %s] || (g %% 97), (%s::text[])[1 + (g / 7) %% %s] || (g %% 89), CASE WHEN g %% 5 = 0 THEN 'jay' END "
+        "FROM generate_series(1, %s) g",
+        (FIRST_NAMES, len(FIRST_NAMES), LAST_NAMES, len(LAST_NAMES), people)
+    )
+    cur.execute("INSERT INTO bench_professional (personid, email) SELECT id, lower(firstname || '.' || lastname || id || '@example.com') FROM bench_person")
+
+def explain(cur, query: str, params: tuple) -> str:
+    cur.execute("EXPLAIN (ANALYZE, BUFFERS) " + query, params)
+    return "\n".join(row[0] for row in cur.fetchall())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--people", type=int, default=200_000)
+    parser.add_argument("--query", default="smit")
+    args = parser.parse_args()
+
+    conn = client.getConnection()
+    cur = conn.cursor()
+    try:
+        buildTables(cur, args.people)
+        cur.execute("ANALYZE bench_person")
+        cur.execute("ANALYZE bench_professional")
+
+        pattern = f"%{args.query}%"
+        print("=== Before: concatenation ILIKE, no usable index ===")
+        print(explain(cur, OLD_QUERY, (pattern, pattern, pattern)))
+
+        cur.execute("CREATE INDEX ON bench_person USING GIN (full_name_search gin_trgm_ops)")
+        cur.execute("CREATE INDEX ON bench_professional USING GIN (email gin_trgm_ops)")
+        cur.execute("ANALYZE bench_person")
+        cur.execute("ANALYZE bench_professional")
+
+        print("\n=== After: trigram GIN on full_name_search + email, similarity ordering ===")
+        print(explain(cur, NEW_QUERY, search.filterParams(args.query) + search.rankParams(args.query)))
+    finally:
+        conn.rollback()
+        conn.close()
+
+if __name__ == "__main__":
+    main()
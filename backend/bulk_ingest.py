@@ -0,0 +1,157 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from resume_ingest import ingest
+from deterministic_profile import build_profile_from_text, fill_name_async
+import storage
+import fingerprints
+
+# PDF/DOCX parsing is CPU-bound, so it runs in worker processes
+BULK_EXTRACT_WORKERS = int(os.getenv("BULK_EXTRACT_WORKERS", str(os.cpu_count() or 2)))
+# Threads building profiles and SimHashes from extracted text
+BULK_LLM_WORKERS = int(os.getenv("BULK_LLM_WORKERS", "8"))
+# Profiles saved per SQLite transaction
+BULK_WRITE_BATCH = int(os.getenv("BULK_WRITE_BATCH", "50"))
+# Below this many files a process pool costs more to start than it saves
+BULK_PROCESS_POOL_MIN_FILES = int(os.getenv("BULK_PROCESS_POOL_MIN_FILES", "4"))
+
+def source_type_for(filename: str) -> str:
+    ext = os.path.splitext(filename)[1].lower()
+    return "pdf" if ext == ".pdf" else ("docx" if ext == ".docx" else "pdf")
+
+def _summary(profile: dict, filename: str) -> dict:
+    return {
+        "profile_id": profile.get("meta", {}).get("profile_id",""),
+        "full_name": profile.get("contact", {}).get("full_name",""),
+        "email": profile.get("contact", {}).get("email",""),
+        "filename": filename
+    }
+
+def ingest_bulk(db_path: str, domain: str, files: list, progress=None) -> dict:
+    """
+    Parse, profile and save many resumes as a three-stage pipeline.
+
+    files is [(filename, bytes)]. Extraction runs in a process pool, build_profile_from_text
+    and the SimHash lookup in a bounded thread pool, and finished profiles are
+    written by this thread alone, BULK_WRITE_BATCH at a time through storage.upsert_profiles.
+    Stages overlap, so the first files are being saved while later ones are still parsing.
+
+    Files whose bytes were already ingested for this domain (or appear twice in the batch)
+    are reported under "duplicates" without being parsed; near-duplicates by text SimHash
+    are saved with meta.near_duplicates set so they can be reviewed for a merge.
+
+    progress(done, total, detail) is called once per file as it finishes (saved, duplicate or failed).
+    Returns the same shape the serial bulk upload did, in input order.
+    """
+    total = len(files)
+    created = {}
+    failed = {}
+    duplicates = {}
+    pending_writes = []
+    done = 0
+    index = fingerprints.get_index()
+    namespace = f"resume:{domain}"
+    hashes = [fingerprints.sha256_bytes(data) for _, data in files]
+
+    def finish(i: int, error: str = None):
+        nonlocal done
+        done += 1
+        if error is not None:
+            failed[i] = {"filename": files[i][0], "error": error}
+        if progress:
+            progress(done, total, {"filename": files[i][0], "status": "failed" if error else "saved"})
+
+    def flush():
+        if not pending_writes:
+            return
+        batch = list(pending_writes)
+        pending_writes.clear()
+        try:
+            storage.upsert_profiles(db_path, [p for _, (p, _, _) in batch])
+        except Exception as e:
+            # The batch is one transaction, so none of it was saved
+            for i, _ in batch:
+                finish(i, str(e))
+            return
+        for i, (profile, text_hash, text) in batch:
+            pid = profile["meta"]["profile_id"]
+            index.add(namespace, hashes[i], pid, text_hash)
+            fill_name_async(profile, text, save=lambda name, pid=pid: storage.update_profile_name(db_path, pid, name))
+            created[i] = _summary(profile, files[i][0])
+            finish(i)
+
+    def build(text: str) -> tuple:
+        profile = build_profile_from_text(text)
+        profile.setdefault("meta", {})["domain"] = domain
+        text_hash = fingerprints.simhash(text)
+        near = index.find_near(namespace, text_hash)
+        if near:
+            profile["meta"]["near_duplicates"] = near
+        return profile, text_hash, text
+
+    def skip_duplicate(i: int, profile_id: str, duplicate_of: str):
+        nonlocal done
+        done += 1
+        duplicates[i] = {"filename": files[i][0], "profile_id": profile_id, "duplicate_of": duplicate_of}
+        if progress:
+            progress(done, total, {"filename": files[i][0], "status": "duplicate"})
+
+    # Exact duplicates (already ingested, or repeated in this batch) skip parsing and AI entirely
+    todo = []
+    first_seen = {}
+    for i, sha in enumerate(hashes):
+        if sha in first_seen:
+            skip_duplicate(i, None, files[first_seen[sha]][0])
+            continue
+        first_seen[sha] = i
+        # Reserved up front so a concurrent upload of the same file can't insert it too
+        existing_id = index.claim(namespace, sha, lambda rid: storage.get_profile(db_path, rid) is not None)
+        if existing_id == fingerprints.PENDING:
+            finish(i, "This file is already being processed.")
+        elif existing_id:
+            skip_duplicate(i, existing_id, existing_id)
+        else:
+            todo.append(i)
+
+    use_processes = len(todo) >= BULK_PROCESS_POOL_MIN_FILES and BULK_EXTRACT_WORKERS > 1
+    extract_pool = (
+        # spawn, not fork: the server process has live threads and connection pools
+        ProcessPoolExecutor(max_workers=min(BULK_EXTRACT_WORKERS, len(todo)), mp_context=multiprocessing.get_context("spawn"))
+        if use_processes else ThreadPoolExecutor(max_workers=1)
+    )
+
+    try:
+        with extract_pool, ThreadPoolExecutor(max_workers=BULK_LLM_WORKERS) as llm_pool:
+            stage = {}
+            for i in todo:
+                fname, data = files[i]
+                # Submitting resume_ingest.ingest itself keeps the worker processes' imports small
+                stage[extract_pool.submit(ingest, source_type_for(fname), data)] = ("extract", i)
+
+            while stage:
+                completed, _ = wait(stage, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    kind, i = stage.pop(future)
+                    try:
+                        value = future.result()
+                    except Exception as e:
+                        finish(i, str(e))
+                        continue
+
+                    if kind == "extract":
+                        stage[llm_pool.submit(build, value)] = ("profile", i)
+                    else:
+                        pending_writes.append((i, value))
+                        if len(pending_writes) >= BULK_WRITE_BATCH:
+                            flush()
+            flush()
+    finally:
+        # Files that failed (or never finished) give their reservation back; saved ones were add()ed
+        for i in todo:
+            if i not in created:
+                index.release(namespace, hashes[i])
+
+    created_list = [created[i] for i in sorted(created)]
+    failed_list = [failed[i] for i in sorted(failed)]
+    duplicate_list = [duplicates[i] for i in sorted(duplicates)]
+    return {"created": created_list, "failed": failed_list, "duplicates": duplicate_list, "created_count": len(created_list), "failed_count": len(failed_list), "duplicate_count": len(duplicate_list), "added": len(created_list)}
@@ -1,53 +1,143 @@
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from profile_schema import empty_devready_profile
 from skill_lexicon import SKILL_GROUPS, SENIORITY_HINTS
-from openAI.candidateProcessing import processGeneral
+from skill_matcher import LEXICON_MATCHER, SkillMatcher
+
+# When the local heuristic can't find a name, ask the LLM in the background (0 disables)
+PROFILE_NAME_LLM_FALLBACK = os.getenv("PROFILE_NAME_LLM_FALLBACK", "1").lower() in ("1", "true", "yes")
 
 _EMAIL_RE = re.compile(r"[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}", re.IGNORECASE)
 _PHONE_RE = re.compile(r"(\+?\d[\d\s().-]{7,}\d)")
 _LINKEDIN_RE = re.compile(r"(https?://(www\.)?linkedin\.com/[^\s]+)", re.IGNORECASE)
+_WS_RE = re.compile(r"\s+")
+
+# Skills and seniority hints compiled into one matcher, so a single scan of the text finds both
+_SENIORITY_GROUP = "_seniority"
+_PROFILE_MATCHER = SkillMatcher({**SKILL_GROUPS, _SENIORITY_GROUP: SENIORITY_HINTS})
+
+# A name line: 2-4 words, letters plus name punctuation only, e.g. "Mary-Jane O'Neil", "JOHN A. SMITH"
+_NAME_LINE_RE = re.compile(r"^[A-Za-zÀ-ÖØ-öø-ÿ][A-Za-zÀ-ÖØ-öø-ÿ.'\-]*(?:\s+[A-Za-zÀ-ÖØ-öø-ÿ][A-Za-zÀ-ÖØ-öø-ÿ.'\-]*){1,3}$")
+# Nicknames in brackets or quotes, e.g. 'Ayaskanta Samal (Sam)', 'Alejandro "Alex" Rivera'
+_NICKNAME_RE = re.compile(r"\([^)]*\)|[\"“”][^\"“”]*[\"“”]")
+_NAME_LABEL_RE = re.compile(r"^(full\s+)?name\s*:\s*", re.IGNORECASE)
+_NAME_SEPARATOR_RE = re.compile(r"[|\t:]|\s[-–—]\s")
+_NOT_NAME_WORDS = {
+    "resume", "curriculum", "vitae", "cv", "profile", "summary", "objective", "contact", "experience",
+    "education", "skills", "developer", "engineer", "manager", "consultant", "designer", "analyst",
+    "senior", "junior", "lead", "architect", "professional", "page", "references", "address", "phone",
+    "email", "software", "technical", "application", "employment", "applicant", "id", "name",
+    "key", "strengths", "highlights", "competencies", "core", "career", "overview", "regards", "best",
+    "position", "job", "description", "information", "personal", "technologies", "development",
+}
+# Only the top of a resume is searched for the name
+_NAME_SEARCH_LINES = 6
+
+_nameFallbackExecutor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="profile-name")
 
 def _norm(s: str) -> str:
-    return re.sub(r"\s+", " ", (s or "").strip()).lower()
+    # str.split() collapses whitespace several times faster than a \s+ substitution
+    return " ".join((s or "").split()).lower()
 
 def extract_skills(text: str):
-    t = _norm(text)
-    found = {k:set() for k in SKILL_GROUPS.keys()}
-    for group, skills in SKILL_GROUPS.items():
-        for sk in skills:
-            if _norm(sk) in t:
-                found[group].add(sk)
-    return {k: sorted(v) for k,v in found.items()}
+    return LEXICON_MATCHER.extract(text)
+
+def _name_candidates(lines: list) -> list:
+    top = []
+    for line in lines[:_NAME_SEARCH_LINES]:
+        # "Name: ..." labels, then anything after a separator ("John Smith | Dallas", "JOHN SMITH: SAP LEAD")
+        line = _NAME_LABEL_RE.sub("", _NICKNAME_RE.sub(" ", line).strip())
+        line = _NAME_SEPARATOR_RE.split(line)[0]
+        top.append(_WS_RE.sub(" ", line).strip(" ,;:-"))
+
+    candidates = []
+    for i, line in enumerate(top):
+        candidates.append(line)
+        # First and last name laid out on separate lines
+        if i + 1 < len(top) and " " not in line and " " not in top[i + 1]:
+            candidates.append(line + " " + top[i + 1])
+    return candidates
+
+def guess_name(lines: list, email: str = "") -> str:
+    """
+    Candidate name from the first lines of a resume, or "" if the guess isn't safe.
+
+    A line counts only if it is 2-4 name-like words (no digits, @, or heading words) and one
+    of those words also appears in the email address, e.g. "Brian T. Trexler" with
+    btrexler71@... Anything less certain returns "" so fill_name_async asks the LLM instead.
+    """
+    local = re.sub(r"[^a-z]", "", email.split("@")[0].lower()) if email else ""
+    if not local:
+        return ""
+
+    for candidate in _name_candidates(lines):
+        if not _NAME_LINE_RE.match(candidate):
+            continue
+        words = candidate.split()
+        if any(w.lower().strip(".") in _NOT_NAME_WORDS for w in words):
+            continue
+        if not any(len(w) > 2 and w.lower().strip(".'-") in local for w in words):
+            continue
+        return " ".join(w.capitalize() if w.isupper() and len(w) > 2 else w for w in words)
+    return ""
+
+def fill_name_async(profile: dict, text: str, save=None):
+    """
+    If the profile has no name, look it up with the LLM on a background thread and call
+    save(name) with the answer. The thread never touches profile, which the caller keeps
+    using. Returns the future, or None if nothing was queued.
+    """
+    if profile["contact"].get("full_name") or not PROFILE_NAME_LLM_FALLBACK:
+        return None
+
+    def lookup():
+        from openAI.candidateProcessing import processGeneral
+        name = processGeneral(text, "full name")
+        if name and save:
+            save(name)
+        return name
+
+    return _nameFallbackExecutor.submit(lookup)
 
 def build_profile_from_text(text: str):
+    """
+    Deterministic profile from resume text: contact details, name, skills and bucket scores.
+
+    The text is normalized once and every extractor reads from that one pass; nothing here
+    touches the network. full_name is "" when no name can be found locally; see fill_name_async.
+    """
+    text = text or ""
     p = empty_devready_profile()
-    lines = [ln.strip() for ln in (text or "").splitlines() if ln.strip()]
+    lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
     p["debug"]["text_lines"] = len(lines)
-    p["debug"]["text_chars"] = len(text or "")
-
-    # Use AI to grab name
-    p["contact"]["full_name"] = processGeneral(text, "full name")
+    p["debug"]["text_chars"] = len(text)
 
-    m = _EMAIL_RE.search(text or "")
+    m = _EMAIL_RE.search(text)
     if m:
         p["contact"]["email"] = m.group(0)
 
-    pm = _PHONE_RE.search(text or "")
+    pm = _PHONE_RE.search(text)
     if pm:
         p["contact"]["phone"] = pm.group(0).strip()
 
-    lm = _LINKEDIN_RE.search(text or "")
+    lm = _LINKEDIN_RE.search(text)
     if lm:
         p["contact"]["linkedin"] = lm.group(1)
 
+    p["contact"]["full_name"] = guess_name(lines, p["contact"]["email"])
+
     p["summary"]["headline"] = (lines[1] if len(lines) > 1 else "").strip()[:120]
     p["summary"]["overview"] = "Structured DevReady profile created from resume text (deterministic extraction)."
 
-    skills = extract_skills(text or "")
-    p["skills"].update(skills)
-
-    tnorm = _norm(text)
-    senior_hits = sum(1 for h in SENIORITY_HINTS if h in tnorm)
+    skills = {g: set() for g in SKILL_GROUPS}
+    senior_hits = 0
+    for group, sk in _PROFILE_MATCHER.find(_norm(text), normalized=True):
+        if group == _SENIORITY_GROUP:
+            senior_hits += 1
+        else:
+            skills[group].add(sk)
+    p["skills"].update({k: sorted(v) for k, v in skills.items()})
 
     def score_bucket(bucket):
         c = len(p["skills"][bucket])
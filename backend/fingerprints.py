@@ -0,0 +1,230 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+FINGERPRINT_DB_PATH = os.getenv("FINGERPRINT_DB_PATH", "devready.db")
+# SimHash bits two documents may differ by and still count as near-duplicates.
+# The 64-bit hash is indexed as 8 x 8-bit bands, so any distance <= 7 shares a band.
+NEAR_DUPLICATE_MAX_DISTANCE = int(os.getenv("NEAR_DUPLICATE_MAX_DISTANCE", "6"))
+# A reservation left this long without a record_id (the worker died mid-upload) can be taken over
+FINGERPRINT_PENDING_TIMEOUT_SECONDS = float(os.getenv("FINGERPRINT_PENDING_TIMEOUT_SECONDS", "900"))
+
+# record_id of a sha256 reserved by an upload that hasn't saved its record yet
+PENDING = "pending"
+
+_BANDS = 8
+_BAND_BITS = 64 // _BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def sha256_text(text: str) -> str:
+    return sha256_bytes(" ".join(_TOKEN_RE.findall((text or "").lower())).encode("utf-8"))
+
+def simhash(text: str, shingle: int = 3) -> int:
+    """
+    64-bit SimHash over word shingles of the normalized text.
+
+    Re-exports of the same resume (different PDF producer, a changed phone number, an
+    extra line) land within a few bits of each other; unrelated resumes are ~32 bits apart.
+    """
+    tokens = _TOKEN_RE.findall((text or "").lower())
+    if len(tokens) < shingle:
+        grams = tokens
+    else:
+        grams = [" ".join(tokens[i:i + shingle]) for i in range(len(tokens) - shingle + 1)]
+    if not grams:
+        return 0
+
+    weights = [0] * 64
+    for g in grams:
+        h = int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+
+    value = 0
+    for bit in range(64):
+        if weights[bit] > 0:
+            value |= 1 << bit
+    return value
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+def _bands(value: int) -> list:
+    return [(value >> (i * _BAND_BITS)) & _BAND_MASK for i in range(_BANDS)]
+
+class FingerprintIndex:
+    """
+    SQLite index of everything already ingested, by raw-byte SHA-256 and text SimHash.
+
+    namespace keeps resumes, JDs and the local/Azure stores apart. record_id is whatever
+    the caller saved the document as (profile_id, personid, jd_id).
+    """
+
+    def __init__(self, db_path: str = FINGERPRINT_DB_PATH):
+        self.db_path = db_path
+        self._init_lock = threading.Lock()
+        self._ready = False
+
+    def _conn(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        if not self._ready:
+            with self._init_lock:
+                if not self._ready:
+                    self._init_db(conn)
+                    self._ready = True
+        return conn
+
+    def _init_db(self, conn: sqlite3.Connection):
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS ingest_fingerprints (
+            namespace TEXT NOT NULL,
+            sha256 TEXT NOT NULL,
+            simhash TEXT,
+            record_id TEXT NOT NULL,
+            created_at TEXT,
+            PRIMARY KEY (namespace, sha256)
+        )
+        """)
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS ingest_fingerprint_bands (
+            namespace TEXT NOT NULL,
+            band INTEGER NOT NULL,
+            value INTEGER NOT NULL,
+            sha256 TEXT NOT NULL
+        )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_fingerprint_bands ON ingest_fingerprint_bands(namespace, band, value)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_fingerprint_bands_sha ON ingest_fingerprint_bands(namespace, sha256)")
+        conn.commit()
+
+    def lookup_exact(self, namespace: str, sha256: str) -> str:
+        """record_id of an identical earlier upload, or None (also while it is only reserved)."""
+        conn = self._conn()
+        try:
+            row = conn.execute("SELECT record_id FROM ingest_fingerprints WHERE namespace=? AND sha256=?", (namespace, sha256)).fetchone()
+        finally:
+            conn.close()
+        return row["record_id"] if row and row["record_id"] != PENDING else None
+
+    def reserve(self, namespace: str, sha256: str) -> str:
+        """
+        Atomically claim sha256 before doing the work for it.
+
+        Returns None when the caller now holds it and must add() the record_id or release() it,
+        otherwise the record_id already stored (PENDING while another upload is still running).
+        """
+        now = datetime.utcnow()
+        conn = self._conn()
+        try:
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO ingest_fingerprints (namespace, sha256, simhash, record_id, created_at) VALUES (?,?,NULL,?,?)",
+                (namespace, sha256, PENDING, now.isoformat() + "Z")
+            )
+            if cur.rowcount == 1:
+                conn.commit()
+                return None
+
+            row = conn.execute("SELECT record_id, created_at FROM ingest_fingerprints WHERE namespace=? AND sha256=?", (namespace, sha256)).fetchone()
+            if row is None:
+                return PENDING
+            stale = (now - timedelta(seconds=FINGERPRINT_PENDING_TIMEOUT_SECONDS)).isoformat() + "Z"
+            if row["record_id"] == PENDING and row["created_at"] < stale:
+                # Only one caller wins the takeover: the UPDATE matches the old timestamp
+                cur = conn.execute(
+                    "UPDATE ingest_fingerprints SET created_at=? WHERE namespace=? AND sha256=? AND record_id=? AND created_at=?",
+                    (now.isoformat() + "Z", namespace, sha256, PENDING, row["created_at"])
+                )
+                conn.commit()
+                return None if cur.rowcount == 1 else PENDING
+            return row["record_id"]
+        finally:
+            conn.close()
+
+    def claim(self, namespace: str, sha256: str, exists) -> str:
+        """
+        reserve(), except that a stored record_id for which exists(record_id) is false (the
+        record was deleted since) is forgotten and the sha256 reserved again.
+        """
+        for _ in range(2):
+            record_id = self.reserve(namespace, sha256)
+            if record_id is None or record_id == PENDING or exists(record_id):
+                return record_id
+            self.forget(namespace, sha256)
+        return PENDING
+
+    def release(self, namespace: str, sha256: str):
+        """Drop a reservation whose upload failed; a saved record_id is left alone."""
+        conn = self._conn()
+        try:
+            conn.execute("DELETE FROM ingest_fingerprints WHERE namespace=? AND sha256=? AND record_id=?", (namespace, sha256, PENDING))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def find_near(self, namespace: str, value: int, max_distance: int = NEAR_DUPLICATE_MAX_DISTANCE, exclude_sha256: str = None) -> list:
+        """Earlier uploads whose SimHash is within max_distance bits, closest first."""
+        bands = _bands(value)
+        conn = self._conn()
+        try:
+            rows = conn.execute(f"""
+                SELECT DISTINCT f.sha256, f.simhash, f.record_id
+                FROM ingest_fingerprint_bands b
+                JOIN ingest_fingerprints f ON f.namespace = b.namespace AND f.sha256 = b.sha256
+                WHERE b.namespace = ? AND ({" OR ".join(["(b.band = ? AND b.value = ?)"] * _BANDS)})
+            """, (namespace, *[x for i, v in enumerate(bands) for x in (i, v)])).fetchall()
+        finally:
+            conn.close()
+
+        matches = []
+        for r in rows:
+            if r["sha256"] == exclude_sha256 or r["simhash"] is None:
+                continue
+            d = hamming(value, int(r["simhash"], 16))
+            if d <= max_distance:
+                matches.append({"record_id": r["record_id"], "distance": d})
+        return sorted(matches, key=lambda m: m["distance"])
+
+    def add(self, namespace: str, sha256: str, record_id: str, value: int = None):
+        conn = self._conn()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO ingest_fingerprints (namespace, sha256, simhash, record_id, created_at) VALUES (?,?,?,?,?)",
+                (namespace, sha256, format(value, "016x") if value is not None else None, str(record_id), datetime.utcnow().isoformat() + "Z")
+            )
+            conn.execute("DELETE FROM ingest_fingerprint_bands WHERE namespace=? AND sha256=?", (namespace, sha256))
+            if value is not None:
+                conn.executemany(
+                    "INSERT INTO ingest_fingerprint_bands (namespace, band, value, sha256) VALUES (?,?,?,?)",
+                    [(namespace, i, v, sha256) for i, v in enumerate(_bands(value))]
+                )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def forget(self, namespace: str, sha256: str):
+        conn = self._conn()
+        try:
+            conn.execute("DELETE FROM ingest_fingerprints WHERE namespace=? AND sha256=?", (namespace, sha256))
+            conn.execute("DELETE FROM ingest_fingerprint_bands WHERE namespace=? AND sha256=?", (namespace, sha256))
+            conn.commit()
+        finally:
+            conn.close()
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_index() -> FingerprintIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = FingerprintIndex()
+    return _index
@@ -1,37 +1,30 @@
 import re
+from functools import lru_cache
 from skill_lexicon import SKILL_GROUPS
+from skill_matcher import LEXICON_MATCHER
+from skill_catalog import SkillCatalog
 from azureUtils.storage import client
 
 def _norm(s: str) -> str:
     return re.sub(r"\s+", " ", (s or "").strip()).lower()
 
 def normalize_jd(text: str):
-    t = _norm(text)
-    skills = {k:set() for k in SKILL_GROUPS.keys()}
-    for group, items in SKILL_GROUPS.items():
-        for sk in items:
-            if _norm(sk) in t:
-                skills[group].add(sk)
-    return {k: sorted(v) for k,v in skills.items()}
+    return LEXICON_MATCHER.extract(text)
 
 def get_all_skills():
-    conn = client.getConnection()
-    cur = conn.cursor()
+    with client.connection() as conn:
+        cur = conn.cursor()
 
-    query = "SELECT title FROM skill"
-    cur.execute(query)
-    results = cur.fetchall()
-    conn.close()
+        query = "SELECT title FROM skill"
+        cur.execute(query)
+        results = cur.fetchall()
     return [row[0] for row in results]
 
+# Skill titles are cached in-process and refreshed on a TTL (SKILL_CATALOG_TTL_SECONDS)
+SKILL_CATALOG = SkillCatalog(get_all_skills)
+
 def normalize_all_skills(text: str):
-    foundSkills = []
-    t = _norm(text)
-    allSkills = get_all_skills()
-    for sk in allSkills:
-        if _norm(sk) in t:
-            foundSkills.append(sk)
-    return sorted(foundSkills)
+    return SKILL_CATALOG.find(text)
 
 def jaccard(a: set, b: set):
     if not a and not b:
@@ -87,4 +80,120 @@ def azureMatch(profile_skills: list, jd_skills: dict):
     return match(normalize_jd(','.join(profile_skills)),jd_skills)
 
 def azureJobMatch(profile_skills: list, jd_skills: list):
-    return match(normalize_jd(','.join(profile_skills)),normalize_jd(','.join(jd_skills)))
\ No newline at end of file
+    return match(normalize_jd(','.join(profile_skills)),normalize_jd(','.join(jd_skills)))
+
+# --- Batch scoring: many candidates against one JD ---
+# Skill sets are encoded as int bitsets over a per-group vocabulary, so coverage and
+# Jaccard for every candidate come from popcounts instead of building sets per profile.
+# matched/missing lists are only decoded for the candidates that are actually returned.
+
+class BatchMatchResult:
+    def __init__(self, matcher, encoded: list, totals: list, coverage: list, jaccard: list):
+        self._matcher = matcher
+        self._encoded = encoded
+        self.totals = totals        # [total_score (0-100)] per candidate, same as match()
+        self.coverage = coverage    # [{group: coverage}] per candidate (unrounded)
+        self.jaccard = jaccard      # [{group: jaccard}] per candidate (unrounded)
+
+    def __len__(self):
+        return len(self.totals)
+
+    def breakdown(self, i: int) -> dict:
+        """score_parts for candidate i, identical to the second value returned by match()."""
+        return self._matcher.breakdown(self._encoded[i], self.coverage[i], self.jaccard[i])
+
+class BatchMatcher:
+    def __init__(self, jd_skills: dict):
+        self._index = {g: {} for g in WEIGHTS}   # group -> {skill: bit position}
+        self._names = {g: [] for g in WEIGHTS}   # group -> [skill] by bit position
+        # Seed with the lexicon so bit positions are stable across JDs
+        for g in WEIGHTS:
+            for sk in SKILL_GROUPS.get(g, []):
+                self._bit(g, sk)
+        self.jd = self.encode(jd_skills)
+        self._jd_counts = {g: bits.bit_count() for g, bits in self.jd.items()}
+
+    def _bit(self, group: str, skill: str) -> int:
+        idx = self._index[group].get(skill)
+        if idx is None:
+            idx = len(self._names[group])
+            self._index[group][skill] = idx
+            self._names[group].append(skill)
+        return 1 << idx
+
+    def encode(self, skills: dict) -> dict:
+        encoded = {}
+        for g in WEIGHTS:
+            bits = 0
+            for sk in (skills or {}).get(g, []) or []:
+                bits |= self._bit(g, sk)
+            encoded[g] = bits
+        return encoded
+
+    def _decode(self, group: str, bits: int) -> list:
+        names = self._names[group]
+        out = []
+        while bits:
+            low = bits & -bits
+            out.append(names[low.bit_length() - 1])
+            bits ^= low
+        return sorted(out)
+
+    def score_encoded(self, encoded: dict):
+        total = 0.0
+        coverage = {}
+        jac = {}
+        for g, w in WEIGHTS.items():
+            ps = encoded[g]
+            js = self.jd[g]
+            inter = (ps & js).bit_count()
+            coverage[g] = (inter / max(1, self._jd_counts[g])) if js else 0.0
+            union = (ps | js).bit_count()
+            jac[g] = (inter / union) if union else 0.0
+            total += w * coverage[g]
+        return round(total * 100, 1), coverage, jac
+
+    def score_many(self, profiles: list) -> BatchMatchResult:
+        """Score a list of {group: [skills]} dicts in one pass."""
+        encoded = [self.encode(p) for p in profiles]
+        totals, coverage, jac = [], [], []
+        for enc in encoded:
+            t, c, j = self.score_encoded(enc)
+            totals.append(t)
+            coverage.append(c)
+            jac.append(j)
+        return BatchMatchResult(self, encoded, totals, coverage, jac)
+
+    def breakdown(self, encoded: dict, coverage: dict = None, jac: dict = None) -> dict:
+        if coverage is None or jac is None:
+            _, coverage, jac = self.score_encoded(encoded)
+        parts = {}
+        for g, w in WEIGHTS.items():
+            ps = encoded[g]
+            js = self.jd[g]
+            parts[g] = {
+                "weight": w,
+                "coverage": round(coverage[g], 3),
+                "jaccard": round(jac[g], 3),
+                "matched": self._decode(g, ps & js),
+                "missing": self._decode(g, js & ~ps)
+            }
+        return parts
+
+@lru_cache(maxsize=8192)
+def _title_skills(title: str) -> tuple:
+    # Skill titles repeat across candidates, so map each one to lexicon hits only once
+    return tuple(LEXICON_MATCHER.find(title))
+
+def normalize_skill_titles(titles: list) -> dict:
+    """Equivalent to normalize_jd(','.join(titles)) but memoized per title."""
+    found = {g: set() for g in LEXICON_MATCHER.groups}
+    for title in titles or []:
+        for group, sk in _title_skills(title or ""):
+            found[group].add(sk)
+    return {k: sorted(v) for k, v in found.items()}
+
+def azureMatchMany(profile_skill_lists: list, jd_skills: dict) -> BatchMatchResult:
+    """Batch version of azureMatch for many candidates' skill title lists."""
+    matcher = BatchMatcher(jd_skills)
+    return matcher.score_many([normalize_skill_titles(skills) for skills in profile_skill_lists])
@@ -0,0 +1,290 @@
+import json
+from contextlib import contextmanager
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+
+JOB_QUEUE_DB_PATH = os.getenv("JOB_QUEUE_DB_PATH", "job_queue.db")
+JOB_QUEUE_WORKERS = int(os.getenv("JOB_QUEUE_WORKERS", "4"))
+# Total attempts per job (first run included) before it is marked failed
+JOB_QUEUE_MAX_ATTEMPTS = int(os.getenv("JOB_QUEUE_MAX_ATTEMPTS", "3"))
+JOB_QUEUE_RETRY_BASE_SECONDS = float(os.getenv("JOB_QUEUE_RETRY_BASE_SECONDS", "5"))
+# Running jobs refresh heartbeat_at this often; one silent for JOB_QUEUE_STALE_SECONDS belonged
+# to a process that died and is queued again
+JOB_QUEUE_HEARTBEAT_SECONDS = float(os.getenv("JOB_QUEUE_HEARTBEAT_SECONDS", "30"))
+JOB_QUEUE_STALE_SECONDS = float(os.getenv("JOB_QUEUE_STALE_SECONDS", "300"))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+_HANDLERS = {}
+
+def register(kind: str, handler):
+    """
+    Register handler(payload: dict, files: list[(name, bytes)], progress) for a job kind.
+
+    The handler runs on a worker thread and returns a JSON-serialisable result.
+    progress(done, total, detail=None) records how far along it is for the status endpoint.
+    Raising marks the attempt failed; it is retried until JOB_QUEUE_MAX_ATTEMPTS.
+    """
+    _HANDLERS[kind] = handler
+
+class JobQueue:
+    """
+    Durable background job queue on a local SQLite file.
+
+    Jobs move queued -> running -> done | failed. Uploaded file bytes are stored next to
+    the job until it finishes, so queued work survives a restart. Several processes can
+    share one file: claims are a conditional UPDATE, and a "running" job whose heartbeat has
+    gone stale (its process died) is put back in the queue.
+    """
+
+    def __init__(self, db_path: str = JOB_QUEUE_DB_PATH, workers: int = JOB_QUEUE_WORKERS,
+                 max_attempts: int = JOB_QUEUE_MAX_ATTEMPTS, retry_base_seconds: float = JOB_QUEUE_RETRY_BASE_SECONDS):
+        self.db_path = db_path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._threads = []
+        self._stopping = False
+        self._init_db()
+
+    @contextmanager
+    def _conn(self):
+        # One short transaction per call; committed on success, rolled back on error
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        with self._conn() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    idempotency_key TEXT UNIQUE,
+                    payload TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    progress TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    run_after REAL NOT NULL,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    heartbeat_at REAL,
+                    finished_at REAL
+                )
+            """)
+            if "heartbeat_at" not in {r["name"] for r in conn.execute("PRAGMA table_info(jobs)")}:
+                conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at REAL")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs(state, run_after, created_at)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_files (
+                    job_id TEXT NOT NULL,
+                    idx INTEGER NOT NULL,
+                    name TEXT,
+                    data BLOB NOT NULL,
+                    PRIMARY KEY (job_id, idx)
+                )
+            """)
+
+    def submit(self, kind: str, payload: dict, files: list = None, idempotency_key: str = None) -> dict:
+        """
+        Queue a job and return its status dict straight away.
+
+        Submitting again with the same idempotency_key returns the existing job instead of
+        running the work twice; a job that already failed is re-queued with fresh input.
+        Reusing a key for a different kind of job raises ValueError.
+        """
+        if kind not in _HANDLERS:
+            raise ValueError(f"No handler registered for job kind '{kind}'")
+
+        now = time.time()
+        with self._conn() as conn:
+            if idempotency_key:
+                row = conn.execute("SELECT job_id, kind, state FROM jobs WHERE idempotency_key = ?", (idempotency_key,)).fetchone()
+                if row is not None and row["kind"] != kind:
+                    raise ValueError(f"idempotency_key is already used by a '{row['kind']}' job")
+                if row is not None and row["state"] != FAILED:
+                    return self.get(row["job_id"])
+                if row is not None:
+                    job_id = row["job_id"]
+                    conn.execute("DELETE FROM job_files WHERE job_id = ?", (job_id,))
+                    conn.execute(
+                        "UPDATE jobs SET state=?, payload=?, result=NULL, error=NULL, progress=NULL, attempts=0, run_after=?, started_at=NULL, finished_at=NULL WHERE job_id=?",
+                        (QUEUED, json.dumps(payload), now, job_id)
+                    )
+                    self._store_files(conn, job_id, files)
+                    return self._submitted(job_id)
+
+            job_id = uuid.uuid4().hex
+            try:
+                conn.execute(
+                    "INSERT INTO jobs (job_id, kind, state, idempotency_key, payload, run_after, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (job_id, kind, QUEUED, idempotency_key or None, json.dumps(payload), now, now)
+                )
+            except sqlite3.IntegrityError:
+                # Another request with the same idempotency_key inserted first
+                job_id = None
+            else:
+                self._store_files(conn, job_id, files)
+        if job_id is None:
+            return self.submit(kind, payload, files, idempotency_key)
+        return self._submitted(job_id)
+
+    def _store_files(self, conn: sqlite3.Connection, job_id: str, files: list):
+        if files:
+            conn.executemany(
+                "INSERT INTO job_files (job_id, idx, name, data) VALUES (?, ?, ?, ?)",
+                [(job_id, i, name, sqlite3.Binary(data)) for i, (name, data) in enumerate(files)]
+            )
+
+    def _submitted(self, job_id: str) -> dict:
+        self.start()
+        with self._wake:
+            self._wake.notify()
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> dict:
+        with self._conn() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row["job_id"],
+            "kind": row["kind"],
+            "state": row["state"],
+            "attempts": row["attempts"],
+            "progress": json.loads(row["progress"]) if row["progress"] else None,
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+        }
+
+    def stats(self) -> dict:
+        with self._conn() as conn:
+            counts = {r["state"]: r["n"] for r in conn.execute("SELECT state, COUNT(*) AS n FROM jobs GROUP BY state")}
+        return {
+            "states": {s: counts.get(s, 0) for s in (QUEUED, RUNNING, DONE, FAILED)},
+            "workers": len([t for t in self._threads if t.is_alive()]),
+            "max_attempts": self.max_attempts,
+        }
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            self._stopping = False
+            for i in range(self.workers):
+                t = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def stop(self, timeout: float = 5.0):
+        with self._wake:
+            self._stopping = True
+            self._wake.notify_all()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def _claim(self):
+        # The state=? guard on the UPDATE makes the claim atomic across processes sharing the file;
+        # if another process took the job between the SELECT and the UPDATE, try the next one
+        now = time.time()
+        with self._conn() as conn:
+            # Jobs whose process died mid-run
+            conn.execute(
+                "UPDATE jobs SET state=? WHERE state=? AND COALESCE(heartbeat_at, started_at) < ?",
+                (QUEUED, RUNNING, now - JOB_QUEUE_STALE_SECONDS)
+            )
+        while True:
+            with self._conn() as conn:
+                row = conn.execute(
+                    "SELECT job_id, kind, payload, attempts FROM jobs WHERE state=? AND run_after<=? ORDER BY created_at LIMIT 1",
+                    (QUEUED, now)
+                ).fetchone()
+                if row is None:
+                    nxt = conn.execute("SELECT MIN(run_after) FROM jobs WHERE state=?", (QUEUED,)).fetchone()[0]
+                    return None, (nxt - now if nxt is not None else None)
+                claimed = conn.execute(
+                    "UPDATE jobs SET state=?, attempts=attempts+1, started_at=?, heartbeat_at=?, error=NULL WHERE job_id=? AND state=?",
+                    (RUNNING, now, now, row["job_id"], QUEUED)
+                ).rowcount
+            if claimed:
+                return row, None
+
+    def _work(self):
+        while True:
+            with self._wake:
+                if self._stopping:
+                    return
+                row, wait = self._claim()
+                if row is None:
+                    self._wake.wait(timeout=min(wait, 30.0) if wait is not None else 30.0)
+                    continue
+            self._run(row)
+
+    def _run(self, row):
+        job_id = row["job_id"]
+        attempt = row["attempts"] + 1
+        with self._conn() as conn:
+            files = [(r["name"], bytes(r["data"])) for r in conn.execute("SELECT name, data FROM job_files WHERE job_id=? ORDER BY idx", (job_id,))]
+
+        def progress(done: int, total: int, detail=None):
+            with self._conn() as conn:
+                conn.execute("UPDATE jobs SET progress=? WHERE job_id=?", (json.dumps({"done": done, "total": total, "detail": detail}), job_id))
+
+        finished = threading.Event()
+        def heartbeat():
+            while not finished.wait(JOB_QUEUE_HEARTBEAT_SECONDS):
+                try:
+                    with self._conn() as conn:
+                        conn.execute("UPDATE jobs SET heartbeat_at=? WHERE job_id=? AND state=?", (time.time(), job_id, RUNNING))
+                except sqlite3.Error as e:
+                    print(f"Job {job_id} heartbeat failed: {e}")
+        threading.Thread(target=heartbeat, name=f"job-heartbeat-{job_id[:8]}", daemon=True).start()
+
+        try:
+            result = _HANDLERS[row["kind"]](json.loads(row["payload"]), files, progress)
+        except Exception as e:
+            finished.set()
+            print(f"Job {job_id} ({row['kind']}) attempt {attempt} failed: {e}")
+            error = f"{e}\n{traceback.format_exc()}"
+            with self._conn() as conn:
+                if attempt < self.max_attempts:
+                    delay = self.retry_base_seconds * (2 ** (attempt - 1))
+                    conn.execute("UPDATE jobs SET state=?, error=?, run_after=? WHERE job_id=?", (QUEUED, error, time.time() + delay, job_id))
+                else:
+                    conn.execute("UPDATE jobs SET state=?, error=?, finished_at=? WHERE job_id=?", (FAILED, error, time.time(), job_id))
+                    conn.execute("DELETE FROM job_files WHERE job_id=?", (job_id,))
+            return
+        finished.set()
+
+        with self._conn() as conn:
+            conn.execute("UPDATE jobs SET state=?, result=?, finished_at=? WHERE job_id=?", (DONE, json.dumps(result, default=str), time.time(), job_id))
+            # The input bytes are only needed while the job can still run
+            conn.execute("DELETE FROM job_files WHERE job_id=?", (job_id,))
+
+_queue = None
+_queue_lock = threading.Lock()
+
+def get_queue() -> JobQueue:
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = JobQueue()
+    return _queue
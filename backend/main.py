@@ -23,7 +23,8 @@ from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
-import os, shutil, traceback
+from starlette.concurrency import run_in_threadpool
+import os, traceback
 from typing import Optional
 from datetime import datetime
 
@@ -173,10 +174,15 @@ def build_interview_questions(profile: dict, jd: dict, breakdown: dict) -> list[
 
 
 from resume_ingest import ingest
-from deterministic_profile import build_profile_from_text
-from jd_match import normalize_jd, match, azureMatch
+from resumeProcessing.processing import archiveUpload, sourceTypeFor, ingest as ingest_upload
+from deterministic_profile import build_profile_from_text, fill_name_async
+from jd_match import normalize_jd, match, azureMatchMany, BatchMatcher, normalize_skill_titles, SKILL_CATALOG
+from ranker import select_top_k, CANDIDATE_POOL_SIZE
 from profile_schema import new_id
 import storage
+import job_queue
+import bulk_ingest
+import fingerprints
 from renderers import profile_to_html, profile_to_docx, jd_to_html, jd_to_docx, match_report_to_html, match_report_to_docx
 
 VERSION = "v2.8.6"
@@ -232,6 +238,11 @@ def dbinfo():
         return JSONResponse(status_code=500, content={"error": str(e), "trace": traceback.format_exc()})
 
 
+@app.get("/api/debug/skillCatalog")
+def skill_catalog_stats():
+    return SKILL_CATALOG.stats()
+
+
 @app.get("/api/health")
 def health():
     return {"status": "ok", "version": VERSION}
@@ -241,33 +252,73 @@ def extract_text_from_upload(file: UploadFile) -> str:
     name = (file.filename or "").lower()
     data = file.file.read()
     # Reset pointer not needed; we operate on bytes.
-    if name.endswith(".pdf"):
-        import io, pdfplumber
-        text_parts = []
-        with pdfplumber.open(io.BytesIO(data)) as pdf:
-            for page in pdf.pages:
-                t = page.extract_text() or ""
-                if t.strip():
-                    text_parts.append(t)
-        return "\n\n".join(text_parts).strip()
-    elif name.endswith(".docx"):
-        import io
-        from docx import Document
-        doc = Document(io.BytesIO(data))
-        return "\n".join([p.text for p in doc.paragraphs if p.text]).strip()
-    elif name.endswith(".txt"):
-        try:
-            return data.decode("utf-8", errors="ignore").strip()
-        except Exception:
-            return data.decode(errors="ignore").strip()
-    elif name.endswith(".doc"):
+    st = sourceTypeFor(name, default="txt")
+    if st == "doc":
         return ""
-    else:
-        # Try best-effort utf-8
-        try:
-            return data.decode("utf-8", errors="ignore").strip()
-        except Exception:
-            return ""
+    return ingest_upload(st, data).strip()
+
+
+def _resume_source_type(source_type: Optional[str], file_type: Optional[str]) -> str:
+    st = (source_type or "").strip().lower()
+    if not st:
+        ft = (file_type or "").strip().lower()
+        st = "pdf" if "pdf" in ft else ("docx" if "docx" in ft else "pdf")
+    return st
+
+
+def _process_resume(data: bytes, filename: str, source_type: str, domain: str) -> dict:
+    # An identical file already ingested is returned as-is, before any parsing or AI work
+    namespace = f"resume:{domain}"
+    sha = fingerprints.sha256_bytes(data)
+    index = fingerprints.get_index()
+    # Reserved before parsing, so two concurrent uploads of the same file can't both insert
+    existing_id = index.claim(namespace, sha, lambda rid: storage.get_profile(DB_PATH, rid) is not None)
+    if existing_id == fingerprints.PENDING:
+        raise HTTPException(status_code=409, detail="This file is already being processed.")
+    if existing_id:
+        return {"profile_id": existing_id, "profile": storage.get_profile(DB_PATH, existing_id), "duplicate_of": existing_id}
+
+    try:
+        # Parsed straight from memory; the archived copy is written in the background
+        archiveUpload(data, filename, UPLOAD_DIR)
+
+        raw = ingest(source_type, data)
+        profile = build_profile_from_text(raw)
+        profile.setdefault("meta", {})["domain"] = domain
+
+        # Same person, slightly different file: saved, but flagged for a merge review
+        text_hash = fingerprints.simhash(raw)
+        near = index.find_near(namespace, text_hash)
+        if near:
+            profile["meta"]["near_duplicates"] = near
+
+        storage.upsert_profile(DB_PATH, profile)
+        pid = profile.get("meta", {}).get("profile_id", "")
+    except Exception:
+        index.release(namespace, sha)
+        raise
+
+    # The profile is saved at this point; failing here would make a retried job save it again
+    try:
+        index.add(namespace, sha, pid, text_hash)
+    except Exception as e:
+        print(f"Could not record fingerprint for profile {pid}: {e}")
+
+    # No name found locally: the LLM lookup runs after the response and saves just the name
+    fill_name_async(profile, raw, save=lambda name: storage.update_profile_name(DB_PATH, pid, name))
+
+    return {"profile_id": pid, "profile": profile, "near_duplicates": near}
+
+
+def _resume_upload_job(payload: dict, files: list, progress):
+    name, data = files[0]
+    progress(0, 1, name)
+    result = _process_resume(data, name, payload["source_type"], payload["domain"])
+    progress(1, 1, name)
+    return result
+
+
+job_queue.register("resume_upload", _resume_upload_job)
 
 
 @app.post("/api/resume/upload")
@@ -276,27 +327,23 @@ async def upload_resume(
     source_type: Optional[str] = Form(None),   # preferred: "pdf" / "docx"
     file_type: Optional[str] = Form(None),     # legacy: "PDF" / "DOCX"
     domain: str = Form("technology"),
+    background: bool = Form(False),            # queue the work and return a job id to poll
+    idempotency_key: Optional[str] = Form(None),
 ):
     try:
         if not file.filename:
             raise HTTPException(status_code=400, detail="No file name received.")
-        path = os.path.join(UPLOAD_DIR, os.path.basename(file.filename))
-        with open(path, "wb") as f:
-            shutil.copyfileobj(file.file, f)
-
-        st = (source_type or "").strip().lower()
-        if not st:
-            ft = (file_type or "").strip().lower()
-            st = "pdf" if "pdf" in ft else ("docx" if "docx" in ft else "pdf")
+        data = await file.read()
+        st = _resume_source_type(source_type, file_type)
 
-        raw = ingest(st, path)
-        profile = build_profile_from_text(raw)
-        profile.setdefault("meta", {})["domain"] = domain
+        if background:
+            job = job_queue.get_queue().submit(
+                "resume_upload", {"source_type": st, "domain": domain},
+                files=[(os.path.basename(file.filename), data)], idempotency_key=idempotency_key
+            )
+            return JSONResponse(status_code=202, content=job)
 
-        storage.upsert_profile(DB_PATH, profile)
-        pid = profile.get("meta", {}).get("profile_id", "")
-
-        return JSONResponse({"profile_id": pid, "profile": profile})
+        return JSONResponse(await run_in_threadpool(_process_resume, data, file.filename, st, domain))
     except HTTPException:
         raise
     except Exception as e:
@@ -340,45 +387,42 @@ def get_profile_docx(profile_id: str):
     return FileResponse(out, media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document", filename=filename)
 
 
+def _bulk_upload_job(payload: dict, files: list, progress):
+    return bulk_ingest.ingest_bulk(DB_PATH, payload["domain"], files, progress)
+
+
+job_queue.register("resume_bulk_upload", _bulk_upload_job)
+
+
 @app.post("/api/resume/bulk_upload")
-async def bulk_upload_resumes(domain: str = Form("technology"), files: list[UploadFile] = File(...)):
+async def bulk_upload_resumes(domain: str = Form("technology"), files: list[UploadFile] = File(...), background: bool = Form(False), idempotency_key: Optional[str] = Form(None)):
     """Bulk upload multiple resumes (PDF/DOCX). Each file is parsed, normalized, and saved as a DevReady profile."""
     try:
         if not files:
             raise HTTPException(status_code=400, detail="No files received.")
-        created = []
-        failed = []
-        for f in files:
-            if not f.filename:
-                continue
-            fname = os.path.basename(f.filename)
-            ext = os.path.splitext(fname)[1].lower()
-            source_type = "pdf" if ext == ".pdf" else ("docx" if ext == ".docx" else "pdf")
-            path = os.path.join(UPLOAD_DIR, fname)
-            with open(path, "wb") as out:
-                shutil.copyfileobj(f.file, out)
-
-            try:
-                raw = ingest(source_type, path)
-                profile = build_profile_from_text(raw)
-                # enforce domain
-                profile.setdefault("meta", {})["domain"] = domain
-                storage.upsert_profile(DB_PATH, profile)
-                created.append({
-                    "profile_id": profile.get("meta", {}).get("profile_id",""),
-                    "full_name": profile.get("contact", {}).get("full_name",""),
-                    "email": profile.get("contact", {}).get("email",""),
-                    "filename": fname
-                })
-            except Exception as e:
-                failed.append({"filename": fname, "error": str(e)})
-        return {"created": created, "failed": failed, "created_count": len(created), "failed_count": len(failed), "added": len(created)}
+        uploads = [(os.path.basename(f.filename), await f.read()) for f in files if f.filename]
+        for fname, data in uploads:
+            archiveUpload(data, fname, UPLOAD_DIR)
+
+        if background:
+            job = job_queue.get_queue().submit("resume_bulk_upload", {"domain": domain}, files=uploads, idempotency_key=idempotency_key)
+            return JSONResponse(status_code=202, content=job)
+
+        return await run_in_threadpool(bulk_ingest.ingest_bulk, DB_PATH, domain, uploads)
     except HTTPException:
         raise
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e), "trace": traceback.format_exc()})
 
 
+def _claim_jd(namespace: str, sha: str) -> Optional[str]:
+    # None when this request now owns the sha, else the jd_id of the identical JD already saved
+    existing_id = fingerprints.get_index().claim(namespace, sha, lambda rid: storage.get_jd(DB_PATH, rid) is not None)
+    if existing_id == fingerprints.PENDING:
+        raise HTTPException(status_code=409, detail="This job description is already being processed.")
+    return existing_id
+
+
 @app.post("/api/jd/upload")
 def jd_upload(
     file: UploadFile = File(...),
@@ -387,17 +431,30 @@ def jd_upload(
     domain: str = Form("technology"),
 ):
     try:
-        jd_text = extract_text_from_upload(file)
-        if (file.filename or "").lower().endswith(".doc") and not jd_text.strip():
-            raise HTTPException(status_code=400, detail="Legacy .doc is not supported. Please upload .docx or .pdf.")
-        if not jd_text.strip():
-            raise HTTPException(status_code=400, detail="Could not extract any text from the uploaded JD file.")
-
-        jd_id = new_id("JDD")  # stable + matches your codebase
-        created_at = datetime.utcnow().isoformat() + "Z"
-        skills = normalize_jd(jd_text)
+        data = file.file.read()
+        namespace = f"jd:{domain}"
+        sha = fingerprints.sha256_bytes(data)
+        existing_id = _claim_jd(namespace, sha)
+        if existing_id:
+            return {**storage.get_jd(DB_PATH, existing_id), "duplicate_of": existing_id}
+        file.file.seek(0)
 
-        storage.upsert_jd(DB_PATH, jd_id, company, title, domain, created_at, jd_text, skills)
+        try:
+            jd_text = extract_text_from_upload(file)
+            if (file.filename or "").lower().endswith(".doc") and not jd_text.strip():
+                raise HTTPException(status_code=400, detail="Legacy .doc is not supported. Please upload .docx or .pdf.")
+            if not jd_text.strip():
+                raise HTTPException(status_code=400, detail="Could not extract any text from the uploaded JD file.")
+
+            jd_id = new_id("JDD")  # stable + matches your codebase
+            created_at = datetime.utcnow().isoformat() + "Z"
+            skills = normalize_jd(jd_text)
+
+            storage.upsert_jd(DB_PATH, jd_id, company, title, domain, created_at, jd_text, skills)
+            fingerprints.get_index().add(namespace, sha, jd_id, fingerprints.simhash(jd_text))
+        except Exception:
+            fingerprints.get_index().release(namespace, sha)
+            raise
         return {"jd_id": jd_id, "company": company, "title": title, "domain": domain, "created_at": created_at, "jd_text": jd_text, "jd_skills": skills}
     except HTTPException:
         raise
@@ -408,11 +465,24 @@ def jd_upload(
 @app.post("/api/jd/normalize")
 async def jd_normalize(company: str = Form(...), title: str = Form(...), jd_text: str = Form(...), domain: str = Form("technology")):
     try:
-        jd_id = new_id("JDD")
-        skills = normalize_jd(jd_text)
-        created_at = datetime.utcnow().isoformat() + "Z"
-        storage.upsert_jd(DB_PATH, jd_id, company, title, domain, created_at, jd_text, skills)
+        namespace = f"jd:{domain}"
+        sha = fingerprints.sha256_text(jd_text)
+        existing_id = _claim_jd(namespace, sha)
+        if existing_id:
+            return {**storage.get_jd(DB_PATH, existing_id), "duplicate_of": existing_id}
+
+        try:
+            jd_id = new_id("JDD")
+            skills = normalize_jd(jd_text)
+            created_at = datetime.utcnow().isoformat() + "Z"
+            storage.upsert_jd(DB_PATH, jd_id, company, title, domain, created_at, jd_text, skills)
+            fingerprints.get_index().add(namespace, sha, jd_id, fingerprints.simhash(jd_text))
+        except Exception:
+            fingerprints.get_index().release(namespace, sha)
+            raise
         return {"jd_id": jd_id, "company": company, "title": title, "domain": domain, "created_at": created_at, "jd_skills": skills, "jd_text": jd_text}
+    except HTTPException:
+        raise
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e), "trace": traceback.format_exc()})
 
@@ -449,14 +519,29 @@ def profile_page_count(domain: str = Form(default="technology"), search_string:
         return storage.search_profiles_page_count(DB_PATH, domain=None, search_string=search_string, pageLimit=pageLimit)
     return storage.search_profiles_page_count(DB_PATH, domain=domain, search_string=search_string, pageLimit=pageLimit)
 
+@app.post("/api/profile/searchPage")
+def profile_search_page(domain: str = Form(default="technology"), search_string: str = Form(default=""), currentPage: int = Form(default=1), pageLimit: int = Form(default=10)):
+    # pageSearch + pageCount in one call: {"results", "total", "pages", "currentPage"}
+    if domain in ("all","*","",None):
+        domain = None
+    return storage.search_profiles_with_total(DB_PATH, domain=domain, search_string=search_string, currentPage=max(currentPage - 1, 0), pageLimit=pageLimit)
+
 @app.post("/api/profile/pageSearch")
-def profile_page_search(domain: str = Form(default="technology"), search_string: str = Form(default=""), currentPage: int = Form(default=0), pageLimit: int = Form(default=10)):
+def profile_page_search(domain: str = Form(default="technology"), search_string: str = Form(default=""), currentPage: int = Form(default=0), pageLimit: int = Form(default=10), cursor: Optional[str] = Form(None), keyset: bool = Form(False)):
     print(f"Searching profiles for domain='{domain}' with search_string='{search_string}' on page {currentPage} with pageLimit {pageLimit}")
 
+    if domain in ("all","*","",None):
+        domain = None
+
+    # Keyset mode (keyset=true, or any cursor) returns {"results", "next_cursor"}
+    if keyset or cursor:
+        try:
+            return storage.search_profiles_page(DB_PATH, domain=domain, search_string=search_string, pageLimit=pageLimit, cursor=cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
     currentPage = currentPage - 1  # adjust for 0-based indexing in backend
 
-    if domain in ("all","*","",None):
-        return storage.search_profiles_full(DB_PATH, domain=None, search_string=search_string, currentPage=currentPage, pageLimit=pageLimit)
     return storage.search_profiles_full(DB_PATH, domain=domain, search_string=search_string, currentPage=currentPage, pageLimit=pageLimit)
 
 @app.get("/api/profile/{profile_id}")
@@ -565,36 +650,34 @@ def run_match(domain: str = Form("technology"), jd_id: str = Form(None), top_k:
         print(f'Error during external people search: {e}')
 
     #profiles = storage.list_profiles(DB_PATH, domain=domain, limit=top_k, skills_filter=peopleDataSkills)
-    profiles = candidates.searchCandidatesBySkills(','.join(peopleDataSkills), top_k)
+    profiles = candidates.iterCandidatesBySkills(','.join(peopleDataSkills), max(top_k, CANDIDATE_POOL_SIZE))
+
+    # Stream the candidate pool through a bounded heap; breakdowns are only built for the top_k kept
+    matcher = BatchMatcher(jd_skills)
+
+    def scored_profiles():
+        for row in profiles:
+            encoded = matcher.encode(normalize_skill_titles(row['skillMatches']))
+            total, coverage, jac = matcher.score_encoded(encoded)
+            yield total, row, encoded, coverage, jac
 
     ranked = []
-    for row in profiles:
-        #p = storage.get_profile(DB_PATH, row["profile_id"])
-        #score, parts = match((p or {}).get("skills", {}), jd_skills)
-        score, parts = azureMatch(row['skillMatches'],jd_skills)
-        
-        '''ranked.append({
-            "profile_id": row["profile_id"],
-            "name": row.get("full_name",""),
-            "email": row.get("email",""),
-            "score": score,
-            "top_matches": top_matches_from_parts(parts),
-            "breakdown": parts
-        })'''
+    for total, row, encoded, coverage, jac in select_top_k(scored_profiles(), top_k, key=lambda x: x[0]):
+        parts = matcher.breakdown(encoded, coverage, jac)
         ranked.append({
             "profile_id": row["id"],
             "name": row["firstName"] + ' ' + row["lastName"],
             "email": row["email"],
-            "score": score,
+            "score": total,
             "top_matches": top_matches_from_parts(parts),
             "breakdown": parts
         })
 
-    ranked.sort(key=lambda x: x["score"], reverse=True)
+    externalBatch = azureMatchMany([row['skills'] for row in returnedExternalPeople], jd_skills)
 
     rankedExternal = []
-    for row in returnedExternalPeople:
-        score, parts = azureMatch(row['skills'],jd_skills)
+    for i, row in enumerate(returnedExternalPeople):
+        parts = externalBatch.breakdown(i)
         inferredSalary = None
         if "inferred_salary" in row:
             inferredSalary = row["inferred_salary"]
@@ -606,13 +689,13 @@ def run_match(domain: str = Form("technology"), jd_id: str = Form(None), top_k:
             "recommended_personal_email": row["recommended_personal_email"],
             "linkedin_url": row["linkedin_url"],
             "inferred_salary": inferredSalary,
-            "score": score,
+            "score": externalBatch.totals[i],
             "top_matches": top_matches_from_parts(parts),
             "breakdown": parts
         })
 
     rankedExternal.sort(key=lambda x: x["score"], reverse=True)
-    return {"jd": {"jd_id": jd["jd_id"], "company": jd.get("company",""), "title": jd.get("title",""), "created_at": jd.get("created_at","")}, "results": ranked[:top_k], "externalMatches": rankedExternal, "skillList": peopleDataSkills}
+    return {"jd": {"jd_id": jd["jd_id"], "company": jd.get("company",""), "title": jd.get("title",""), "created_at": jd.get("created_at","")}, "results": ranked, "externalMatches": rankedExternal, "skillList": peopleDataSkills}
 
 
 @app.post("/api/match/scorecard")
@@ -827,6 +910,7 @@ def people_labs_search(
     return {"status": "success", "returnMessage": "Successfully searched PeopleDataLabs!", "results": outcome['data'] }
 
 from azureUtils.routes import azureEndpoints, aiChatEndpoints, azureJobEndpoints
+from azureUtils.storage import client as azureClient
 from openAI.routes import aiEndpoints
 
 app.include_router(azureEndpoints.router)
@@ -834,6 +918,35 @@ app.include_router(aiChatEndpoints.router)
 app.include_router(azureJobEndpoints.router)
 app.include_router(aiEndpoints.router)
 
+@app.get("/api/debug/dbPool")
+def db_pool_stats():
+    return azureClient.poolStats()
+
+@app.on_event("shutdown")
+async def close_db_pools():
+    azureClient.closePools()
+    await azureClient.closeAsyncPool()
+
+@app.on_event("startup")
+def start_job_workers():
+    # Picks up jobs queued (or interrupted) before the last restart
+    job_queue.get_queue().start()
+
+@app.on_event("shutdown")
+def stop_job_workers():
+    job_queue.get_queue().stop()
+
+@app.get("/api/jobs")
+def jobs_stats():
+    return job_queue.get_queue().stats()
+
+@app.get("/api/jobs/{job_id}")
+def job_status(job_id: str):
+    job = job_queue.get_queue().get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 @app.get("/", response_class=HTMLResponse)
 def root():
     return HTMLResponse('<meta http-equiv="refresh" content="0; url=/ui/index.html">')
@@ -1,4 +1,4 @@
-from openAI.client import getOpenAPIClient
+from openAI.client import chatCompletion
 from azureUtils.storage.chatLogs import getQuestions, saveChat, getQuestion, upsertSurveyAnswer, getPersonId, getSurveyId
 import re
 
@@ -10,20 +10,16 @@ def askQuestions(transcript: list, candidateName: str, chatUrl: str):
                           "content":f'''You are an AI recruitment assistant. You will be chating with {candidateName}. MAKE NO HIRING PROMISES.
     It is your job to talk to them about the following statements in a casual yet professional manner. Focus on one statement at a time. Bring them up organically.\n{candidateQuestions}'''}]
 
-    client = getOpenAPIClient()
-
     fullTranscript = systemInstructions + transcript
 
     try:
-        response = client.chat.completions.create(
+        response = chatCompletion(
             model="gpt-3.5-turbo",  # Specify the model
             messages=fullTranscript,
             max_tokens=100, # Limit the response length to manage costs
             temperature=0.7 # Control the randomness of the response
         )
 
-        client.close()
-
         transcript.append({"role":"assistant", "content":response.choices[0].message.content.strip()})
         saveChat(chatUrl,candidateName,transcript)
 
@@ -33,15 +29,13 @@ def askQuestions(transcript: list, candidateName: str, chatUrl: str):
     except Exception as e:
         # Handle potential API errors (e.g., authentication issues, rate limits)
         print(f"An API error occurred when calling ChatGPT: {e}")
-        client.close()
         return {}
     
 # simple method to use the AI in some way as part of askQuestion
 def getNumber(text: str):
-    client = getOpenAPIClient()
 
     try:
-        response = client.chat.completions.create(
+        response = chatCompletion(
             model="gpt-3.5-turbo",  # Specify the model
             messages=[
                 {"role": "system", "content": "You are a helpful assistant."},
@@ -51,15 +45,12 @@ def getNumber(text: str):
             temperature=0.7 # Control the randomness of the response
         )
 
-        client.close()
-
         # Return the transcript to keep track of conversation along with most recent message
         return int(re.sub(r'[^0-9]', '',response.choices[0].message.content.strip()))
 
     except Exception as e:
         # Handle potential API errors (e.g., authentication issues, rate limits)
         print(f"An API error occurred when calling ChatGPT: {e}")
-        client.close()
         raise
     
 def askQuestion(transcript: list, candidateName: str, chatUrl: str, questionNumber: int):
@@ -79,19 +70,15 @@ def askQuestion(transcript: list, candidateName: str, chatUrl: str, questionNumb
                             "content":f'''You are an AI recruitment assistant. You will be chating with {candidateName}. MAKE NO HIRING PROMISES.
                             Have a casual, yet professional conversation with them asking about their career goals and work experience.'''}]
 
-    client = getOpenAPIClient()
-
     fullTranscript = systemInstructions + transcript
 
-    response = client.chat.completions.create(
+    response = chatCompletion(
             model="gpt-5.4-mini",  # Specify the model
             messages=fullTranscript,
             max_completion_tokens=100, # Limit the response length to manage costs
             temperature=0.7 # Control the randomness of the response
         )
 
-    client.close()
-
     question = response.choices[0].message.content.strip()
 
     # If first question
@@ -118,12 +105,10 @@ def askQuestion(transcript: list, candidateName: str, chatUrl: str, questionNumb
                 systemInstructions = [{"role": "system",
                         "content":f'''The previous answer from the candidate could not be processed. Ask the candidate to repeat their answer to the following question as an integer value.
                         FOCUS ONLY ON THE FOLLOWING STATEMENT:\n{question}'''}]
-                
-                client = getOpenAPIClient()
 
                 fullTranscript = systemInstructions + transcript
 
-                response = client.chat.completions.create(
+                response = chatCompletion(
                         model="gpt-5.4-mini",  # Specify the model
                         messages=fullTranscript,
                         max_completion_tokens=100, # Limit the response length to manage costs
@@ -132,8 +117,6 @@ def askQuestion(transcript: list, candidateName: str, chatUrl: str, questionNumb
                 
                 question = response.choices[0].message.content.strip()
 
-                client.close()
-
                 transcript.append({"role":"assistant", "content":question})
                 saveChat(chatUrl,candidateName,transcript)
                 return {"aiTranscript": transcript, "recentMessage": question, "answered": False}
@@ -169,9 +152,7 @@ def openEndedQuestion(transcript: list, candidateName: str, chatUrl: str):
 
     fullTranscript = systemInstructions + transcript
 
-    client = getOpenAPIClient()
-
-    response = client.chat.completions.create(
+    response = chatCompletion(
             model="gpt-3.5-turbo",  # Specify the model
             messages=fullTranscript,
             max_completion_tokens=100, # Limit the response length to manage costs
@@ -180,8 +161,6 @@ def openEndedQuestion(transcript: list, candidateName: str, chatUrl: str):
     
     question = response.choices[0].message.content.strip()
 
-    client.close()
-
     transcript.append({"role":"assistant", "content":question})
     saveChat(chatUrl,candidateName,transcript)
     return {"aiTranscript": transcript, "recentMessage": question}
\ No newline at end of file
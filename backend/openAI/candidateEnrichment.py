@@ -0,0 +1,192 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pydantic import BaseModel, TypeAdapter, ValidationError, field_validator
+from openAI.client import chatCompletion
+from openAI.candidateProcessing import candidateDescription, processGeneral, candidateCulturalExperience, processSkillYears
+
+# Structured outputs need a model that supports json_schema response formats
+ENRICHMENT_MODEL = os.getenv("OPENAI_ENRICHMENT_MODEL", "gpt-4o-mini")
+
+# Prompts used when a field of the combined answer fails validation
+GENERAL_FALLBACKS = {
+    "fullName": "full name",
+    "city": "currently lived in city (DO NOT RETURN PROVINCE OR STATE. DO NOT RETURN ASSOCIATED JOBS OR COMPANIES. ONLY RETURN CITY NAME)",
+    "state": "currently lived in state or province (DO NOT RETURN CITY. DO NOT RETURN ASSOCIATED JOBS OR COMPANIES. ONLY RETURN STATE OR PROVINCE NAME. RETURN NO ADDITIONAL COMMENTARY)",
+    "country": "currently lived in country (DO NOT RETURN CITY, STATE OR PROVINCE. ONLY RETURN COUNTRY NAME)",
+    "title": "current or most recent job title (DO NOT RETURN ANY ASSOCIATED COMPANIES OR JOBS. ONLY RETURN JOB TITLE. RETURN NO ADDITIONAL COMMENTARY)",
+}
+
+class CulturalExperience(BaseModel):
+    experience: str
+    level: int
+
+    @field_validator("experience")
+    @classmethod
+    def notBlank(cls, v: str) -> str:
+        v = v.strip()
+        if not v:
+            raise ValueError("empty experience")
+        return v
+
+    @field_validator("level")
+    @classmethod
+    def clampLevel(cls, v: int) -> int:
+        # Same 1-3 scale candidateCulturalExperience clamps to
+        return min(max(v, 1), 3)
+
+class SkillYears(BaseModel):
+    skill: str
+    years: int
+
+    @field_validator("years")
+    @classmethod
+    def clampYears(cls, v: int) -> int:
+        # Same 1-10 range processSkillYears clamps to
+        return min(max(v, 1), 10)
+
+def _text(v: str) -> str:
+    v = v.strip()
+    if not v:
+        raise ValueError("empty value")
+    return v
+
+# Each field is validated on its own so one bad field doesn't throw away the rest
+FIELD_ADAPTERS = {
+    "fullName": TypeAdapter(str),
+    "description": TypeAdapter(str),
+    "city": TypeAdapter(str),
+    "state": TypeAdapter(str),
+    "country": TypeAdapter(str),
+    "title": TypeAdapter(str),
+    "culturalExperiences": TypeAdapter(list[CulturalExperience]),
+    "skillYears": TypeAdapter(list[SkillYears]),
+}
+
+ENRICHMENT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "fullName": {"type": "string", "description": "The candidate's full name"},
+        "description": {"type": "string", "description": "Description of the candidate to circulate to hiring managers"},
+        "city": {"type": "string", "description": "City the candidate currently lives in, city name only"},
+        "state": {"type": "string", "description": "State or province the candidate currently lives in, name only"},
+        "country": {"type": "string", "description": "Country the candidate currently lives in, name only"},
+        "title": {"type": "string", "description": "Current or most recent job title, without company"},
+        "culturalExperiences": {
+            "type": "array",
+            "description": "4 or 5 high level, abstract cultural experiences (industries worked in, general types of roles). No location names.",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "experience": {"type": "string"},
+                    "level": {"type": "integer", "description": "Experience in this area on a scale of 1 to 3"}
+                },
+                "required": ["experience", "level"],
+                "additionalProperties": False
+            }
+        },
+        "skillYears": {
+            "type": "array",
+            "description": "Years of experience for every requested skill",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "skill": {"type": "string"},
+                    "years": {"type": "integer", "description": "Whole years of experience, 1 to 10"}
+                },
+                "required": ["skill", "years"],
+                "additionalProperties": False
+            }
+        }
+    },
+    "required": ["fullName", "description", "city", "state", "country", "title", "culturalExperiences", "skillYears"],
+    "additionalProperties": False
+}
+
+def _answerJson(response) -> dict:
+    answer = json.loads(response.choices[0].message.content)
+    if not isinstance(answer, dict):
+        raise ValueError("Expected a JSON object")
+    return answer
+
+def _requestEnrichment(resumeText: str, skillNames: list[str]) -> dict:
+    systemInstructions = [{"role": "system",
+                    "content":'''You are an AI assisstant. It is your job to analyze a resume's text and fill in every field of the requested JSON object. ADD NO ADDITIONAL COMMENTARY.
+                    For location fields return only the name asked for, or an empty string if the resume does not say.'''}]
+
+    userInput = [{"role": "user",
+                    "content":f'''Skills to estimate years of experience for: {", ".join(skillNames) or "none"}\n{resumeText}'''}]
+
+    response = chatCompletion(
+            useCache=True,
+            validate=_answerJson,
+            model=ENRICHMENT_MODEL,
+            messages=systemInstructions + userInput,
+            response_format={"type": "json_schema", "json_schema": {"name": "candidate_enrichment", "strict": True, "schema": ENRICHMENT_SCHEMA}},
+            max_completion_tokens=1500, # Description plus a short list per field
+            temperature=0.2
+        )
+
+    return _answerJson(response)
+
+def _validateFields(answer: dict) -> tuple[dict, list[str]]:
+    valid, failed = {}, []
+    for field, adapter in FIELD_ADAPTERS.items():
+        try:
+            value = adapter.validate_python(answer[field])
+            if field in ("description", "title"):
+                value = _text(value)
+            valid[field] = value.strip() if isinstance(value, str) else value
+        except (KeyError, ValidationError, ValueError) as e:
+            print(f"Enrichment field '{field}' failed validation, falling back: {e}")
+            failed.append(field)
+    return valid, failed
+
+def enrichCandidate(resumeText: str, skillNames: list[str], needName: bool = True) -> dict:
+    """
+    Every AI-derived profile field for an uploaded resume from one structured completion.
+
+    Returns {"fullName", "description", "culturalExperiences", "city", "state", "country", "title", "skills"}
+    in the shapes uploadProfile expects. Fields missing from (or invalid in) the combined answer,
+    and skills it didn't cover, are filled by the original single-purpose prompts; fullName only
+    gets that fallback when needName is set (the deterministic parser found no name).
+    """
+    try:
+        valid, failed = _validateFields(_requestEnrichment(resumeText, skillNames))
+    except Exception as e:
+        print(f"Combined enrichment failed, using individual prompts: {e}")
+        valid, failed = {}, list(FIELD_ADAPTERS)
+
+    skillYears = {}
+    for item in valid.get("skillYears", []):
+        skillYears.setdefault(item.skill.strip().lower(), item.years)
+    missingSkills = [name for name in skillNames if name.strip().lower() not in skillYears]
+
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        futures = {}
+        if "description" in failed:
+            futures["description"] = executor.submit(candidateDescription, resumeText)
+        if "culturalExperiences" in failed:
+            futures["culturalExperiences"] = executor.submit(candidateCulturalExperience, resumeText)
+        for field, question in GENERAL_FALLBACKS.items():
+            if field in failed and (field != "fullName" or needName):
+                futures[field] = executor.submit(processGeneral, resumeText, question)
+        skillFutures = {name: executor.submit(processSkillYears, resumeText, name) for name in missingSkills}
+
+    result = {
+        "fullName": valid.get("fullName", ""),
+        "description": valid.get("description"),
+        "culturalExperiences": [{"experience": c.experience, "level": c.level} for c in valid.get("culturalExperiences", [])],
+        "city": valid.get("city"),
+        "state": valid.get("state"),
+        "country": valid.get("country"),
+        "title": valid.get("title"),
+    }
+    for field, future in futures.items():
+        result[field] = future.result()
+
+    result["skills"] = [
+        {"title": name, "years": skillFutures[name].result() if name in skillFutures else skillYears[name.strip().lower()]}
+        for name in skillNames
+    ]
+    return result
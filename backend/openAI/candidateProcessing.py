@@ -1,19 +1,22 @@
 import re
 
-from openAI.client import getOpenAPIClient
+from openAI.client import chatCompletion
+
+def _answerInt(response) -> int:
+    # Raises ValueError when the answer has no digits; also passed as validate so such answers aren't cached
+    return int(re.sub(r'[^0-9]', '',response.choices[0].message.content.strip()))
 
 def processGeneral(resumeText: str, requestedInfo: str):
     systemInstructions = [{"role": "system",
                     "content":'''You are an AI assisstant. It is your job to analyze a resume's text and return only the specific data being asked for. ADD NO ADDITIONAL COMMENTARY. ONLY RETURN THE RAW DATA.'''}]
 
-    aiClient = getOpenAPIClient()
-
     personalityInput = [{"role": "user",
                                 "content":f'''What is the candidate's {requestedInfo}?\n{resumeText}'''}]
         
     aiInput = systemInstructions + personalityInput
 
-    response = aiClient.chat.completions.create(
+    response = chatCompletion(
+                    useCache=True,
                     model="gpt-3.5-turbo",  # Specify the model
                     messages=aiInput,
                     max_completion_tokens=100, # Limit the response length to manage costs
@@ -22,51 +25,46 @@ def processGeneral(resumeText: str, requestedInfo: str):
     
     answer = response.choices[0].message.content.strip()
 
-    aiClient.close()
-
     return answer
 
 def processSkillYears(resumeText: str, skillName: str):
     systemInstructions = [{"role": "system",
                     "content":'''You are an AI assisstant. It is your job to analyze a resume's text and return only the number of years of experience for the specified skill being asked for. ADD NO ADDITIONAL COMMENTARY. ONLY RETURN AN INTEGER VALUE.'''}]
 
-    aiClient = getOpenAPIClient()
-
     personalityInput = [{"role": "user",
                                 "content":f'''How many years of experience does the candidate have with {skillName}?\n{resumeText}'''}]
         
     aiInput = systemInstructions + personalityInput
 
-    response = aiClient.chat.completions.create(
+    response = chatCompletion(
+                    useCache=True,
+                    validate=_answerInt,
                     model="gpt-3.5-turbo",  # Specify the model
                     messages=aiInput,
                     max_completion_tokens=100, # Limit the response length to manage costs
                     temperature=0.7 # Control the randomness of the response
                 )
 
-    experienceLevel = int(re.sub(r'[^0-9]', '',response.choices[0].message.content.strip()))
+    experienceLevel = _answerInt(response)
 
     if experienceLevel < 1:
         experienceLevel = 1
     elif experienceLevel > 10:
         experienceLevel = 10
 
-    aiClient.close()
-
     return experienceLevel
 
 def candidateDescription(resumeText: str):
     systemInstructions = [{"role": "system",
                     "content":'''You are an AI assisstant. It is your job to analyze a resume's text and return only a description of the candidate to be circulated to hiring managers.'''}]
 
-    client = getOpenAPIClient()
-
     personalityInput = [{"role": "user",
                                 "content":f'''Write a description of the candidate based on their resume:\n{resumeText}'''}]
         
     fullTranscript = systemInstructions + personalityInput
 
-    response = client.chat.completions.create(
+    response = chatCompletion(
+            useCache=True,
             model="gpt-3.5-turbo",  # Specify the model
             messages=fullTranscript,
             max_completion_tokens=500, # Limit the response length to manage costs
@@ -75,22 +73,19 @@ def candidateDescription(resumeText: str):
     
     answer = response.choices[0].message.content.strip()
 
-    client.close()
-
     return answer
 
 def candidateCulturalExperience(resumeText: str):
     systemInstructions = [{"role": "system",
                     "content":'''You are an AI assisstant. It is your job to analyze a resume's text and return only a comma separated list of the candidate's high level, abstract cultural experiences, such as the industries they've worked in or general types of roles they've held. ADD NO ADDITIONAL COMMENTARY. DO NOT RETURN LOCATION NAMES. ONLY RETURN THE RAW DATA.'''}]
 
-    client = getOpenAPIClient()
-
     personalityInput = [{"role": "user",
                                 "content":f'''Return a comma separated list of the candidate's high level cultural experiences. Return only 4 or 5 list items:\n{resumeText}'''}]
         
     fullTranscript = systemInstructions + personalityInput
 
-    response = client.chat.completions.create(
+    response = chatCompletion(
+            useCache=True,
             model="gpt-3.5-turbo",  # Specify the model
             messages=fullTranscript,
             max_completion_tokens=100, # Limit the response length to manage costs
@@ -111,14 +106,16 @@ def candidateCulturalExperience(resumeText: str):
         
         fullTranscript = systemInstructions + personalityInput
 
-        response = client.chat.completions.create(
+        response = chatCompletion(
+            useCache=True,
+            validate=_answerInt,
             model="gpt-3.5-turbo",  # Specify the model
             messages=fullTranscript,
             max_completion_tokens=100, # Limit the response length to manage costs
             temperature=0.7 # Control the randomness of the response
         )
 
-        experienceLevel = int(re.sub(r'[^0-9]', '',response.choices[0].message.content.strip()))
+        experienceLevel = _answerInt(response)
 
         if experienceLevel < 1:
             experienceLevel = 1
@@ -127,6 +124,4 @@ def candidateCulturalExperience(resumeText: str):
 
         processedExperienceList.append({"experience": experience, "level": experienceLevel})
 
-    client.close()
-
     return processedExperienceList
\ No newline at end of file
@@ -1,9 +1,165 @@
 import openai
+import httpx
 import os
+import random
+import threading
+import time
 from dotenv import load_dotenv
+from openai.types.chat import ChatCompletion
+from openAI import responseCache
 
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+# Most completions in flight at once across the process; extra callers wait their turn
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+# Attempts after the first for 429 / 5xx / connection errors, with exponential backoff and jitter
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "4"))
+OPENAI_RETRY_BASE_SECONDS = float(os.getenv("OPENAI_RETRY_BASE_SECONDS", "0.5"))
+OPENAI_RETRY_MAX_SECONDS = float(os.getenv("OPENAI_RETRY_MAX_SECONDS", "20"))
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60"))
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+
+_client = None
+_clientLock = threading.Lock()
+_slots = threading.BoundedSemaphore(OPENAI_MAX_CONCURRENCY)
+
+_metricsLock = threading.Lock()
+_metrics = {}
+
 def getOpenAPIClient() -> openai.OpenAI:
-    return openai.OpenAI(api_key=OPENAI_API_KEY)
\ No newline at end of file
+    """
+    Process-wide OpenAI client. Its httpx pool keeps TLS connections alive between calls,
+    so callers must not close() it. Retries are handled by chatCompletion, not the SDK.
+    """
+    global _client
+    if _client is None:
+        with _clientLock:
+            if _client is None:
+                _client = openai.OpenAI(
+                    api_key=OPENAI_API_KEY,
+                    max_retries=0,
+                    timeout=OPENAI_TIMEOUT_SECONDS,
+                    http_client=httpx.Client(
+                        limits=httpx.Limits(max_connections=OPENAI_MAX_CONNECTIONS, max_keepalive_connections=OPENAI_MAX_CONNECTIONS),
+                        timeout=OPENAI_TIMEOUT_SECONDS
+                    )
+                )
+    return _client
+
+def _retryable(e: Exception) -> bool:
+    if isinstance(e, (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    return isinstance(e, openai.APIStatusError) and e.status_code >= 500
+
+def _retryDelay(e: Exception, attempt: int) -> float:
+    # Honour the server's Retry-After when it sends one
+    response = getattr(e, "response", None)
+    retryAfter = response.headers.get("retry-after") if response is not None else None
+    try:
+        if retryAfter:
+            return min(float(retryAfter), OPENAI_RETRY_MAX_SECONDS)
+    except ValueError:
+        pass
+    delay = OPENAI_RETRY_BASE_SECONDS * (2 ** attempt)
+    return min(delay, OPENAI_RETRY_MAX_SECONDS) * (0.5 + random.random() / 2)
+
+def _record(model: str, latencyMs: float, usage, retries: int, failed: bool):
+    with _metricsLock:
+        m = _metrics.setdefault(model, {
+            "calls": 0,
+            "errors": 0,
+            "retries": 0,
+            "totalLatencyMs": 0.0,
+            "maxLatencyMs": 0.0,
+            "promptTokens": 0,
+            "completionTokens": 0,
+        })
+        m["calls"] += 1
+        m["errors"] += 1 if failed else 0
+        m["retries"] += retries
+        m["totalLatencyMs"] += latencyMs
+        m["maxLatencyMs"] = max(m["maxLatencyMs"], latencyMs)
+        if usage is not None:
+            m["promptTokens"] += getattr(usage, "prompt_tokens", 0) or 0
+            m["completionTokens"] += getattr(usage, "completion_tokens", 0) or 0
+
+def _usable(response, validate) -> bool:
+    if validate is None:
+        return True
+    try:
+        validate(response)
+        return True
+    except Exception:
+        return False
+
+def chatCompletion(useCache: bool = False, validate=None, **kwargs):
+    """
+    client.chat.completions.create(**kwargs) through the shared client.
+
+    Each attempt holds one of OPENAI_MAX_CONCURRENCY slots; rate limits, 5xx and connection
+    errors are retried with backoff (the slot is released while waiting). Latency and token
+    usage are recorded per model, see aiMetrics().
+
+    useCache=True serves an identical earlier request from responseCache. Only pass it for
+    extraction-style prompts where a repeat answer is as good as a fresh one, not chat.
+    validate(response) should raise if the caller can't parse the answer: such a response is
+    returned but never cached, and a cached one that fails is dropped and fetched again.
+    """
+    model = kwargs.get("model", "unknown")
+
+    key = None
+    if useCache:
+        if responseCache.enabled():
+            key = responseCache.cacheKey(kwargs)
+            try:
+                cached = responseCache.getCached(key)
+            except Exception as e:
+                print(f"OpenAI response cache unavailable: {e}")
+                cached, key = None, None
+            if cached is not None:
+                response = ChatCompletion.model_validate_json(cached)
+                if _usable(response, validate):
+                    responseCache.noteSavedUsage(response.usage)
+                    return response
+                responseCache.dropInvalid(key)
+        else:
+            responseCache.noteBypass()
+
+    client = getOpenAPIClient()
+    start = time.perf_counter()
+    attempt = 0
+
+    while True:
+        try:
+            with _slots:
+                response = client.chat.completions.create(**kwargs)
+        except Exception as e:
+            if attempt < OPENAI_MAX_RETRIES and _retryable(e):
+                delay = _retryDelay(e, attempt)
+                print(f"OpenAI call failed ({type(e).__name__}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+                continue
+            _record(model, (time.perf_counter() - start) * 1000, None, attempt, True)
+            raise
+
+        _record(model, (time.perf_counter() - start) * 1000, getattr(response, "usage", None), attempt, False)
+        if key is not None and _usable(response, validate):
+            try:
+                responseCache.storeResponse(key, model, response.model_dump_json())
+            except Exception as e:
+                # A cache write failure must never fail the completion itself
+                print(f"Could not cache OpenAI response: {e}")
+        return response
+
+def aiMetrics() -> dict:
+    with _metricsLock:
+        result = {}
+        for model, m in _metrics.items():
+            result[model] = {**m, "avgLatencyMs": round(m["totalLatencyMs"] / m["calls"], 1) if m["calls"] else 0.0}
+        return {
+            "models": result,
+            "maxConcurrency": OPENAI_MAX_CONCURRENCY,
+            "maxRetries": OPENAI_MAX_RETRIES,
+        }
@@ -1,4 +1,4 @@
-from openAI.client import getOpenAPIClient
+from openAI.client import chatCompletion
 from pydantic import BaseModel
 from azureUtils.storage.jobs import getJob
 
@@ -24,14 +24,10 @@ def shortlistClientEmail(jobId: int, candidates: list[candidateScores]):
 
     fullTranscript = systemInstructions + userInstructions
 
-    client = getOpenAPIClient()
-
-    response = client.chat.completions.create(
+    response = chatCompletion(
             model="gpt-5.4-mini",  # Specify the model
             messages=fullTranscript,
             temperature=0.7 # Control the randomness of the response
         )
 
-    client.close()
-
     return {'email':response.choices[0].message.content.strip()}
\ No newline at end of file
@@ -1,11 +1,11 @@
-from openAI.client import getOpenAPIClient
+from openAI.client import chatCompletion
 
 
 def getPeopleSkills(jobDescription: str) -> list[str]:
-    client = getOpenAPIClient()
 
     try:
-        response = client.chat.completions.create(
+        response = chatCompletion(
+            useCache=True,
             model="gpt-3.5-turbo",  # Specify the model
             messages=[
                 {"role": "system", "content": "You are a helpful assistant."}, # System instructions
@@ -20,22 +20,19 @@ def getPeopleSkills(jobDescription: str) -> list[str]:
 
         skillList = [s.strip() for s in response.choices[0].message.content.split(",") if s.strip()]
 
-        client.close()
-
         # Return the skills as a list by splitting the comma-separated string
         return skillList
 
     except Exception as e:
         # Handle potential API errors (e.g., authentication issues, rate limits)
         print(f"An API error occurred when calling ChatGPT: {e}")
-        client.close()
         return []
 
 def getPeopleCity(jobDescription: str) -> str:
-    client = getOpenAPIClient()
 
     try:
-        response = client.chat.completions.create(
+        response = chatCompletion(
+            useCache=True,
             model="gpt-3.5-turbo",  # Specify the model
             messages=[
                 {"role": "system", "content": "You are a helpful assistant."}, # System instructions
@@ -56,14 +53,13 @@ def getPeopleCity(jobDescription: str) -> str:
     except Exception as e:
         # Handle potential API errors (e.g., authentication issues, rate limits)
         print(f"An API error occurred when calling ChatGPT: {e}")
-        client.close()
         return ""
 
 def getPeopleState(jobDescription: str) -> str:
-    client = getOpenAPIClient()
 
     try:
-        response = client.chat.completions.create(
+        response = chatCompletion(
+            useCache=True,
             model="gpt-3.5-turbo",  # Specify the model
             messages=[
                 {"role": "system", "content": "You are a helpful assistant."}, # System instructions
@@ -84,14 +80,13 @@ def getPeopleState(jobDescription: str) -> str:
     except Exception as e:
         # Handle potential API errors (e.g., authentication issues, rate limits)
         print(f"An API error occurred when calling ChatGPT: {e}")
-        client.close()
         return ""
 
 def getPeopleCountry(jobDescription: str) -> str:
-    client = getOpenAPIClient()
 
     try:
-        response = client.chat.completions.create(
+        response = chatCompletion(
+            useCache=True,
             model="gpt-3.5-turbo",  # Specify the model
             messages=[
                 {"role": "system", "content": "You are a helpful assistant."}, # System instructions
@@ -112,5 +107,4 @@ def getPeopleCountry(jobDescription: str) -> str:
     except Exception as e:
         # Handle potential API errors (e.g., authentication issues, rate limits)
         print(f"An API error occurred when calling ChatGPT: {e}")
-        client.close()
         return ""
\ No newline at end of file
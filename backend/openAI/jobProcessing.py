@@ -1,45 +1,110 @@
-from openAI.client import getOpenAPIClient
+from openAI.client import chatCompletion
+import json
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 import psycopg.cursor as cursorType
 
-# Get AI to determine which personality traits are most beneficial to the company
-def processPersonalities(jobId: int, jobDescription: str, azureCursor: cursorType.Cursor):
+# Per-trait fallback calls in flight for one job when the batched answer is incomplete
+PERSONALITY_MAX_WORKERS = int(os.getenv("PERSONALITY_MAX_WORKERS", "4"))
+
+def _normalizeScore(score: int) -> int:
+    # Account for poor quality AI output
+    if score > 5 and score < 10:
+        score = 5
+    elif score > 5:
+        # Account for decimals in answer above
+        score = round(float(score)/(10**(len(str(score))-1)))
+    elif score < 1:
+        score = 1
+    return score
+
+def _answerInt(response) -> int:
+    return int(re.sub(r'[^0-9]', '',response.choices[0].message.content.strip()))
+
+def _answerJson(response) -> dict:
+    answer = json.loads(response.choices[0].message.content)
+    if not isinstance(answer, dict):
+        raise ValueError("Expected a JSON object of trait scores")
+    return answer
+
+def _scorePersonality(jobDescription: str, trait: str) -> int:
     systemInstructions = [{"role": "system",
                     "content":'''You are an AI assisstant. It is your job to analyze a job description and return a single numerial value on a scale from 1 to 5 in 
                     regards to how well you believe a certain trait will benefit that job. ADD NO ADDITIONAL COMMENTARY. ONLY RETURN A NUMERICAL INTEGER VALUE BETWEEN 1 AND 5.'''}]
 
-    aiClient = getOpenAPIClient()
-
-    query = 'SELECT id, title FROM personality'
-    azureCursor.execute(query)
-
-    personalityCategories = azureCursor.fetchall()
-
-    for personality in personalityCategories:
-        personalityInput = [{"role": "user",
-                                "content":f'''On a scale of 1 to 5, how important is it that a potential candidate be {personality[1]}?\n{jobDescription}'''}]
-        
-        aiInput = systemInstructions + personalityInput
-
-        response = aiClient.chat.completions.create(
-                        model="gpt-3.5-turbo",  # Specify the model
-                        messages=aiInput,
-                        max_completion_tokens=100, # Limit the response length to manage costs
-                        temperature=0.7 # Control the randomness of the response
-                    )
-        
-        score = int(re.sub(r'[^0-9]', '',response.choices[0].message.content.strip()))
-
-        # Account for poor quality AI output
-        if score > 5 and score < 10:
-            score = 5
-        elif score > 5:
-            # Account for decimals in answer above
-            score = round(float(score)/(10**(len(str(score))-1)))
-        elif score < 1:
-            score = 1
-
-        query = f'INSERT INTO jobpersonalities (personalityid, jobid, score) VALUES ({personality[0]}, {jobId}, {score});'
-        azureCursor.execute(query)
-
-    aiClient.close()
\ No newline at end of file
+    personalityInput = [{"role": "user",
+                            "content":f'''On a scale of 1 to 5, how important is it that a potential candidate be {trait}?\n{jobDescription}'''}]
+
+    aiInput = systemInstructions + personalityInput
+
+    response = chatCompletion(
+                    useCache=True,
+                    validate=_answerInt,
+                    model="gpt-3.5-turbo",  # Specify the model
+                    messages=aiInput,
+                    max_completion_tokens=100, # Limit the response length to manage costs
+                    temperature=0.7 # Control the randomness of the response
+                )
+
+    return _normalizeScore(_answerInt(response))
+
+def _scorePersonalitiesBatch(jobDescription: str, traits: list[str]) -> dict:
+    systemInstructions = [{"role": "system",
+                    "content":'''You are an AI assisstant. It is your job to analyze a job description and rate, on a scale from 1 to 5, how well you believe each listed trait
+                    will benefit that job. Return a JSON object mapping every trait exactly as written to an integer between 1 and 5. ADD NO ADDITIONAL COMMENTARY.'''}]
+
+    traitList = "\n".join(f"- {t}" for t in traits)
+    personalityInput = [{"role": "user",
+                            "content":f'''Traits:\n{traitList}\n\nJob description:\n{jobDescription}'''}]
+
+    response = chatCompletion(
+                    useCache=True,
+                    validate=_answerJson,
+                    model="gpt-4o-mini",  # JSON mode
+                    messages=systemInstructions + personalityInput,
+                    response_format={"type": "json_object"},
+                    max_completion_tokens=20 * len(traits) + 50,
+                    temperature=0.2
+                )
+
+    answer = _answerJson(response)
+    byTitle = {str(k).strip().lower(): v for k, v in answer.items()}
+
+    scores = {}
+    for trait in traits:
+        value = byTitle.get(trait.strip().lower())
+        try:
+            scores[trait] = _normalizeScore(int(round(float(value))))
+        except (TypeError, ValueError):
+            continue
+    return scores
+
+def scorePersonalities(jobDescription: str, personalities: list) -> list[tuple[int, int]]:
+    """
+    Score every (id, title) personality trait for a job description.
+
+    All traits are asked for in one JSON completion; any trait it leaves out or answers badly
+    is scored with the single-trait prompt, at most PERSONALITY_MAX_WORKERS at a time.
+    Returns [(personalityId, score)] in input order. No database work happens here.
+    """
+    traits = [p[1] for p in personalities]
+    try:
+        scores = _scorePersonalitiesBatch(jobDescription, traits) if traits else {}
+    except Exception as e:
+        print(f"Batched personality scoring failed, scoring traits individually: {e}")
+        scores = {}
+
+    missing = [t for t in traits if t not in scores]
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(PERSONALITY_MAX_WORKERS, len(missing))) as executor:
+            for trait, score in zip(missing, executor.map(lambda t: _scorePersonality(jobDescription, t), missing)):
+                scores[trait] = score
+
+    return [(p[0], scores[p[1]]) for p in personalities]
+
+def insertPersonalityScores(jobId: int, scores: list[tuple[int, int]], azureCursor: cursorType.Cursor):
+    azureCursor.executemany(
+        "INSERT INTO jobpersonalities (personalityid, jobid, score) VALUES (%s, %s, %s)",
+        [(personalityId, jobId, score) for personalityId, score in scores]
+    )
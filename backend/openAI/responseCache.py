@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Completions for identical (model, messages, params) are served from here instead of the API
+OPENAI_CACHE_PATH = os.getenv("OPENAI_CACHE_PATH", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "openai_cache.db"))
+OPENAI_CACHE_TTL_SECONDS = float(os.getenv("OPENAI_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+# Least recently used entries are evicted above this many rows
+OPENAI_CACHE_MAX_ENTRIES = int(os.getenv("OPENAI_CACHE_MAX_ENTRIES", "20000"))
+# Set to 1 to skip the cache everywhere (e.g. while iterating on prompts)
+OPENAI_CACHE_DISABLED = os.getenv("OPENAI_CACHE_DISABLED", "0").lower() in ("1", "true", "yes")
+
+_conn = None
+_lock = threading.Lock()
+_stats = {
+    "hits": 0,
+    "misses": 0,
+    "expired": 0,
+    "writes": 0,
+    "evictions": 0,
+    "invalid": 0,
+    "bypassed": 0,
+    "savedPromptTokens": 0,
+    "savedCompletionTokens": 0,
+}
+
+def _connection() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(OPENAI_CACHE_PATH, check_same_thread=False, isolation_level=None)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute("""
+            CREATE TABLE IF NOT EXISTS response_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        _conn.execute("CREATE INDEX IF NOT EXISTS idx_response_cache_last_used ON response_cache(last_used)")
+    return _conn
+
+def enabled() -> bool:
+    return not OPENAI_CACHE_DISABLED
+
+def cacheKey(kwargs: dict) -> str:
+    """sha256 over the full request: model, every message (system and user) and sampling params."""
+    payload = json.dumps(kwargs, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def noteBypass():
+    with _lock:
+        _stats["bypassed"] += 1
+
+def getCached(key: str):
+    """The stored response JSON for key, or None on a miss / expired entry."""
+    now = time.time()
+    with _lock:
+        conn = _connection()
+        row = conn.execute("SELECT response, created_at FROM response_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            _stats["misses"] += 1
+            return None
+        if now - row[1] > OPENAI_CACHE_TTL_SECONDS:
+            conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+            _stats["expired"] += 1
+            _stats["misses"] += 1
+            return None
+        conn.execute("UPDATE response_cache SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key))
+        _stats["hits"] += 1
+        return row[0]
+
+def noteSavedUsage(usage):
+    if usage is None:
+        return
+    with _lock:
+        _stats["savedPromptTokens"] += getattr(usage, "prompt_tokens", 0) or 0
+        _stats["savedCompletionTokens"] += getattr(usage, "completion_tokens", 0) or 0
+
+def storeResponse(key: str, model: str, response: str):
+    now = time.time()
+    with _lock:
+        conn = _connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO response_cache (key, model, response, created_at, last_used, hits) VALUES (?, ?, ?, ?, ?, 0)",
+            (key, model, response, now, now)
+        )
+        _stats["writes"] += 1
+
+        excess = conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0] - OPENAI_CACHE_MAX_ENTRIES
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM response_cache WHERE key IN (SELECT key FROM response_cache ORDER BY last_used LIMIT ?)",
+                (excess,)
+            )
+            _stats["evictions"] += excess
+
+def dropInvalid(key: str):
+    # A cached answer the caller could no longer parse; counted as a miss, not a hit
+    with _lock:
+        _connection().execute("DELETE FROM response_cache WHERE key = ?", (key,))
+        _stats["invalid"] += 1
+        _stats["hits"] -= 1
+        _stats["misses"] += 1
+
+def clearCache():
+    with _lock:
+        _connection().execute("DELETE FROM response_cache")
+
+def cacheStats() -> dict:
+    with _lock:
+        entries = _connection().execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+        lookups = _stats["hits"] + _stats["misses"]
+        return {
+            **_stats,
+            "hitRate": round(_stats["hits"] / lookups, 4) if lookups else 0.0,
+            "entries": entries,
+            "maxEntries": OPENAI_CACHE_MAX_ENTRIES,
+            "ttlSeconds": OPENAI_CACHE_TTL_SECONDS,
+            "enabled": enabled(),
+            "path": OPENAI_CACHE_PATH,
+        }
@@ -1,5 +1,7 @@
 from fastapi import APIRouter, Form
 from openAI import emailProcessing
+from openAI.client import aiMetrics
+from openAI import responseCache
 from pydantic import BaseModel
 
 router = APIRouter(
@@ -18,3 +20,18 @@ async def scheduleChats(incomingCandidateScores: incomingCandidateScores):
 
     print(f"Generating email for job: {jobId}")
     return emailProcessing.shortlistClientEmail(jobId, candidateScores)
+
+@router.get("/metrics")
+def ai_metrics():
+    # Per-model call counts, retries, latency and token usage since startup
+    return aiMetrics()
+
+@router.get("/cache")
+def ai_cache_stats():
+    # Hit rate, tokens saved and size of the persistent completion cache
+    return responseCache.cacheStats()
+
+@router.delete("/cache")
+def ai_cache_clear():
+    responseCache.clearCache()
+    return responseCache.cacheStats()
@@ -1,12 +1,9 @@
-
-import os, time
-from openai import OpenAI
-
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+import time
+from openAI.client import chatCompletion
 
 def run_prompt(prompt, text):
     start = time.time()
-    resp = client.chat.completions.create(
+    resp = chatCompletion(
         model="gpt-4o-mini",
         temperature=0,
         messages=[
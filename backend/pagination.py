@@ -0,0 +1,35 @@
+import base64
+import json
+from typing import Optional
+
+def encode_cursor(*keys) -> str:
+    """
+    Opaque keyset cursor for the last row of a page, e.g. encode_cursor(sort_key, id).
+
+    The next page asks for rows strictly after these keys in the query's sort order,
+    so it costs the same as the first page instead of scanning and discarding an OFFSET.
+    """
+    raw = json.dumps(list(keys), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: Optional[str], size: int) -> Optional[list]:
+    """Keys encoded by encode_cursor, or None for the first page. Raises ValueError if the cursor is malformed."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        keys = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not isinstance(keys, list) or len(keys) != size:
+        raise ValueError("Invalid cursor")
+    return keys
+
+def keyset_page(rows: list, page_limit: int, cursor_keys) -> dict:
+    """Trim a page fetched with LIMIT page_limit + 1 and build its next_cursor from the last kept row."""
+    has_more = len(rows) > page_limit
+    rows = rows[:page_limit]
+    return {
+        "rows": rows,
+        "next_cursor": encode_cursor(*cursor_keys(rows[-1])) if has_more and rows else None,
+    }
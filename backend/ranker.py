@@ -1,10 +1,41 @@
-
+import heapq
+import os
 from scorer import score
 
-def rank(profiles, job, weights):
+# How many skill-matching candidates run_match streams from storage before keeping the top_k
+CANDIDATE_POOL_SIZE = int(os.getenv("MATCH_CANDIDATE_POOL_SIZE", "5000"))
+
+def select_top_k(items, k: int, key):
+    """
+    Return the k items with the largest key(item), best first.
+
+    Consumes items as a stream through a bounded min-heap, so memory stays O(k) no matter
+    how many candidates are scanned. Ties keep input order, like a stable sort.
+    """
+    if k is None:
+        return sorted(items, key=key, reverse=True)
+    if k <= 0:
+        return []
+
+    heap = []
+    for seq, item in enumerate(items):
+        # -seq makes earlier items win ties and keeps item itself out of comparisons
+        entry = (key(item), -seq, item)
+        if len(heap) < k:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entry)
+
+    return [e[2] for e in sorted(heap, key=lambda e: e[:2], reverse=True)]
+
+def rank(profiles, job, weights, limit: int = None):
+    def scored():
+        for p in profiles:
+            s, overlap = score(p, job, weights)
+            yield s, overlap, p
+
     results = []
-    for p in profiles:
-        s, overlap = score(p, job, weights)
+    for s, overlap, p in select_top_k(scored(), limit, key=lambda x: x[0]):
         results.append({
             "name": p.get("full_name"),
             "email": p.get("email"),
@@ -12,4 +43,4 @@ def rank(profiles, job, weights):
             "why": overlap,
             "summary": p.get("summary", "")
         })
-    return sorted(results, key=lambda x: x["score"], reverse=True)
+    return results
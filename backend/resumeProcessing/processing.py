@@ -1,29 +1,234 @@
 import pdfplumber
+from pdfminer.converter import TextConverter
+from pdfminer.layout import LAParams
+from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
+from pdfminer.pdfpage import PDFPage
 from docx import Document
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
 import io
+import os
+import time
 
-def extractPdfText(file: bytes) -> str:
-    text = []
+# Extraction budget per document; a 200-page scanned attachment stops here instead of
+# tying up a worker. 0 turns a limit off. The time budget is checked between pages, so one
+# slow page can still run past it; it bounds how many pages are read, not how long a page takes.
+EXTRACT_MAX_PAGES = int(os.getenv("EXTRACT_MAX_PAGES", "40"))
+EXTRACT_MAX_CHARS = int(os.getenv("EXTRACT_MAX_CHARS", "200000"))
+EXTRACT_TIMEOUT_SECONDS = float(os.getenv("EXTRACT_TIMEOUT_SECONDS", "30"))
 
+# PDF backend: "fast" (pdfminer text), "layout" (pdfplumber) or "auto" (fast, falling
+# back to layout when the first pages yield fewer than PDF_AUTO_MIN_CHARS_PER_PAGE characters)
+PDF_EXTRACTOR = os.getenv("PDF_EXTRACTOR", "auto")
+PDF_AUTO_PROBE_PAGES = int(os.getenv("PDF_AUTO_PROBE_PAGES", "2"))
+PDF_AUTO_MIN_CHARS_PER_PAGE = int(os.getenv("PDF_AUTO_MIN_CHARS_PER_PAGE", "200"))
+
+# One background thread is plenty for archiving; uploads never wait on it
+_archiveExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="upload-archive")
+
+def _open(file):
+    # bytes become an in-memory buffer; paths and file objects (e.g. a SpooledTemporaryFile) pass through
+    if isinstance(file, (bytes, bytearray, memoryview)):
+        return io.BytesIO(file)
+    if hasattr(file, "seek"):
+        file.seek(0)
+    return file
+
+def _limits(maxPages, maxChars, timeout):
+    return (
+        EXTRACT_MAX_PAGES if maxPages is None else maxPages,
+        EXTRACT_MAX_CHARS if maxChars is None else maxChars,
+        EXTRACT_TIMEOUT_SECONDS if timeout is None else timeout,
+    )
+
+PDF_ERROR = "Failed to extract text from PDF. Ensure the file is a valid PDF and not password-protected."
+
+def _layoutPages(file):
+    # pdfplumber's layout-aware extraction: best reading order for multi-column resumes, but slow
+    try:
+        pdf = pdfplumber.open(_open(file))
+    except Exception:
+        raise ValueError(PDF_ERROR)
+
+    with pdf:
+        for page in pdf.pages:
+            try:
+                yield page.extract_text() or ""
+            except Exception:
+                raise ValueError(PDF_ERROR)
+            finally:
+                # Drop the page's parsed layout objects; long documents otherwise keep every page in memory
+                page.close()
+
+def _fastPages(file):
+    # Plain pdfminer: lines are grouped but text boxes aren't reordered (boxes_flow=None),
+    # and none of pdfplumber's per-character objects are built
     try:
-        with pdfplumber.open(io.BytesIO(file)) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text.append(page_text)
+        source = _open(file)
+        handle = open(source, "rb") if isinstance(source, str) else source
+        manager = PDFResourceManager()
+        pages = PDFPage.get_pages(handle)
     except Exception:
-        raise ValueError("Failed to extract text from PDF. Ensure the file is a valid PDF and not password-protected.")
+        raise ValueError(PDF_ERROR)
+
+    try:
+        for page in pages:
+            out = io.StringIO()
+            device = TextConverter(manager, out, laparams=LAParams(boxes_flow=None))
+            try:
+                PDFPageInterpreter(manager, device).process_page(page)
+            except Exception:
+                raise ValueError(PDF_ERROR)
+            finally:
+                device.close()
+            # TextConverter ends every page with a form feed; pdfplumber pages have none
+            yield out.getvalue().rstrip("\f")
+    except ValueError:
+        raise
+    except Exception:
+        raise ValueError(PDF_ERROR)
+    finally:
+        if handle is not source:
+            handle.close()
+
+def _autoPages(file):
+    # Fast mode unless its first pages come back nearly empty (scans, odd encodings, heavy layout)
+    fast = _fastPages(file)
+    probe = []
+    for text in fast:
+        probe.append(text)
+        if len(probe) >= PDF_AUTO_PROBE_PAGES:
+            break
+
+    chars = sum(len(t.strip()) for t in probe)
+    # No text layer at all (a scan): pdfplumber reads the same content streams, so it can't do better
+    if chars == 0 or chars >= PDF_AUTO_MIN_CHARS_PER_PAGE * len(probe):
+        yield from probe
+        yield from fast
+        return
+
+    fast.close()
+    yield from _layoutPages(file)
+
+# name -> generator of per-page text; PDF_EXTRACTOR picks the default
+PDF_EXTRACTORS = {
+    "fast": _fastPages,
+    "layout": _layoutPages,
+    "auto": _autoPages,
+}
+
+def registerPdfExtractor(name: str, pages):
+    """Add a backend: pages(file) yields the text of each page in order."""
+    PDF_EXTRACTORS[name] = pages
 
-    return "\n".join(text)
+def iterPdfPages(file, maxPages: int = None, maxChars: int = None, timeout: float = None, backend: str = None):
+    """
+    Yield the text of each PDF page as it is extracted, stopping once the page, character
+    or time budget is spent (0 disables a limit). timeout is a between-page budget: no new
+    page is started once it has passed, but a page already being extracted runs to the end.
 
-def extractDocxText(file: bytes) -> str:
-    doc = Document(io.BytesIO(file))
-    return "\n".join([paragraph.text for paragraph in doc.paragraphs])
+    backend is a PDF_EXTRACTORS name (default PDF_EXTRACTOR). Stopping the consumer early
+    (e.g. break) closes the PDF without touching the remaining pages.
+    """
+    maxPages, maxChars, timeout = _limits(maxPages, maxChars, timeout)
+    name = backend or PDF_EXTRACTOR
+    if name not in PDF_EXTRACTORS:
+        raise ValueError(f"Unknown PDF extractor: {name}")
 
-def ingest(source_type, file: bytes) -> str:
+    deadline = time.monotonic() + timeout if timeout else None
+    chars = 0
+    pages = PDF_EXTRACTORS[name](file)
+
+    try:
+        for number, page_text in enumerate(pages, start=1):
+            if not page_text:
+                pass
+            elif maxChars and chars + len(page_text) > maxChars:
+                print(f"PDF extraction stopped at character limit ({maxChars}) on page {number}")
+                yield page_text[:maxChars - chars]
+                return
+            else:
+                chars += len(page_text)
+                yield page_text
+
+            if maxPages and number >= maxPages:
+                print(f"PDF extraction stopped at page limit ({maxPages})")
+                return
+            if deadline and time.monotonic() > deadline:
+                print(f"PDF extraction stopped after {timeout}s at page {number}")
+                return
+    finally:
+        pages.close()
+
+def iterDocxParagraphs(file, maxChars: int = None):
+    _, maxChars, _ = _limits(None, maxChars, None)
+    chars = 0
+    for paragraph in Document(_open(file)).paragraphs:
+        text = paragraph.text
+        if maxChars and chars + len(text) > maxChars:
+            yield text[:maxChars - chars]
+            return
+        chars += len(text) + 1
+        yield text
+
+def extractPdfText(file, maxPages: int = None, maxChars: int = None, timeout: float = None, backend: str = None) -> str:
+    return "\n".join(t for t in iterPdfPages(file, maxPages, maxChars, timeout, backend) if t)
+
+def extractDocxText(file, maxChars: int = None) -> str:
+    return "\n".join(iterDocxParagraphs(file, maxChars))
+
+def extractPlainText(file) -> str:
+    data = file if isinstance(file, (bytes, bytearray)) else _open(file).read()
+    return bytes(data).decode("utf-8", errors="ignore")
+
+def sourceTypeFor(filename: str, default: str = "pdf") -> str:
+    ext = os.path.splitext(filename or "")[1].lower()
+    return {".pdf": "pdf", ".docx": "docx", ".txt": "txt", ".doc": "doc"}.get(ext, default)
+
+def iterText(source_type, file, maxPages: int = None, maxChars: int = None, timeout: float = None, backend: str = None):
+    """Document text in chunks (PDF pages / DOCX paragraphs) within the extraction budget."""
+    if source_type == "pdf":
+        return iterPdfPages(file, maxPages, maxChars, timeout, backend)
+    elif source_type == "docx":
+        return iterDocxParagraphs(file, maxChars)
+    elif source_type == "txt":
+        _, limit, _ = _limits(None, maxChars, None)
+        text = extractPlainText(file)
+        return iter([text[:limit] if limit else text])
+    else:
+        raise ValueError(f"Unsupported source type: {source_type}")
+
+def ingest(source_type, file) -> str:
+    """
+    Text of an uploaded document. file may be bytes, a file object or a path;
+    nothing is written to disk to parse it.
+    """
     if source_type == "pdf":
         return extractPdfText(file)
     elif source_type == "docx":
         return extractDocxText(file)
+    elif source_type == "txt":
+        return "".join(iterText(source_type, file))
     else:
-        raise ValueError(f"Unsupported source type: {source_type}")
\ No newline at end of file
+        raise ValueError(f"Unsupported source type: {source_type}")
+
+def archiveUpload(data: bytes, filename: str, directory: str):
+    """
+    Keep a copy of an upload under its content hash, off the request path.
+
+    Identical uploads share one file and uploads with the same name no longer overwrite
+    each other. Returns the future for the path written.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    path = os.path.join(directory, digest + os.path.splitext(filename or "")[1].lower())
+
+    def write():
+        if not os.path.exists(path):
+            # Write then rename so a half-written file is never left under the final name
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        return path
+
+    return _archiveExecutor.submit(write)
@@ -1,21 +1,17 @@
-import pdfplumber
-from docx import Document
+from resumeProcessing.processing import extractPdfText, extractDocxText
 
-def ingest_pdf(path: str) -> str:
-    parts = []
-    with pdfplumber.open(path) as pdf:
-        for page in pdf.pages:
-            parts.append(page.extract_text() or "")
-    return "\n".join(parts)
+# Thin wrappers over resumeProcessing.processing, which parses bytes, file objects or paths
 
-def ingest_docx(path: str) -> str:
-    doc = Document(path)
-    return "\n".join(p.text for p in doc.paragraphs)
+def ingest_pdf(file) -> str:
+    return extractPdfText(file)
 
-def ingest(source_type: str, path: str) -> str:
+def ingest_docx(file) -> str:
+    return extractDocxText(file)
+
+def ingest(source_type: str, file) -> str:
     st = (source_type or "").lower().strip()
     if st == "pdf":
-        return ingest_pdf(path)
+        return ingest_pdf(file)
     if st == "docx":
-        return ingest_docx(path)
-    return ingest_docx(path)
+        return ingest_docx(file)
+    return ingest_docx(file)
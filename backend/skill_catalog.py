@@ -0,0 +1,92 @@
+import os
+import threading
+import time
+from skill_matcher import SkillMatcher
+
+SKILL_CATALOG_TTL_SECONDS = float(os.getenv("SKILL_CATALOG_TTL_SECONDS", "300"))
+
+class SkillCatalog:
+    """
+    Process-wide cache of the skill dictionary, compiled into a SkillMatcher.
+
+    The loader (e.g. a SELECT over the skill table) only runs when the cached copy is older
+    than ttl_seconds; the app never writes the skill table, so the TTL is what picks up rows
+    added outside it. If a refresh fails while an older copy exists, the old copy keeps
+    serving and the error is counted.
+    """
+
+    def __init__(self, loader, ttl_seconds: float = SKILL_CATALOG_TTL_SECONDS):
+        self._loader = loader
+        self._ttl = ttl_seconds
+        self._lock = threading.Lock()
+        self._titles = []
+        self._matcher = None
+        self._loaded_at = 0.0
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+            "last_refresh_ms": 0.0,
+            "total_refresh_ms": 0.0,
+        }
+
+    def _fresh(self) -> bool:
+        return (
+            self._matcher is not None
+            and (time.monotonic() - self._loaded_at) < self._ttl
+        )
+
+    def _refresh(self):
+        start = time.perf_counter()
+        try:
+            titles = [t for t in self._loader() if t]
+        except Exception as e:
+            self._stats["refresh_errors"] += 1
+            if self._matcher is None:
+                raise
+            print(f"Skill catalog refresh failed, serving cached copy: {e}")
+            # Back off for a full TTL instead of retrying on every call
+            self._loaded_at = time.monotonic()
+            return
+
+        self._titles = titles
+        self._matcher = SkillMatcher({"skills": titles})
+        self._loaded_at = time.monotonic()
+
+        elapsed = (time.perf_counter() - start) * 1000
+        self._stats["refreshes"] += 1
+        self._stats["last_refresh_ms"] = round(elapsed, 2)
+        self._stats["total_refresh_ms"] = round(self._stats["total_refresh_ms"] + elapsed, 2)
+
+    def matcher(self) -> SkillMatcher:
+        if self._fresh():
+            self._stats["hits"] += 1
+            return self._matcher
+
+        with self._lock:
+            # Another thread may have refreshed while we waited on the lock
+            if self._fresh():
+                self._stats["hits"] += 1
+            else:
+                self._stats["misses"] += 1
+                self._refresh()
+            return self._matcher
+
+    def titles(self) -> list:
+        self.matcher()
+        return list(self._titles)
+
+    def find(self, text: str) -> list:
+        """Sorted catalog titles that appear in text."""
+        return sorted({sk for _, sk in self.matcher().find(text)})
+
+    def stats(self) -> dict:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            "skills": len(self._titles),
+            "age_seconds": round(time.monotonic() - self._loaded_at, 1) if self._loaded_at else None,
+            "ttl_seconds": self._ttl,
+        }
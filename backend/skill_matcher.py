@@ -0,0 +1,98 @@
+import re
+from skill_lexicon import SKILL_GROUPS
+
+def _norm(s: str) -> str:
+    return re.sub(r"\s+", " ", (s or "").strip()).lower()
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+def _trie_pattern(keys) -> str:
+    # Build a prefix tree and emit it as one regex, so shared prefixes
+    # ("spring" / "spring boot", "sql" / "sql server") are only walked once.
+    trie = {}
+    for key in keys:
+        node = trie
+        for ch in key:
+            node = node.setdefault(ch, {})
+        node[""] = key
+
+    def emit(node):
+        alts = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch != ""]
+        if "" in node:
+            # Terminal: a skill ending in a letter/digit must not run into the next word
+            alts.append(r"(?!\w)" if _is_word_char(node[""][-1]) else "")
+        return alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+
+    return emit(trie)
+
+class SkillMatcher:
+    """
+    Compiled multi-pattern matcher over a {group: [skill, ...]} lexicon.
+
+    All skills are folded into a single trie-shaped regex at construction time, so
+    extract() normalizes the text once and scans it in one pass instead of running
+    one substring search per skill.
+
+    Word-boundary rule: a skill starting (ending) with a letter/digit only matches when
+    the character before (after) it is not one. "go" no longer matches inside "good" or
+    "api" inside "capital", while ".net" still matches inside "asp.net".
+    """
+
+    def __init__(self, groups: dict):
+        self.groups = list(groups.keys())
+        self._owners = {}
+        for group, skills in groups.items():
+            for sk in skills:
+                key = _norm(sk)
+                if not key:
+                    continue
+                owners = self._owners.setdefault(key, [])
+                if (group, sk) not in owners:
+                    owners.append((group, sk))
+
+        keys = sorted(self._owners)
+        # The regex reports the longest skill at each position; shorter skills that are
+        # prefixes of it ("spring" inside "spring boot") are checked from this table.
+        self._prefixes = {k: [p for p in keys if p != k and k.startswith(p)] for k in keys}
+
+        self._regex = None
+        if keys:
+            punct_starts = "".join(sorted({k[0] for k in keys if not _is_word_char(k[0])}))
+            start = r"\b"
+            if punct_starts:
+                start = r"(?:\b|(?=[" + re.escape(punct_starts) + r"]))"
+            self._regex = re.compile(start + "(?=(" + _trie_pattern(keys) + "))")
+
+    def __len__(self):
+        return len(self._owners)
+
+    def find(self, text: str, normalized: bool = False) -> set:
+        """Return the set of (group, skill) pairs present in text."""
+        if self._regex is None:
+            return set()
+        t = text if normalized else _norm(text)
+        n = len(t)
+        hits = set()
+        for m in self._regex.finditer(t):
+            key = m.group(1)
+            hits.update(self._owners[key])
+            for p in self._prefixes[key]:
+                end = m.start() + len(p)
+                if _is_word_char(p[-1]) and end < n and _is_word_char(t[end]):
+                    continue
+                hits.update(self._owners[p])
+        return hits
+
+    def extract(self, text: str, normalized: bool = False) -> dict:
+        """Same shape as the legacy extractors: {group: sorted list of skills}."""
+        found = {g: set() for g in self.groups}
+        for group, sk in self.find(text, normalized=normalized):
+            found[group].add(sk)
+        return {k: sorted(v) for k, v in found.items()}
+
+# Shared matcher for the static lexicon, compiled once at import time
+LEXICON_MATCHER = SkillMatcher(SKILL_GROUPS)
+
+def extract_skill_groups(text: str) -> dict:
+    return LEXICON_MATCHER.extract(text)
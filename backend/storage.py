@@ -4,11 +4,16 @@ import json
 import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Any, Dict, List
+from pagination import decode_cursor, keyset_page
+from ttl_cache import TTLCache
 
 def new_id(prefix: str) -> str:
     ts = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
     return f"{prefix}_{ts}_{uuid.uuid4().hex[:8]}"
 
+# Search totals per (db, domain, search string); cleared whenever profiles change
+_SEARCH_TOTALS = TTLCache(30)
+
 def _conn(db_path: str):
     conn = sqlite3.connect(db_path)
     conn.row_factory = sqlite3.Row
@@ -74,17 +79,54 @@ def init_db(db_path: str):
     _ensure_column(conn, "profiles", "updated_at", "TEXT")
     _ensure_column(conn, "profiles", "data_json", "TEXT")
 
+    # Inverted skill index: one row per (profile, group, skill), kept in sync by upsert_profile
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS profile_skills (
+      profile_id TEXT NOT NULL,
+      skill_group TEXT NOT NULL,
+      skill TEXT NOT NULL,
+      PRIMARY KEY (profile_id, skill_group, skill)
+    )
+    """)
+
     # Indexes (safe)
     cur.execute("CREATE INDEX IF NOT EXISTS idx_profiles_domain ON profiles(domain)")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_profiles_email ON profiles(email)")
+    # Serves the recency ordering (and keyset cursors) of search_profiles_page
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_profiles_recency ON profiles(COALESCE(updated_at, created_at, ''), profile_id)")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_jds_domain ON jds(domain)")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_jds_created ON jds(created_at)")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_jds_updated ON jds(updated_at)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_profile_skills_skill ON profile_skills(skill, profile_id)")
+
+    # Backfill the skill index for profiles saved before it existed (no-op once in sync)
+    cur.execute("""
+    INSERT OR IGNORE INTO profile_skills (profile_id, skill_group, skill)
+    SELECT p.profile_id, category.key, skill.value
+    FROM profiles p
+    JOIN json_each(p.data_json, '$.skills') AS category
+    JOIN json_each(category.value) AS skill
+    WHERE json_valid(p.data_json)
+      AND category.type = 'array'
+      AND skill.type = 'text'
+      AND p.profile_id NOT IN (SELECT DISTINCT profile_id FROM profile_skills)
+    """)
 
     conn.commit()
     conn.close()
 
-def upsert_profile(db_path: str, profile: dict):
+def _sync_profile_skills(cur: sqlite3.Cursor, profile_id: str, skills: Any):
+    cur.execute("DELETE FROM profile_skills WHERE profile_id=?", (profile_id,))
+    rows = []
+    for group, items in (skills or {}).items():
+        if not isinstance(items, list):
+            continue
+        for sk in items:
+            if isinstance(sk, str):
+                rows.append((profile_id, group, sk))
+    cur.executemany("INSERT OR IGNORE INTO profile_skills (profile_id, skill_group, skill) VALUES (?,?,?)", rows)
+
+def _upsert_profile_row(cur: sqlite3.Cursor, profile: dict, now: str):
     meta = profile.get("meta", {}) or {}
     contact = profile.get("contact", {}) or {}
 
@@ -96,10 +138,6 @@ def upsert_profile(db_path: str, profile: dict):
     full_name = contact.get("full_name") or contact.get("name") or ""
     email = contact.get("email") or ""
 
-    now = datetime.utcnow().isoformat() + "Z"
-
-    conn = _conn(db_path)
-    cur = conn.cursor()
     cur.execute("SELECT profile_id FROM profiles WHERE profile_id=?", (profile_id,))
     exists = cur.fetchone() is not None
 
@@ -115,38 +153,72 @@ def upsert_profile(db_path: str, profile: dict):
         VALUES (?,?,?,?,?,?,?)
         """, (profile_id, domain, full_name, email, now, now, json.dumps(profile)))
 
-    conn.commit()
-    conn.close()
+    _sync_profile_skills(cur, profile_id, profile.get("skills"))
+
+def upsert_profile(db_path: str, profile: dict):
+    upsert_profiles(db_path, [profile])
+
+def upsert_profiles(db_path: str, profiles: List[dict]):
+    """Save several profiles in one connection and transaction (all or nothing)."""
+    if not profiles:
+        return
+    now = datetime.utcnow().isoformat() + "Z"
+
+    conn = _conn(db_path)
+    try:
+        cur = conn.cursor()
+        for profile in profiles:
+            _upsert_profile_row(cur, profile, now)
+        conn.commit()
+    finally:
+        conn.close()
+    _SEARCH_TOTALS.clear()
+
+def update_profile_name(db_path: str, profile_id: str, full_name: str):
+    """Set the name of a saved profile that still has none, leaving the rest of its data alone."""
+    now = datetime.utcnow().isoformat() + "Z"
+    conn = _conn(db_path)
+    try:
+        conn.execute("""
+        UPDATE profiles
+        SET full_name=?, updated_at=?, data_json=json_set(data_json, '$.contact.full_name', ?)
+        WHERE profile_id=? AND COALESCE(full_name, '')=''
+        """, (full_name, now, full_name, profile_id))
+        conn.commit()
+    finally:
+        conn.close()
+    _SEARCH_TOTALS.clear()
 
 def list_profiles(db_path: str, domain: Optional[str] = "technology", limit: int = 5, skills_filter: Optional[List[str]] = None):
     conn = _conn(db_path)
     cur = conn.cursor()
 
     if skills_filter:
-        # If domain filter yields none, fall back to all (so you never "lose" data in UI)
-        if domain is None:
-            cur.execute("""SELECT p.profile_id, p.domain, p.full_name, p.email, COUNT(DISTINCT input_skill.value) AS overlap_count
-                    FROM profiles p
-                    LEFT JOIN json_each(p.data_json, '$.skills') AS category
-                    LEFT JOIN json_each(category.value) AS skill
-                    LEFT JOIN json_each(?) AS input_skill ON skill.value = input_skill.value
-                    GROUP BY p.profile_id
-                    ORDER BY overlap_count DESC LIMIT ?""", (json.dumps(skills_filter), limit))
-            rows = cur.fetchall()
-            conn.close()
-            return [dict(r) for r in rows]
-
-        cur.execute("""SELECT p.profile_id, p.domain, p.full_name, p.email, COUNT(DISTINCT input_skill.value) AS overlap_count
-                    FROM profiles p
-                    LEFT JOIN json_each(p.data_json, '$.skills') AS category
-                    LEFT JOIN json_each(category.value) AS skill
-                    LEFT JOIN json_each(?) AS input_skill ON skill.value = input_skill.value
-                    WHERE COALESCE(p.domain,'')=?
-                    GROUP BY p.profile_id
-                    ORDER BY overlap_count DESC LIMIT ?""", (json.dumps(skills_filter), domain, limit))
-        rows = cur.fetchall()
+        # Profiles sharing at least one skill come from the profile_skills index; the rest
+        # of the page is topped up with non-matching profiles (overlap_count = 0) as before.
+        domain_clause = "" if domain is None else " AND COALESCE(p.domain,'')=?"
+        domain_params = () if domain is None else (domain,)
+
+        cur.execute(f"""SELECT p.profile_id, p.domain, p.full_name, p.email, m.overlap_count
+                    FROM (SELECT ps.profile_id, COUNT(DISTINCT ps.skill) AS overlap_count
+                          FROM profile_skills ps
+                          WHERE ps.skill IN (SELECT value FROM json_each(?))
+                          GROUP BY ps.profile_id) AS m
+                    JOIN profiles p ON p.profile_id = m.profile_id
+                    WHERE 1=1{domain_clause}
+                    ORDER BY m.overlap_count DESC LIMIT ?""", (json.dumps(skills_filter), *domain_params, limit))
+        rows = [dict(r) for r in cur.fetchall()]
+
+        if len(rows) < limit:
+            matched_ids = [r["profile_id"] for r in rows]
+            cur.execute(f"""SELECT p.profile_id, p.domain, p.full_name, p.email, 0 AS overlap_count
+                        FROM profiles p
+                        WHERE p.profile_id NOT IN (SELECT value FROM json_each(?)){domain_clause}
+                        LIMIT ?""", (json.dumps(matched_ids), *domain_params, limit - len(rows)))
+            rows.extend(dict(r) for r in cur.fetchall())
 
-        return [dict(r) for r in rows]
+        conn.close()
+        return rows
     
     else:
         # If domain filter yields none, fall back to all (so you never "lose" data in UI)
@@ -239,64 +311,107 @@ def search_profiles(db_path: str, domain: Optional[str] = "technology", search_s
     conn.close()
     return [dict(r) for r in rows]
 
-def search_profiles_page_count(db_path: str, domain: Optional[str] = "technology", search_string: str = "", pageLimit: int = 10) -> List[int]:
-    conn = _conn(db_path)
-    cur = conn.cursor()
+def _page_count(row_count: int, page_limit: int) -> int:
+    return (row_count // page_limit) + (1 if row_count and row_count % page_limit > 0 else 0)
 
+def search_profiles_page_count(db_path: str, domain: Optional[str] = "technology", search_string: str = "", pageLimit: int = 10) -> List[int]:
     print(f"Finding number of profiles with domain='{domain}' and search_string='{search_string}'")
 
-    # If domain filter yields none, fall back to all (so you never "lose" data in UI)
-    if domain is None:
-        cur.execute("SELECT COUNT(*) FROM profiles WHERE full_name LIKE ? OR email LIKE ? ORDER BY COALESCE(updated_at, created_at) DESC LIMIT ?", (f"%{search_string}%", f"%{search_string}%", pageLimit))
-        rows = cur.fetchall()
-        # Calculate page count based on total rows and page limit
-        rowCount = rows[0][0] if rows else 0
-        pages = (rowCount // pageLimit) + (1 if rows and rowCount % pageLimit > 0 else 0)
+    key = (db_path, domain, search_string)
+    rowCount = _SEARCH_TOTALS.get(key)
+
+    if rowCount is None:
+        # domain=None counts every domain
+        where = "(full_name LIKE ? OR email LIKE ?)"
+        params = [f"%{search_string}%", f"%{search_string}%"]
+        if domain is not None:
+            where = "COALESCE(domain,'')=? AND " + where
+            params.insert(0, domain)
+
+        conn = _conn(db_path)
+        cur = conn.cursor()
+        cur.execute(f"SELECT COUNT(*) FROM profiles WHERE {where}", params)
+        rowCount = cur.fetchone()[0]
         conn.close()
-        return [rowCount,pages]
+        _SEARCH_TOTALS.set(key, rowCount)
+
+    print(f"Number of profiles found: {rowCount}")
+    return [rowCount, _page_count(rowCount, pageLimit)]
+
+def _profiles_page_query(domain: Optional[str], search_string: str, after: Optional[list] = None, with_total: bool = False):
+    # Newest first; profile_id breaks ties so (recency, profile_id) is a unique keyset position
+    where = "(full_name LIKE ? OR email LIKE ?)"
+    params = [f"%{search_string}%", f"%{search_string}%"]
+    if domain is not None:
+        where = "COALESCE(domain,'')=? AND " + where
+        params.insert(0, domain)
+    if after:
+        where += " AND (COALESCE(updated_at, created_at, ''), profile_id) < (?, ?)"
+        params.extend(after)
+
+    # COUNT(*) OVER() puts the total match count on every row of the page
+    total = ", COUNT(*) OVER() AS total_count" if with_total else ""
+    sql = f"SELECT profile_id, domain, full_name, email, COALESCE(updated_at, created_at, '') AS sort_key{total} FROM profiles WHERE {where} ORDER BY COALESCE(updated_at, created_at, '') DESC, profile_id DESC LIMIT ?"
+    return sql, params
+
+def _with_profile_data(db_path: str, rows) -> List[dict]:
+    returned_profiles = []
+    for r in rows:
+        processedRow = {k: r[k] for k in ("profile_id", "domain", "full_name", "email")}
+        processedRow.update({"data": get_profile(db_path, r["profile_id"])})
+        returned_profiles.append(processedRow)
+    return returned_profiles
 
-    cur.execute("SELECT COUNT(*) FROM profiles WHERE COALESCE(domain,'')=? AND (full_name LIKE ? OR email LIKE ?) ORDER BY COALESCE(updated_at, created_at) DESC LIMIT ?", (domain, f"%{search_string}%", f"%{search_string}%", pageLimit))
-    rows = cur.fetchall()
+def search_profiles_full(db_path: str, domain: Optional[str] = "technology", search_string: str = "", pageLimit: int = 10, currentPage: int = 0):
+    print(f"Searching profiles with domain='{domain}' and search_string='{search_string}'")
+
+    # domain=None searches every domain
+    sql, params = _profiles_page_query(domain, search_string)
 
+    conn = _conn(db_path)
+    cur = conn.cursor()
+    cur.execute(sql + " OFFSET ?", params + [pageLimit, currentPage * pageLimit])
+    rows = cur.fetchall()
     conn.close()
-    print(f"Number of profiles found: {rows[0][0] if rows else 0}")
 
-    # Calculate page count based on total rows and page limit
-    rowCount = rows[0][0] if rows else 0
-    pages = (rowCount // pageLimit) + (1 if rows and rowCount % pageLimit > 0 else 0)
+    return _with_profile_data(db_path, rows)
 
-    return [rowCount,pages]
+def search_profiles_page(db_path: str, domain: Optional[str] = "technology", search_string: str = "", pageLimit: int = 10, cursor: Optional[str] = None) -> dict:
+    """Keyset variant of search_profiles_full: {"results": [...], "next_cursor": str | None}."""
+    sql, params = _profiles_page_query(domain, search_string, decode_cursor(cursor, 2))
 
-def search_profiles_full(db_path: str, domain: Optional[str] = "technology", search_string: str = "", pageLimit: int = 10, currentPage: int = 0):
     conn = _conn(db_path)
     cur = conn.cursor()
+    cur.execute(sql, params + [pageLimit + 1])
+    page = keyset_page(cur.fetchall(), pageLimit, lambda r: (r["sort_key"], r["profile_id"]))
+    conn.close()
 
-    print(f"Searching profiles with domain='{domain}' and search_string='{search_string}'")
-    returned_profiles = []
-
-    # If domain filter yields none, fall back to all (so you never "lose" data in UI)
-    if domain is None:
-        cur.execute("SELECT profile_id, domain, full_name, email, FROM profiles WHERE full_name LIKE ? OR email LIKE ? ORDER BY COALESCE(updated_at, created_at) DESC LIMIT ? OFFSET ?", (f"%{search_string}%", f"%{search_string}%", pageLimit, currentPage * pageLimit))
-        rows = cur.fetchall()
-
-        for r in rows:
-            processedRow = dict(r)
-            processedRow.update({"data": get_profile(db_path, r["profile_id"])})
-            returned_profiles.append(processedRow)
+    return {"results": _with_profile_data(db_path, page["rows"]), "next_cursor": page["next_cursor"]}
 
-        conn.close()
-        return returned_profiles
+def search_profiles_with_total(db_path: str, domain: Optional[str] = "technology", search_string: str = "", pageLimit: int = 10, currentPage: int = 0) -> dict:
+    """One page of search_profiles_full plus the total, counted in the same query."""
+    sql, params = _profiles_page_query(domain, search_string, with_total=True)
+    key = (db_path, domain, search_string)
 
-    cur.execute("SELECT profile_id, domain, full_name, email FROM profiles WHERE COALESCE(domain,'')=? AND (full_name LIKE ? OR email LIKE ?) ORDER BY COALESCE(updated_at, created_at) DESC LIMIT ? OFFSET ?", (domain, f"%{search_string}%", f"%{search_string}%", pageLimit, currentPage * pageLimit))
+    conn = _conn(db_path)
+    cur = conn.cursor()
+    cur.execute(sql + " OFFSET ?", params + [pageLimit, currentPage * pageLimit])
     rows = cur.fetchall()
-
-    for r in rows:
-        processedRow = dict(r)
-        processedRow.update({"data": get_profile(db_path, r["profile_id"])})
-        returned_profiles.append(processedRow)
-
     conn.close()
-    return returned_profiles
+
+    if rows:
+        total = rows[0]["total_count"]
+        _SEARCH_TOTALS.set(key, total)
+    else:
+        # Past the last page there is no row to carry the window total
+        total = search_profiles_page_count(db_path, domain, search_string, pageLimit)[0]
+
+    return {
+        "results": _with_profile_data(db_path, rows),
+        "total": total,
+        "pages": _page_count(total, pageLimit),
+        "currentPage": currentPage + 1,
+    }
 
 def get_profile(db_path: str, profile_id: str) -> Optional[dict]:
     conn = _conn(db_path)
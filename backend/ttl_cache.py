@@ -0,0 +1,91 @@
+import threading
+import time
+from collections import OrderedDict
+
+class TTLCache:
+    """
+    Small thread-safe key/value cache whose entries expire ttl_seconds after they were set.
+
+    Used for short-lived values that many requests recompute with the same inputs
+    (search totals per filter signature, dashboard counts). Oldest entries are evicted
+    once max_entries is reached.
+
+    With stale_seconds > 0, get_or_load() keeps serving an expired value for that much
+    longer while a background thread reloads it (stale-while-revalidate), so callers
+    only wait on the loader when nothing usable is cached.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024, stale_seconds: float = 0):
+        self._ttl = ttl_seconds
+        self._stale = stale_seconds
+        self._max = max_entries
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+        self._refreshing = set()
+        self._stats = {"hits": 0, "misses": 0, "stale_hits": 0, "sets": 0, "evictions": 0, "refresh_errors": 0}
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self._stats["misses"] += 1
+                return default
+            self._stats["hits"] += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self._ttl, value)
+            self._data.move_to_end(key)
+            self._stats["sets"] += 1
+            while len(self._data) > self._max:
+                self._data.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def get_or_load(self, key, loader):
+        """Cached value for key, calling loader() and caching its result on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > now:
+                self._stats["hits"] += 1
+                return entry[1]
+
+            if entry is not None and entry[0] + self._stale > now:
+                self._stats["stale_hits"] += 1
+                if key not in self._refreshing:
+                    self._refreshing.add(key)
+                    threading.Thread(target=self._refresh, args=(key, loader), daemon=True).start()
+                return entry[1]
+
+            self._stats["misses"] += 1
+
+        value = loader()
+        self.set(key, value)
+        return value
+
+    def _refresh(self, key, loader):
+        try:
+            self.set(key, loader())
+        except Exception as e:
+            # Keep serving the stale value until it ages out completely
+            self._stats["refresh_errors"] += 1
+            print(f"Background cache refresh failed for {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": len(self._data),
+                "ttl_seconds": self._ttl,
+                "stale_seconds": self._stale,
+            }